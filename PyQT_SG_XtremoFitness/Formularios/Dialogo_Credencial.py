@@ -68,8 +68,8 @@ class DialogoCredencial(QDialog):
         layout_membresia = QGridLayout(marco_membresia)
         layout_membresia.setSpacing(4)
 
-        if self.socio.membresias:
-            membresia_reciente = max(self.socio.membresias, key=lambda m: m.fecha_fin)
+        membresia_reciente = self.socio.membresia_actual
+        if membresia_reciente:
             from datetime import date
             dias_restantes = (membresia_reciente.fecha_fin - date.today()).days
             estatus, color_estatus, dias_restantes_str = ("VENCIDO", COLOR_VENCIDO, "Vencido") if dias_restantes < 0 else ("ACTIVO", COLOR_ACTIVO, f"{dias_restantes} días")
@@ -10,6 +10,7 @@ from Formularios.Form_plan import PlanRegistro
 from Formularios.Form_socios import SocioRegistro
 from Formularios.Form_pagos import PagosRegistro
 from Formularios.Form_accesos import AccesoRegistro
+from Formularios.Panel_Resumen import PanelResumen
 from config import *
 
 class Form_Principal(QMainWindow):
@@ -136,8 +137,12 @@ class Form_Principal(QMainWindow):
         label_xtremo = QLabel("Xtremo Fitness")
         label_xtremo.setStyleSheet("font-size: 48px; color: #333333; font-weight: bold;")
         
+        # Tablero con los resúmenes del día y del mes
+        self.panel_resumen = PanelResumen()
+
         layout_bienvenida.addWidget(label_bienvenido)
         layout_bienvenida.addWidget(label_xtremo)
+        layout_bienvenida.addWidget(self.panel_resumen)
         
         self.contenedor_contenido.addWidget(self.pagina_bienvenida)
 
@@ -159,9 +164,11 @@ class Form_Principal(QMainWindow):
         self.modulo_pagos.pago_realizado.connect(self.modulo_socios.actualizar_lista)
         self.modulo_pagos.pago_realizado.connect(self.modulo_pagos.actualizar_lista_socios)
         self.modulo_pagos.pago_realizado.connect(self.modulo_accesos._limpiar_formulario)
-        # Cuando el módulo de planes emita "planes_actualizados",
-        # se ejecutará el método "cargar_planes_en_combobox" del módulo de socios.
-        self.modulo_planes.planes_actualizados.connect(self.modulo_socios.cargar_planes_en_combobox)
+        self.modulo_pagos.pago_realizado.connect(self.panel_resumen.actualizar)
+        # Cuando el módulo de planes emita "planes_actualizados", los módulos comparan la versión
+        # del catálogo de planes y sólo recargan sus combos si cambió (la lectura es en memoria).
+        self.modulo_planes.planes_actualizados.connect(self.modulo_socios.refrescar_planes_si_cambiaron)
+        self.modulo_planes.planes_actualizados.connect(self.modulo_pagos.refrescar_planes_si_cambiaron)
         
         # 3. Conectamos las señales "clicked" de los botones a sus acciones
         self.btn_inicio.clicked.connect(lambda: self.contenedor_contenido.setCurrentWidget(self.pagina_bienvenida))
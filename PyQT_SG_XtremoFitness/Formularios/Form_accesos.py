@@ -18,7 +18,10 @@ except ImportError:
 
 from config import *
 from aplicacion.serviciosSocio import ServiciosSocio
-from Utilerias.captura_huella import IdentificationWorker
+from aplicacion.serviciosAcceso import (ServiciosAcceso, METODO_QR, METODO_HUELLA, RESULTADO_PERMITIDO,
+                                        RESULTADO_SIN_MEMBRESIA, RESULTADO_NO_ENCONTRADO)
+from Utilerias.captura_huella import obtener_servicio_biometrico, MODO_IDENTIFICACION
+from Utilerias.ejecutor import obtener_ejecutor
 from datetime import date
 
 # --- NUEVA CLASE: WORKER PARA LA CÁMARA Y QR ---
@@ -117,7 +120,12 @@ class AccesoRegistro(QWidget):
         
         # Lógica Adicional
         self.servicios_socio = ServiciosSocio()
-        self.identification_thread = None
+        # Bitácora de accesos: registrar sólo encola, la escritura es por lotes en otro hilo
+        self.servicios_acceso = ServiciosAcceso()
+        # Las búsquedas por QR/huella corren fuera del hilo de la interfaz (la cámara no se congela)
+        self.ejecutor = obtener_ejecutor()
+        # Sesión del lector de huellas compartido: abierta mientras el módulo está visible
+        self.sesion_huella = None
         # --- NUEVO: Hilo para la cámara ---
         self.camera_thread = None
         # --- NUEVO: Hilo para descubrir cámaras ---
@@ -135,13 +143,15 @@ class AccesoRegistro(QWidget):
     def hideEvent(self, event):
         """Se ejecuta cada vez que el widget se oculta."""
         self._detener_identificacion_por_huella()
+        # Una identificación pendiente ya no debe mostrar la credencial en un módulo oculto
+        self.ejecutor.cancelar("accesos.identificacion")
         # --- NUEVO: Detener cámara al ocultar ---
         self._detener_camara()
         self._detener_busqueda_camaras()
         super().hideEvent(event)
 
     def closeEvent(self, event):
-        """Asegura que el hilo se detenga al cerrar la ventana principal."""
+        """Suelta el lector y detiene los hilos de cámara al cerrar la ventana principal."""
         self._detener_identificacion_por_huella()
         self._detener_busqueda_camaras()
         # --- NUEVO: Detener cámara al cerrar ---
@@ -272,7 +282,8 @@ class AccesoRegistro(QWidget):
         if color == COLOR_EXITO: self.sonido_exito.play()
         elif color == COLOR_ERROR: self.sonido_error.play()
 
-    def _actualizar_credencial(self, socio):
+    def _actualizar_credencial(self, socio) -> bool:
+        """Muestra la credencial y decide el acceso; devuelve True si la membresía está activa hoy."""
         # --- Foto Circular ---
         if socio.foto_ruta:
             qimage = QImage.fromData(socio.foto_ruta)
@@ -293,10 +304,8 @@ class AccesoRegistro(QWidget):
         # --- LÓGICA CORREGIDA ---
         # En lugar de tomar la primera membresía activa que encuentre, buscamos la más reciente.
         # Esto soluciona el bug donde se mostraba una membresía antigua si se renovaba el mismo día.
-        if socio.membresias:
-            membresia_reciente = max(socio.membresias, key=lambda m: m.fecha_fin)
-        else:
-            membresia_reciente = None
+        # La membresía vigente ya viene resuelta por el servicio (tabla Membresias_Vigentes).
+        membresia_reciente = socio.membresia_actual
 
         # Verificamos si la membresía más reciente está activa hoy
         if membresia_reciente and membresia_reciente.fecha_inicio <= hoy <= membresia_reciente.fecha_fin:
@@ -308,6 +317,7 @@ class AccesoRegistro(QWidget):
             self.label_fecha_fin.setText(f"Fin: {membresia_reciente.fecha_fin.strftime('%d/%m/%Y')}")
             dias_restantes = (membresia_reciente.fecha_fin - hoy).days
             self.label_dias_restantes.setText(f"Quedan {dias_restantes} días")
+            return True
         else:
             self.label_plan.setText("Plan: N/A")
             self._actualizar_estado("ACCESO DENEGADO", COLOR_ERROR)
@@ -316,6 +326,7 @@ class AccesoRegistro(QWidget):
             self.label_fecha_inicio.setText("Inicio: --/--/----")
             self.label_fecha_fin.setText("Fin: --/--/----")
             self.label_dias_restantes.setText("Membresía no activa")
+            return False
 
     def _limpiar_formulario(self):
         self.label_foto.setText("Foto")
@@ -374,37 +385,61 @@ class AccesoRegistro(QWidget):
             self.label_estado_huella.setText("Identificación por huella no disponible en este SO.")
             return
 
-        if self.identification_thread and self.identification_thread.isRunning():
+        if self.sesion_huella is not None:
             return
 
-        self.identification_thread = IdentificationWorker()
-        self.identification_thread.huella_capturada.connect(self._on_huella_identificada)
-        self.identification_thread.error_sdk.connect(self._on_error_sdk_huella)
-        self.identification_thread.estado_lector.connect(self._on_estado_lector_actualizado)
-        self.identification_thread.start()
+        # Galería de huellas cargada y ordenada antes de la primera lectura (hilo en segundo plano)
+        self.servicios_socio.preparar_identificacion_por_huella()
+        # El SDK se inicializa una sola vez por proceso; volver al módulo sólo reanuda la adquisición
+        self.sesion_huella = obtener_servicio_biometrico().crear_sesion(MODO_IDENTIFICACION)
+        self.sesion_huella.huella_capturada.connect(self._on_huella_identificada)
+        self.sesion_huella.error_sdk.connect(self._on_error_sdk_huella)
+        self.sesion_huella.estado.connect(self._on_estado_lector_actualizado)
+        self.sesion_huella.abrir()
 
     def _detener_identificacion_por_huella(self):
-        if self.identification_thread and self.identification_thread.isRunning():
-            self.identification_thread.stop()
-            self.identification_thread.wait() # Espera a que el hilo termine limpiamente
-        self.identification_thread = None
+        if self.sesion_huella is not None:
+            self.sesion_huella.cerrar() # No espera: el servicio detiene la adquisición en su hilo
+        self.sesion_huella = None
         self.label_estado_huella.setText("Lector de huella detenido.")
 
     def _on_huella_identificada(self, fmd_capturado):
-        try:
-            self.label_estado_huella.setText("Huella capturada. Buscando en la base de datos...")
-            socio_encontrado = self.servicios_socio.identificar_por_huella(fmd_capturado)
-
-            if socio_encontrado:
-                self._actualizar_credencial(socio_encontrado)
-            else:
-                self._limpiar_formulario()
-                self._actualizar_estado("ACCESO DENEGADO", COLOR_ERROR)
-                QMessageBox.warning(self, "No Encontrado", "La huella no coincide con ningún socio registrado.")
+        self.label_estado_huella.setText("Huella capturada. Buscando en la base de datos...")
+        # Misma clave que el QR: si llega otra lectura antes de terminar, gana la más reciente y la
+        # búsqueda anterior se detiene (cancelable); si no termina a tiempo se pide otra lectura
+        self.ejecutor.ejecutar(
+            self.servicios_socio.identificar_por_huella, fmd_capturado,
+            al_terminar=lambda socio: self._mostrar_identificacion(
+                socio, "La huella no coincide con ningún socio registrado.", METODO_HUELLA),
+            al_fallar=self._on_error_identificacion_huella,
+            clave="accesos.identificacion",
+            tiempo_maximo_ms=TIEMPO_MAXIMO_IDENTIFICACION_MS, cancelable=True
+        )
+
+    def _on_error_identificacion_huella(self, error):
+        if isinstance(error, TimeoutError):
+            # Sin ventana modal: en la recepción basta con volver a poner el dedo
+            self.label_estado_huella.setText("La identificación tardó demasiado. Coloque el dedo de nuevo.")
+            return
+        QMessageBox.critical(self, "Error de Identificación", f"Ocurrió un error al procesar la huella: {error}")
+        self.label_estado_huella.setText("Error al procesar huella.")
 
-        except Exception as e:
-            QMessageBox.critical(self, "Error de Identificación", f"Ocurrió un error al procesar la huella: {e}")
-            self.label_estado_huella.setText("Error al procesar huella.")
+    def _mostrar_identificacion(self, socio_encontrado, mensaje_no_encontrado: str, metodo: int,
+                                socio_id_leido: int | None = None):
+        """
+        Muestra la credencial del socio identificado (por QR o huella) o el acceso denegado,
+        y deja la decisión en la bitácora. socio_id_leido es el ID que traía el QR (aunque no exista).
+        """
+        if socio_encontrado:
+            permitido = self._actualizar_credencial(socio_encontrado)
+            self.servicios_acceso.registrar_acceso(
+                socio_encontrado.id, metodo, RESULTADO_PERMITIDO if permitido else RESULTADO_SIN_MEMBRESIA
+            )
+        else:
+            self._limpiar_formulario()
+            self._actualizar_estado("ACCESO DENEGADO", COLOR_ERROR)
+            self.servicios_acceso.registrar_acceso(socio_id_leido, metodo, RESULTADO_NO_ENCONTRADO)
+            QMessageBox.warning(self, "No Encontrado", mensaje_no_encontrado)
 
     def _on_error_sdk_huella(self, mensaje):
         QMessageBox.critical(self, "Error de Lector de Huella", mensaje)
@@ -489,13 +524,12 @@ class AccesoRegistro(QWidget):
         try:
             if qr_data.startswith("socio_id:"):
                 socio_id = int(qr_data.split(":")[1])
-                socio_encontrado = self.servicios_socio.obtener_socio_por_id(socio_id)
-
-                if socio_encontrado:
-                    self._actualizar_credencial(socio_encontrado)
-                else:
-                    self._limpiar_formulario()
-                    self._actualizar_estado("ACCESO DENEGADO", COLOR_ERROR)
-                    QMessageBox.warning(self, "No Encontrado", f"El socio con ID {socio_id} no fue encontrado.")
+                self.ejecutor.ejecutar(
+                    self.servicios_socio.obtener_socio_por_id, socio_id,
+                    al_terminar=lambda socio: self._mostrar_identificacion(
+                        socio, f"El socio con ID {socio_id} no fue encontrado.", METODO_QR, socio_id),
+                    al_fallar=lambda error: self.label_estado_huella.setText(f"Error al buscar el socio: {error}"),
+                    clave="accesos.identificacion"
+                )
         except (ValueError, IndexError) as e:
             self.label_estado_huella.setText(f"QR no válido: {qr_data}")
@@ -7,8 +7,25 @@ from datetime import date
 
 from aplicacion.serviciosSocio import ServiciosSocio
 from aplicacion.serviciosPlan import ServiciosPlan
-from aplicacion.serviciosMembresia import ServiciosMembresia
+from aplicacion.serviciosMembresia import ServiciosMembresia, ESTATUS_ACTIVOS, ESTATUS_POR_VENCER, ESTATUS_VENCIDOS
 from config import *
+from Utilerias.ejecutor import obtener_ejecutor
+
+# Texto del combo de filtros -> estatus que entiende ServiciosSocio.obtener_pagina_socios
+# (el combo guarda el estatus como dato del elemento; el texto se completa con el conteo)
+FILTROS_ESTATUS = {
+    "Todos": None,
+    "Activos": ESTATUS_ACTIVOS,
+    "Por Vencer": ESTATUS_POR_VENCER,
+    "Vencidos": ESTATUS_VENCIDOS,
+}
+
+# Colores de la columna de estatus (fondo, texto) por grupo de estatus
+COLORES_ESTATUS = {
+    ESTATUS_ACTIVOS: (COLOR_ACTIVO, "white"),
+    ESTATUS_POR_VENCER: ("#FFC107", "black"), # Un color ámbar
+    ESTATUS_VENCIDOS: (COLOR_VENCIDO, "white"),
+}
 
 class PagosRegistro(QWidget):
     # Señal que se emitirá cuando se complete un pago/renovación
@@ -20,6 +37,13 @@ class PagosRegistro(QWidget):
         self.servicio_socios = ServiciosSocio()
         self.servicio_planes = ServiciosPlan()
         self.servicio_membresia = ServiciosMembresia()
+        # Las consultas corren fuera del hilo de la interfaz y el resultado llega por señal
+        self.ejecutor = obtener_ejecutor()
+        # Estado de la paginación de la tabla de socios
+        self._cursor_socios = None
+        self._hay_mas_socios = False
+        # Versión del catálogo de planes con la que se llenó el combo de renovación
+        self._version_planes = None
 
         self._crear_ui()
         self._conectar_senales()
@@ -30,7 +54,9 @@ class PagosRegistro(QWidget):
     def showEvent(self, event):
         """Se ejecuta cada vez que el widget se hace visible para recargar los datos."""
         super().showEvent(event)
+        self.refrescar_planes_si_cambiaron()
         self.actualizar_lista_socios()
+        self.actualizar_conteos_estatus()
         self.limpiar_seccion_renovacion()
 
     def _crear_ui(self):
@@ -58,7 +84,8 @@ class PagosRegistro(QWidget):
         label_filtrar = QLabel("Filtrar Socios Por:")
         label_filtrar.setStyleSheet("font-weight: bold;")
         self.combo_filtro = QComboBox()
-        self.combo_filtro.addItems(["Todos", "Activos", "Por Vencer", "Vencidos"])
+        for texto, estatus in FILTROS_ESTATUS.items():
+            self.combo_filtro.addItem(texto, userData=estatus)
         self.combo_filtro.setStyleSheet("background-color: white; color: black; border-radius: 4px; padding: 5px;")
         
         layout_filtros.addWidget(label_filtrar)
@@ -110,13 +137,22 @@ class PagosRegistro(QWidget):
         self.socio_id_seleccionado = None
 
     def _conectar_senales(self):
-        self.combo_filtro.currentTextChanged.connect(self.actualizar_lista_socios)
+        # Por índice: el texto del elemento cambia al actualizar los conteos
+        self.combo_filtro.currentIndexChanged.connect(self.actualizar_lista_socios)
         self.tabla_socios.itemClicked.connect(self.al_seleccionar_socio)
+        # Al llegar al final de la tabla se trae la siguiente página de socios
+        self.tabla_socios.verticalScrollBar().valueChanged.connect(self._al_desplazar_tabla)
         self.btn_confirmar_renovacion.clicked.connect(self.renovar_membresia)
 
+    def refrescar_planes_si_cambiaron(self):
+        """Recarga el combo de planes sólo si el catálogo cambió desde la última carga."""
+        if self._version_planes != self.servicio_planes.version_catalogo():
+            self.cargar_planes_en_combobox()
+
     def cargar_planes_en_combobox(self):
         """Carga los planes disponibles en el combobox de renovación."""
         try:
+            self._version_planes = self.servicio_planes.version_catalogo()
             self.combo_nuevo_plan.clear()
             planes = self.servicio_planes.obtener_planes()
             if planes:
@@ -126,51 +162,68 @@ class PagosRegistro(QWidget):
             QMessageBox.critical(self, "Error", f"No se pudieron cargar los planes para renovación: {e}")
 
     def actualizar_lista_socios(self):
-        """Filtra y actualiza la tabla de socios según el criterio seleccionado."""
-        filtro = self.combo_filtro.currentText()
+        """Recarga la tabla desde la primera página del filtro seleccionado; el resto se carga al desplazarse."""
+        self._hay_mas_socios = False # Evita que el desplazamiento dispare cargas mientras se vacía la tabla
         self.tabla_socios.setRowCount(0)
-        try:
-            socios = self.servicio_socios.obtener_socios_con_membresia()
-            socios_filtrados = []
+        self._cursor_socios = None
+        self._hay_mas_socios = True
+        self._cargar_siguiente_pagina()
+
+    def actualizar_conteos_estatus(self):
+        """Pide en segundo plano cuántos socios hay en cada estatus para mostrarlo en el combo de filtros."""
+        self.ejecutor.ejecutar(
+            self.servicio_membresia.contar_socios_por_estatus,
+            al_terminar=self._mostrar_conteos_estatus, clave="pagos.conteos"
+        )
+
+    def _mostrar_conteos_estatus(self, conteos):
+        for i, (texto, estatus) in enumerate(FILTROS_ESTATUS.items()):
+            cantidad = sum(conteos.values()) if estatus is None else conteos[estatus]
+            self.combo_filtro.setItemText(i, f"{texto} ({cantidad})")
 
+    def _al_desplazar_tabla(self, valor):
+        """Pide la siguiente página cuando el usuario llega al final de la tabla."""
+        if valor >= self.tabla_socios.verticalScrollBar().maximum() - 5:
+            self._cargar_siguiente_pagina()
+
+    def _cargar_siguiente_pagina(self):
+        """Pide en segundo plano la siguiente página de socios; el filtro por estatus se resuelve en la consulta."""
+        if not self._hay_mas_socios:
+            return
+        self._hay_mas_socios = False # Evita pedir otra página mientras ésta se carga
+        estatus = self.combo_filtro.currentData()
+        # Con la misma clave, cambiar de filtro descarta la página que aún no llegaba
+        self.ejecutor.ejecutar(
+            self.servicio_socios.obtener_pagina_socios, self._cursor_socios, TAMANO_PAGINA_SOCIOS, estatus=estatus,
+            al_terminar=self._agregar_pagina, al_fallar=self._al_fallar_carga_socios, clave="pagos.pagina"
+        )
+
+    def _al_fallar_carga_socios(self, error):
+        # Se conserva el cursor: el siguiente desplazamiento vuelve a pedir la misma página
+        self._hay_mas_socios = True
+        QMessageBox.critical(self, "Error", f"No se pudieron cargar los socios: {error}")
+
+    def _agregar_pagina(self, resultado):
+        """Agrega a la tabla la página recibida del ejecutor."""
+        socios, self._cursor_socios = resultado
+        try:
             for socio in socios:
-                estatus = "Inactivo"
-                if socio.membresias:
-                    membresia_reciente = max(socio.membresias, key=lambda m: m.fecha_fin)
-                    estatus = self.servicio_membresia.calcular_estatus_membresia(membresia_reciente.fecha_fin)
-
-                if filtro == "Todos":
-                    socios_filtrados.append(socio)
-                elif filtro == "Activos" and estatus == "Activo":
-                    socios_filtrados.append(socio)
-                elif filtro == "Por Vencer" and ("Por Vencer" in estatus or estatus == "Vence Hoy"):
-                    socios_filtrados.append(socio)
-                elif filtro == "Vencidos" and (estatus == "Vencido" or estatus == "Inactivo"):
-                    socios_filtrados.append(socio)
-
-            for i, socio in enumerate(socios_filtrados):
+                i = self.tabla_socios.rowCount()
                 self.tabla_socios.insertRow(i)
-                nombre_completo = f"{socio.nombre} {socio.apellido_paterno} {socio.apellido_materno or ''}".strip()
+                nombre_completo = socio.nombre_completo
                 nombre_plan, estatus_display, fecha_ini_str, fecha_fin_str = "Sin membresía", "Inactivo", "- - -", "- - -"
-                
-                if socio.membresias:
-                    membresia_reciente = max(socio.membresias, key=lambda m: m.fecha_fin)
-                    nombre_plan = membresia_reciente.plan.nombre
-                    fecha_ini_str = membresia_reciente.fecha_inicio.strftime('%Y-%m-%d')
-                    fecha_fin_str = membresia_reciente.fecha_fin.strftime('%Y-%m-%d')
-                    estatus_display = self.servicio_membresia.calcular_estatus_membresia(membresia_reciente.fecha_fin)
+                if socio.tiene_membresia:
+                    nombre_plan = socio.plan_nombre
+                    fecha_ini_str = socio.fecha_inicio.strftime('%Y-%m-%d')
+                    fecha_fin_str = socio.fecha_fin.strftime('%Y-%m-%d')
+                    estatus_display = self.servicio_membresia.calcular_estatus_membresia(socio.fecha_fin)
                 
                 item_estatus = QTableWidgetItem(estatus_display)
                 # --- LÓGICA DE ESTILO VISUAL ---
-                if "Vencido" in estatus_display or "Inactivo" in estatus_display:
-                    item_estatus.setBackground(QColor(COLOR_VENCIDO))
-                    item_estatus.setForeground(QColor("white"))
-                elif "Por Vencer" in estatus_display or "Vence Hoy" in estatus_display:
-                    item_estatus.setBackground(QColor("#FFC107")) # Un color ámbar
-                    item_estatus.setForeground(QColor("black"))
-                elif "Activo" in estatus_display:
-                    item_estatus.setBackground(QColor(COLOR_ACTIVO))
-                    item_estatus.setForeground(QColor("white"))
+                # El grupo de estatus ya viene calculado en la consulta
+                color_fondo, color_texto = COLORES_ESTATUS[socio.estatus]
+                item_estatus.setBackground(QColor(color_fondo))
+                item_estatus.setForeground(QColor(color_texto))
                 
                 item_estatus.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
                 # --- FIN DE LÓGICA DE ESTILO ---
@@ -181,6 +234,7 @@ class PagosRegistro(QWidget):
                 self.tabla_socios.setItem(i, 3, QTableWidgetItem(fecha_ini_str))
                 self.tabla_socios.setItem(i, 4, QTableWidgetItem(fecha_fin_str))
                 self.tabla_socios.setItem(i, 5, item_estatus)
+            self._hay_mas_socios = self._cursor_socios is not None
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudieron cargar los socios: {e}")
@@ -235,16 +289,11 @@ class PagosRegistro(QWidget):
 
         try:
             # --- INICIO DE LA LÓGICA DE VALIDACIÓN ---
-            # Obtener el socio completo para revisar su membresía actual
-            socio_obj = self.servicio_socios.obtener_socio_por_id(self.socio_id_seleccionado)
-            if not socio_obj:
-                QMessageBox.critical(self, "Error", "El socio seleccionado ya no existe.")
-                self.actualizar_lista_socios()
-                return
+            # Obtener la membresía vigente del socio (una sola fila) para revisar su estatus
+            membresia_reciente = self.servicio_membresia.obtener_membresia_vigente(self.socio_id_seleccionado)
 
             # Validar si el socio puede renovar basado en su estatus actual
-            if socio_obj.membresias:
-                membresia_reciente = max(socio_obj.membresias, key=lambda m: m.fecha_fin)
+            if membresia_reciente:
                 estatus = self.servicio_membresia.calcular_estatus_membresia(membresia_reciente.fecha_fin)
                 
                 # Regla de negocio: No permitir renovar si la membresía está activa y no está próxima a vencer
@@ -286,6 +335,7 @@ class PagosRegistro(QWidget):
 
                 # Actualizar la vista actual
                 self.actualizar_lista_socios()
+                self.actualizar_conteos_estatus()
                 self.limpiar_seccion_renovacion()
             else:
                 QMessageBox.critical(self, "Error", "No se pudo completar la renovación.")
@@ -18,11 +18,13 @@ from Utilerias.util_foto import abrir_camara_sistema, cargar_foto_desde_archivo
 from aplicacion.serviciosSocio import ServiciosSocio
 from aplicacion.serviciosPlan import ServiciosPlan
 from aplicacion.serviciosMembresia import ServiciosMembresia
+from aplicacion import validaciones
 from config import *
 from .Dialogo_Credencial import DialogoCredencial
-from Utilerias.captura_huella import EnrollmentWorker
+from Utilerias.captura_huella import obtener_servicio_biometrico, MODO_ENROLAMIENTO
 from Utilerias.generador_pdf import generar_voucher_socio, abrir_archivo
 from Utilerias.util_imagenes import procesar_imagen_para_perfil
+from Utilerias.ejecutor import obtener_ejecutor
 
 class SocioRegistro(QWidget):
     def __init__(self, master=None):
@@ -30,10 +32,21 @@ class SocioRegistro(QWidget):
         
         # Guardará el nombre del plan cuando se seleccione un socio
         self.plan_original_seleccionado = None
+        # Estado de la paginación de la tabla de socios
+        self._cursor_socios = None
+        self._hay_mas_socios = False
+        # Versión del catálogo de planes con la que se llenó el combo de membresías
+        self._version_planes = None
         
         self.servicio_socios = ServiciosSocio()
         self.servicio_planes = ServiciosPlan()
         self.servicio_membresia = ServiciosMembresia()
+        # Las consultas corren fuera del hilo de la interfaz y el resultado llega por señal
+        self.ejecutor = obtener_ejecutor()
+        # Sesión de enrolamiento en el lector de huellas compartido
+        self.sesion_huella = None
+        # Inicializamos huella_actual a None para evitar AttributeError
+        self.huella_actual = None
         
         self._crear_ui()
         self._conectar_senales()
@@ -42,11 +55,6 @@ class SocioRegistro(QWidget):
         self.limpiar_campos()
         self.cargar_planes_en_combobox()
 
-        # Para manejar el hilo de la huella
-        self.enrollment_thread = None
-        # Inicializamos huella_actual a None para evitar AttributeError
-        self.huella_actual = None
-
     def _crear_line_edit(self, placeholder="", read_only=False):
         """Función auxiliar para crear y estilizar QLineEdit."""
         line_edit = QLineEdit()
@@ -336,6 +344,8 @@ class SocioRegistro(QWidget):
         self.btn_imprimir.clicked.connect(self.imprimir_voucher) 
         self.btn_limpiar.clicked.connect(self.limpiar_campos)
         self.tabla_socios.itemClicked.connect(self.al_seleccionar_tabla)
+        # Al llegar al final de la tabla se trae la siguiente página de socios
+        self.tabla_socios.verticalScrollBar().valueChanged.connect(self._al_desplazar_tabla)
         
         # Conectar botones de foto
         self.btn_tomar_foto.clicked.connect(self.tomar_foto)
@@ -353,46 +363,39 @@ class SocioRegistro(QWidget):
 
     def validar_nombre(self, nombre: str) -> bool:
         """Valida que el nombre contenga solo letras y espacios"""
-        if not nombre or len(nombre.strip()) < 2:
-            return False
-        return nombre.replace(" ", "").isalpha()
+        return validaciones.validar_nombre(nombre)
 
     def validar_datos_socio(self, nombre: str, apellido_paterno: str, apellido_materno: str = "") -> tuple[bool, str]:
-        """Valida todos los datos del socio"""
-        # Validar nombre
-        if not self.validar_nombre(nombre):
-            return False, "El nombre debe tener al menos 2 caracteres y solo contener letras"
-        
-        # Validar apellido paterno
-        if not self.validar_nombre(apellido_paterno):
-            return False, "El apellido paterno debe tener al menos 2 caracteres y solo contener letras"
-        
-        # Validar apellido materno (opcional)
-        if apellido_materno and not self.validar_nombre(apellido_materno):
-            return False, "El apellido materno solo puede contener letras"
-        
-        return True, "Datos válidos"
+        """Valida todos los datos del socio (reglas compartidas con la importación masiva)"""
+        return validaciones.validar_datos_socio(nombre, apellido_paterno, apellido_materno)
 
     def validar_plan_seleccionado(self, plan_nombre: str) -> tuple[bool, str, object]:
         """Valida que el plan seleccionado sea válido"""
-        if not plan_nombre:
-            return False, "Debe seleccionar un plan de membresía", None
-        
         try:
-            plan_obj = self.servicio_planes.obtener_plan_por_nombre(plan_nombre)
-            if not plan_obj:
-                return False, f"No se encontró el plan '{plan_nombre}'. Verifique que el plan existe.", None
-            
-            if plan_obj.duracion_dias <= 0:
-                return False, f"El plan '{plan_nombre}' tiene una duración inválida", None
-            
-            return True, "Plan válido", plan_obj
+            plan_obj = self.servicio_planes.obtener_plan_por_nombre(plan_nombre) if plan_nombre else None
+            es_valido, mensaje = validaciones.validar_plan(plan_nombre, plan_obj)
+            return es_valido, mensaje, plan_obj if es_valido else None
         except Exception as e:
             return False, f"Error al validar el plan: {e}", None
 
-    # El método cargar_planes_en_combobox no se modifica
+    def showEvent(self, event):
+        """Al volver al módulo, recarga el combo de planes si el catálogo cambió."""
+        super().showEvent(event)
+        self.refrescar_planes_si_cambiaron()
+
+    def hideEvent(self, event):
+        """Al salir del módulo se cancela una captura de huella en curso y el lector vuelve a Accesos."""
+        self._cancelar_captura_huella()
+        super().hideEvent(event)
+
+    def refrescar_planes_si_cambiaron(self):
+        """Recarga el combo de planes sólo si el catálogo cambió desde la última carga."""
+        if self._version_planes != self.servicio_planes.version_catalogo():
+            self.cargar_planes_en_combobox()
+
     def cargar_planes_en_combobox(self):
         try:
+            self._version_planes = self.servicio_planes.version_catalogo()
             self.combo_membresia.clear()
             planes = self.servicio_planes.obtener_planes()
             if planes:
@@ -452,7 +455,7 @@ class SocioRegistro(QWidget):
                 )
                 if respuesta == QMessageBox.StandardButton.Yes:
                     # Para imprimir se necesitam el objeto membresía completo
-                    membresia_reciente = max(nuevo_socio.membresias, key=lambda m: m.fecha_fin)
+                    membresia_reciente = nuevo_socio.membresia_actual
                     self._generar_y_abrir_pdf(nuevo_socio, membresia_reciente)
 
                 # Actualizar y limpiar campos independientemente de la respuesta
@@ -468,19 +471,47 @@ class SocioRegistro(QWidget):
             print(f"Error detallado en registro: {e}")  # Para debugging
     
     def actualizar_lista(self):
+        """Recarga la tabla desde la primera página; las siguientes se cargan al desplazarse."""
+        self._hay_mas_socios = False # Evita que el desplazamiento dispare cargas mientras se vacía la tabla
         self.tabla_socios.setRowCount(0)
+        self._cursor_socios = None
+        self._hay_mas_socios = True
+        self._cargar_siguiente_pagina()
+
+    def _al_desplazar_tabla(self, valor):
+        """Pide la siguiente página cuando el usuario llega al final de la tabla."""
+        if valor >= self.tabla_socios.verticalScrollBar().maximum() - 5:
+            self._cargar_siguiente_pagina()
+
+    def _cargar_siguiente_pagina(self):
+        """Pide en segundo plano la siguiente página de socios (paginación por llave en el servicio)."""
+        if not self._hay_mas_socios:
+            return
+        self._hay_mas_socios = False # Evita pedir otra página mientras ésta se carga
+        self.ejecutor.ejecutar(
+            self.servicio_socios.obtener_pagina_socios, self._cursor_socios, TAMANO_PAGINA_SOCIOS,
+            al_terminar=self._agregar_pagina, al_fallar=self._al_fallar_carga_socios, clave="socios.pagina"
+        )
+
+    def _al_fallar_carga_socios(self, error):
+        # Se conserva el cursor: el siguiente desplazamiento vuelve a pedir la misma página
+        self._hay_mas_socios = True
+        QMessageBox.critical(self, "Error", f"No se pudieron cargar los socios: {error}")
+
+    def _agregar_pagina(self, resultado):
+        """Agrega a la tabla la página recibida del ejecutor."""
+        socios, self._cursor_socios = resultado
         try:
-            socios = self.servicio_socios.obtener_socios_con_membresia()
-            for i, socio in enumerate(socios):
+            for socio in socios:
+                i = self.tabla_socios.rowCount()
                 self.tabla_socios.insertRow(i)
-                nombre_completo = f"{socio.nombre} {socio.apellido_paterno} {socio.apellido_materno or ''}".strip()
+                nombre_completo = socio.nombre_completo
                 nombre_plan, estatus, fecha_ini_str, fecha_fin_str = "Sin membresía", "Inactivo", "- - -", "- - -"
-                if socio.membresias:
-                    membresia_reciente = max(socio.membresias, key=lambda m: m.fecha_fin)
-                    nombre_plan = membresia_reciente.plan.nombre
-                    fecha_ini_str = membresia_reciente.fecha_inicio.strftime('%Y-%m-%d')
-                    fecha_fin_str = membresia_reciente.fecha_fin.strftime('%Y-%m-%d')
-                    estatus = self.servicio_membresia.calcular_estatus_membresia(membresia_reciente.fecha_fin)
+                if socio.tiene_membresia:
+                    nombre_plan = socio.plan_nombre
+                    fecha_ini_str = socio.fecha_inicio.strftime('%Y-%m-%d')
+                    fecha_fin_str = socio.fecha_fin.strftime('%Y-%m-%d')
+                    estatus = self.servicio_membresia.calcular_estatus_membresia(socio.fecha_fin)
                 
                 item_estatus = QTableWidgetItem(estatus)
                 # --- LÓGICA DE ESTILO VISUAL ---
@@ -503,13 +534,24 @@ class SocioRegistro(QWidget):
                 self.tabla_socios.setItem(i, 3, QTableWidgetItem(fecha_ini_str))
                 self.tabla_socios.setItem(i, 4, QTableWidgetItem(fecha_fin_str))
                 self.tabla_socios.setItem(i, 5, item_estatus)
+            self._hay_mas_socios = self._cursor_socios is not None
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudieron cargar los socios: {e}")
 
     def al_seleccionar_tabla(self, item):
         fila = item.row()
         id_socio = self.tabla_socios.item(fila, 0).text()
-        socio_obj = self.servicio_socios.obtener_socio_por_id(int(id_socio))
+        self._cargar_socio(int(id_socio))
+
+    def _cargar_socio(self, socio_id: int):
+        """Pide el detalle del socio; si el usuario hace clic en otra fila antes, esta petición se descarta."""
+        self.ejecutor.ejecutar(
+            self.servicio_socios.obtener_socio_por_id, socio_id,
+            al_terminar=self._mostrar_socio, clave="socios.seleccion",
+            al_fallar=lambda error: QMessageBox.critical(self, "Error", f"No se pudo cargar el socio: {error}")
+        )
+
+    def _mostrar_socio(self, socio_obj):
         if socio_obj:
             self.campo_id.setText(str(socio_obj.id))
             self.campo_nombre.setText(socio_obj.nombre)
@@ -531,8 +573,8 @@ class SocioRegistro(QWidget):
                 self.mostrar_estado_huella(True)
             else:
                 self.mostrar_estado_huella(False)
-            if socio_obj.membresias:
-                membresia_reciente = max(socio_obj.membresias, key=lambda m: m.fecha_fin)
+            membresia_reciente = socio_obj.membresia_actual
+            if membresia_reciente:
                 plan_nombre = membresia_reciente.plan.nombre
                 self.combo_membresia.setCurrentText(plan_nombre)
                 # Guardamos el plan original
@@ -657,15 +699,12 @@ class SocioRegistro(QWidget):
                     self.label_foto.setText("Sin Foto")
                     self.foto_actual = None
                 
-                # Volvemos a seleccionar la fila para que los datos actualizados se muestren
+                # Volvemos a cargar el socio para que los datos actualizados se muestren
                 # en el formulario, incluyendo el plan original.
-                for fila in range(self.tabla_socios.rowCount()):
-                    if self.tabla_socios.item(fila, 0).text() == socio_id_str:
-                        self.tabla_socios.setCurrentCell(fila, 0)
-                        # Solo recargar datos si no se eliminó la foto
-                        if foto_para_actualizar != b'':
-                            self.al_seleccionar_tabla(self.tabla_socios.item(fila, 0))
-                        break
+                # (La tabla se recarga en segundo plano, así que se pide por ID y no por fila.)
+                # Solo recargar datos si no se eliminó la foto
+                if foto_para_actualizar != b'':
+                    self._cargar_socio(int(socio_id_str))
             else:
                 QMessageBox.critical(self, "Error", "No se pudieron actualizar los datos del socio.")
 
@@ -724,6 +763,7 @@ class SocioRegistro(QWidget):
         self.label_foto.clear()
         self.label_foto.setText("Sin Foto")
         # Limpiar huella
+        self._cancelar_captura_huella()
         self.huella_actual = None
         self.mostrar_estado_huella(False)
 
@@ -795,7 +835,7 @@ class SocioRegistro(QWidget):
 
     def capturar_huella(self):
         """Inicia el proceso de captura de huella utilizando el SDK de DigitalPersona."""
-        if self.enrollment_thread and self.enrollment_thread.isRunning():
+        if self.sesion_huella is not None:
             QMessageBox.warning(self, "Proceso en Curso", "Ya hay un proceso de captura de huella en ejecución.")
             return
 
@@ -804,16 +844,16 @@ class SocioRegistro(QWidget):
             QMessageBox.information(self, "No compatible", "La captura de huella requiere Windows y el SDK de DigitalPersona instalado.")
             return
 
-        self.enrollment_thread = EnrollmentWorker()
-        self.enrollment_thread.proceso_finalizado.connect(self._on_huella_capturada)
-        self.enrollment_thread.error_sdk.connect(self._on_error_sdk_huella)
-        self.enrollment_thread.estado_actualizado.connect(self._on_estado_huella_actualizado)
-        
         # Deshabilitar botones mientras se captura
         self.btn_capturar_huella.setEnabled(False)
         self.btn_eliminar_huella.setEnabled(False)
 
-        self.enrollment_thread.start()
+        # El lector compartido pasa a modo enrolamiento hasta que se cierre la sesión
+        self.sesion_huella = obtener_servicio_biometrico().crear_sesion(MODO_ENROLAMIENTO)
+        self.sesion_huella.proceso_finalizado.connect(self._on_huella_capturada)
+        self.sesion_huella.error_sdk.connect(self._on_error_sdk_huella)
+        self.sesion_huella.estado.connect(self._on_estado_huella_actualizado)
+        self.sesion_huella.abrir()
         QMessageBox.information(self, "Captura de Huella", "Se ha iniciado el lector.\n\nPor favor, coloque y levante el dedo 4 veces sobre el sensor siguiendo las instrucciones.")
 
     def _on_huella_capturada(self, template_bytes, template_size):
@@ -832,12 +872,21 @@ class SocioRegistro(QWidget):
         """Actualiza la UI con mensajes del proceso de captura."""
         self.label_huella.setText(f"Estado: {mensaje.replace('.', '.\n')}")
 
+    def _cancelar_captura_huella(self):
+        """Suelta el lector si hay una captura a medias, sin avisos (al ocultar el módulo o limpiar el formulario)."""
+        if self.sesion_huella is None:
+            return
+        # Un evento que el hilo del lector ya haya encolado no debe llegar a los slots
+        self.sesion_huella.proceso_finalizado.disconnect(self._on_huella_capturada)
+        self.sesion_huella.error_sdk.disconnect(self._on_error_sdk_huella)
+        self.sesion_huella.estado.disconnect(self._on_estado_huella_actualizado)
+        self._finalizar_proceso_huella()
+
     def _finalizar_proceso_huella(self):
         """Limpia y restaura la UI después de la captura."""
-        if self.enrollment_thread and self.enrollment_thread.isRunning():
-            self.enrollment_thread.stop()
-            self.enrollment_thread.wait()
-        self.enrollment_thread = None
+        if self.sesion_huella is not None:
+            self.sesion_huella.cerrar()
+        self.sesion_huella = None
         self.btn_capturar_huella.setEnabled(True)
         self.btn_eliminar_huella.setEnabled(True)
 
@@ -884,9 +933,15 @@ class SocioRegistro(QWidget):
             QMessageBox.information(self, "Búsqueda", "Por favor, ingrese un nombre para buscar.")
             return
 
-        try:
-            resultados = self.servicio_socios.buscar_por_nombre_aproximado(texto_busqueda)
+        self.ejecutor.ejecutar(
+            self.servicio_socios.buscar_por_nombre_aproximado, texto_busqueda,
+            al_terminar=lambda resultados: self._mostrar_resultados_busqueda(texto_busqueda, resultados),
+            al_fallar=lambda error: QMessageBox.critical(self, "Error de Búsqueda", f"Ocurrió un error al buscar: {error}"),
+            clave="socios.busqueda"
+        )
 
+    def _mostrar_resultados_busqueda(self, texto_busqueda: str, resultados):
+        try:
             if not resultados:
                 QMessageBox.warning(self, "Sin Resultados", f"No se encontró ningún socio que coincida con '{texto_busqueda}'.")
             elif len(resultados) > 1:
@@ -919,13 +974,12 @@ class SocioRegistro(QWidget):
                 QMessageBox.critical(self, "Error", "No se encontró el socio seleccionado en la base de datos.")
                 return
 
-            if not socio.membresias:
+            # Usamos la membresía más reciente para el comprobante
+            membresia_reciente = socio.membresia_actual
+            if not membresia_reciente:
                 QMessageBox.information(self, "Sin Membresía", "Este socio no tiene una membresía registrada para generar un comprobante.")
                 return
             
-            # Usamos la membresía más reciente para el comprobante
-            membresia_reciente = max(socio.membresias, key=lambda m: m.fecha_fin)
-            
             self._generar_y_abrir_pdf(socio, membresia_reciente)
 
         except Exception as e:
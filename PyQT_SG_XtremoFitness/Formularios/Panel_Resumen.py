@@ -0,0 +1,96 @@
+from PyQt6.QtWidgets import QFrame, QGridLayout, QLabel, QVBoxLayout
+from PyQt6.QtCore import Qt
+
+from aplicacion.serviciosResumen import ServiciosResumen
+from aplicacion.serviciosMembresia import ESTATUS_ACTIVOS, ESTATUS_POR_VENCER, ESTATUS_VENCIDOS
+from config import *
+from Utilerias.ejecutor import obtener_ejecutor
+
+
+class PanelResumen(QFrame):
+    """
+    Tablero de la página de inicio: socios por estatus, altas, renovaciones e ingresos de hoy y del mes.
+    Lee las tablas de resúmenes (ServiciosResumen), así que se actualiza igual de rápido con
+    cien socios que con cien mil.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.servicio_resumen = ServiciosResumen()
+        self.ejecutor = obtener_ejecutor()
+        self._crear_ui()
+
+    def showEvent(self, event):
+        """Se ejecuta cada vez que el panel se hace visible para recargar los datos."""
+        super().showEvent(event)
+        self.actualizar()
+
+    def _crear_ui(self):
+        layout_principal = QVBoxLayout(self)
+        layout_principal.setContentsMargins(0, 20, 0, 0)
+        layout_principal.setSpacing(10)
+
+        # --- Tarjetas ---
+        layout_tarjetas = QGridLayout()
+        layout_tarjetas.setSpacing(10)
+        layout_principal.addLayout(layout_tarjetas)
+
+        self.tarjetas = {}
+        definicion = [
+            # (clave, título, color de fondo, color de texto, fila, columna)
+            (ESTATUS_ACTIVOS, "Activos", COLOR_ACTIVO, "white", 0, 0),
+            (ESTATUS_POR_VENCER, "Por Vencer", "#FFC107", "black", 0, 1),
+            (ESTATUS_VENCIDOS, "Vencidos", COLOR_VENCIDO, "white", 0, 2),
+            ("altas", "Altas hoy", COLOR_TARJETA_RESUMEN, "white", 1, 0),
+            ("renovaciones", "Renovaciones hoy", COLOR_TARJETA_RESUMEN, "white", 1, 1),
+            ("ingresos", "Ingresos hoy", COLOR_TARJETA_RESUMEN, "white", 1, 2),
+        ]
+        for clave, titulo, fondo, texto, fila, columna in definicion:
+            tarjeta = QFrame()
+            tarjeta.setMinimumWidth(170)
+            tarjeta.setStyleSheet(f"background-color: {fondo}; color: {texto}; border-radius: 6px;")
+            layout_tarjeta = QVBoxLayout(tarjeta)
+            label_valor = QLabel("-")
+            label_valor.setStyleSheet("font-size: 26px; font-weight: bold;")
+            label_valor.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            label_titulo = QLabel(titulo)
+            label_titulo.setStyleSheet("font-size: 13px;")
+            label_titulo.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            layout_tarjeta.addWidget(label_valor)
+            layout_tarjeta.addWidget(label_titulo)
+            layout_tarjetas.addWidget(tarjeta, fila, columna)
+            self.tarjetas[clave] = label_valor
+
+        # --- Resumen del mes ---
+        self.label_mes = QLabel("")
+        self.label_mes.setStyleSheet("font-size: 14px; color: #333333;")
+        self.label_mes.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label_mes.setWordWrap(True)
+        layout_principal.addWidget(self.label_mes)
+
+    def actualizar(self):
+        """Pide el tablero en segundo plano (también se llama tras cada pago o renovación)."""
+        self.ejecutor.ejecutar(
+            self.servicio_resumen.obtener_tablero,
+            al_terminar=self._mostrar_tablero, al_fallar=self._al_fallar_tablero, clave="inicio.tablero"
+        )
+
+    def _mostrar_tablero(self, tablero):
+        for estatus, cantidad in tablero.estatus.items():
+            self.tarjetas[estatus].setText(str(cantidad))
+        self.tarjetas["altas"].setText(str(tablero.altas_hoy))
+        self.tarjetas["renovaciones"].setText(str(tablero.renovaciones_hoy))
+        self.tarjetas["ingresos"].setText(f"${tablero.ingresos_hoy:,.2f}")
+
+        lineas = [
+            f"En el mes: {tablero.altas_mes} altas, {tablero.renovaciones_mes} renovaciones, "
+            f"${tablero.ingresos_mes:,.2f} de ingresos"
+        ]
+        if tablero.ingresos_por_plan:
+            lineas.append(" | ".join(
+                f"{plan_nombre}: {pagos} (${monto:,.2f})" for plan_nombre, pagos, monto in tablero.ingresos_por_plan
+            ))
+        self.label_mes.setText("\n".join(lineas))
+
+    def _al_fallar_tablero(self, error):
+        print(f"Error al cargar el tablero de inicio: {error}")
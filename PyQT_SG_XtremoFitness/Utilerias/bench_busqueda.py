@@ -0,0 +1,86 @@
+"""
+Banco de pruebas de la búsqueda de socios por nombre (bd/busqueda.py, FTS5) contra el filtro
+anterior de ServiciosSocio.buscar_por_nombre_aproximado: concat(nombre, apellidos) ILIKE '%texto%',
+que recorre la tabla Socios completa en cada tecla.
+
+Sobre una base sintética (Utilerias/bench_datos.py) mide lo que tarda reconstruir_indice y, para
+cada tipo de búsqueda (nombre completo, prefijos, sin acentos, con errores de captura, sin
+resultado), la latencia de busqueda.buscar_ids y del filtro anterior (media, p50, p99) y cuántos
+socios encuentra cada uno. El filtro anterior no pliega acentos: "jose" no encuentra a "José".
+
+Uso:
+    python -m Utilerias.bench_busqueda                      # 100 000 socios, 50 repeticiones
+    python -m Utilerias.bench_busqueda --socios 20000 --repeticiones 200
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from Utilerias.bench_datos import crear_base_sintetica
+from bd import busqueda
+
+BUSQUEDAS = [
+    ("nombre completo", "María García López"),
+    ("prefijos", "ma gar"),
+    ("sin acentos", "jose perez"),
+    ("con errores", "Hernandes Lopes"),
+    ("sin resultado", "Xóchitl Tzompa"),
+]
+
+_FILTRO_ANTERIOR = text("""
+    SELECT ID FROM Socios
+    WHERE (Nombre || ' ' || Apellido_Paterno || ' ' || COALESCE(Apellido_Materno, '')) LIKE :termino
+""")
+
+
+def _filtro_anterior(conexion, texto_busqueda: str) -> list[int]:
+    return conexion.execute(_FILTRO_ANTERIOR, {"termino": f"%{texto_busqueda.strip()}%"}).scalars().all()
+
+
+def _cronometrar(funcion, repeticiones: int) -> tuple[list[float], list]:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return sorted(tiempos), resultado
+
+
+def _resumen(tiempos: list[float]) -> str:
+    return (f"media={statistics.mean(tiempos):7.3f} p50={tiempos[len(tiempos) // 2]:7.3f} "
+            f"p99={tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]:7.3f} ms")
+
+
+def medir(engine_prueba, repeticiones: int):
+    with engine_prueba.begin() as conexion:
+        inicio = time.perf_counter()
+        busqueda.reconstruir_indice(conexion)
+        print(f"reconstruir_indice: {time.perf_counter() - inicio:.2f} s")
+
+    with engine_prueba.connect() as conexion:
+        for nombre, texto_busqueda in BUSQUEDAS:
+            tiempos_fts, ids = _cronometrar(lambda: busqueda.buscar_ids(conexion, texto_busqueda), repeticiones)
+            tiempos_like, anteriores = _cronometrar(lambda: _filtro_anterior(conexion, texto_busqueda), repeticiones)
+            print(f"{nombre:16s} {texto_busqueda!r:22s}")
+            print(f"    FTS5      {_resumen(tiempos_fts)}  encontrados={len(ids)}")
+            print(f"    anterior  {_resumen(tiempos_like)}  encontrados={len(anteriores)}")
+
+
+def main(argv: list[str]):
+    socios = int(argv[argv.index("--socios") + 1]) if "--socios" in argv else 100000
+    repeticiones = int(argv[argv.index("--repeticiones") + 1]) if "--repeticiones" in argv else 50
+    print(f"{socios} socios, {repeticiones} repeticiones por búsqueda")
+    with tempfile.TemporaryDirectory() as carpeta:
+        engine_prueba = crear_base_sintetica(os.path.join(carpeta, "busqueda.sqlite"), socios=socios, membresias=(1, 1))
+        try:
+            medir(engine_prueba, repeticiones)
+        finally:
+            engine_prueba.dispose()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,166 @@
+"""
+Banco de pruebas del bucle de mensajes del lector de huellas (captura_huella._bucle_mensajes).
+
+Corre en cualquier sistema (también Linux): reemplaza win32event, win32gui y win32con del módulo
+por una fuente de eventos simulada, una cola de mensajes por hilo con la semántica de
+MsgWaitForMultipleObjects (despierta con mensajes nuevos o con el evento de parada) y de
+PeekMessage. Publica avisos WMUS_FP_NOTIFY a intervalos aleatorios y compara:
+  - "sondeo 50": el bucle anterior, PeekMessage + espera de 50 ms;
+  - "MsgWait":   _bucle_mensajes, que duerme hasta que llega algo.
+Para cada uno reporta la latencia de atención de cada aviso (media, p50, p99, máximo), los
+despertares por segundo con el lector inactivo y lo que tarda en detenerse. Al final comprueba
+que _bucle_mensajes termina con WM_QUIT y respeta 'continuar()'.
+
+Uso:
+    python -m Utilerias.bench_captura_huella                 # 200 avisos, 3 s inactivo
+    python -m Utilerias.bench_captura_huella --eventos 1000 --inactivo 10
+"""
+import collections
+import random
+import statistics
+import sys
+import threading
+import time
+import types
+
+import Utilerias.captura_huella as captura_huella
+
+# Espera entre sondeos del bucle anterior (QThread.msleep(50))
+MS_SONDEO_ANTERIOR = 50
+# Intervalo aleatorio entre avisos simulados, en segundos
+INTERVALO_AVISOS = (0.002, 0.03)
+
+
+# --- FUENTE DE EVENTOS SIMULADA ---
+
+class ColaMensajes:
+    """Cola de mensajes de un hilo: 'nuevos' se apaga cuando MsgWait despierta, como en Windows."""
+
+    def __init__(self):
+        self.condicion = threading.Condition()
+        self.mensajes = collections.deque()
+        self.nuevos = False
+        self.despertares = 0
+        self.latencias = []
+
+    def publicar(self, mensaje: int, wparam: int = 0):
+        with self.condicion:
+            self.mensajes.append((mensaje, wparam, time.perf_counter()))
+            self.nuevos = True
+            self.condicion.notify_all()
+
+
+class Evento:
+    """Evento de reinicio manual (como los de ServicioBiometrico)."""
+
+    def __init__(self):
+        self.senalado = False
+
+
+def _instalar_win32_simulado(cola: ColaMensajes):
+    """Sustituye los módulos de pywin32 que usa captura_huella por la cola simulada."""
+
+    def set_event(evento):
+        with cola.condicion:
+            evento.senalado = True
+            cola.condicion.notify_all()
+
+    def msg_wait(eventos, esperar_todos, tiempo_ms, mascara):
+        with cola.condicion:
+            while True:
+                for indice, evento in enumerate(eventos):
+                    if evento.senalado:
+                        cola.despertares += 1
+                        return indice
+                if cola.nuevos:
+                    cola.despertares += 1
+                    cola.nuevos = False
+                    return len(eventos)
+                cola.condicion.wait()
+
+    def peek_message(hwnd, filtro_min, filtro_max, opciones):
+        with cola.condicion:
+            if not cola.mensajes:
+                return (0, None)
+            mensaje, wparam, publicado = cola.mensajes.popleft()
+        return (1, (0, mensaje, wparam, publicado, 0, (0, 0)))
+
+    def dispatch_message(msg):
+        cola.latencias.append(time.perf_counter() - msg[3])
+
+    captura_huella.win32event = types.SimpleNamespace(
+        MsgWaitForMultipleObjects=msg_wait, SetEvent=set_event,
+        INFINITE=-1, QS_ALLINPUT=0x4FF, WAIT_OBJECT_0=0,
+    )
+    captura_huella.win32con = types.SimpleNamespace(PM_REMOVE=1, WM_QUIT=0x12)
+    captura_huella.win32gui = types.SimpleNamespace(
+        PeekMessage=peek_message, TranslateMessage=lambda msg: None, DispatchMessage=dispatch_message,
+    )
+    return set_event
+
+
+# --- BUCLES A COMPARAR ---
+
+def _bucle_sondeo(cola: ColaMensajes, evento_detener: Evento):
+    """Bucle anterior a MsgWaitForMultipleObjects: revisa la cola y duerme 50 ms si está vacía."""
+    while not evento_detener.senalado:
+        with cola.condicion:
+            cola.despertares += 1
+        msg = captura_huella.win32gui.PeekMessage(0, 0, 0, captura_huella.win32con.PM_REMOVE)
+        if msg[0] != 0:
+            captura_huella.win32gui.DispatchMessage(msg[1])
+        else:
+            time.sleep(MS_SONDEO_ANTERIOR / 1000)
+
+
+def medir(nombre: str, bucle, cola: ColaMensajes, set_event, eventos: int, segundos_inactivo: float):
+    """Publica 'eventos' avisos, deja el lector inactivo y lo detiene; imprime una línea de resultados."""
+    cola.latencias.clear()
+    evento_detener = Evento()
+    hilo = threading.Thread(target=bucle, args=(evento_detener,))
+    hilo.start()
+    aleatorio = random.Random(1)
+    for _ in range(eventos):
+        time.sleep(aleatorio.uniform(*INTERVALO_AVISOS))
+        cola.publicar(captura_huella.WMUS_FP_NOTIFY)
+    time.sleep(0.1)
+    antes = cola.despertares
+    time.sleep(segundos_inactivo)
+    inactivo = (cola.despertares - antes) / segundos_inactivo
+    inicio_parada = time.perf_counter()
+    set_event(evento_detener)
+    hilo.join()
+    parada_ms = (time.perf_counter() - inicio_parada) * 1000
+
+    latencias = sorted(latencia * 1000 for latencia in cola.latencias)
+    print(f"{nombre:11s} avisos={len(latencias)} latencia media={statistics.mean(latencias):.3f} ms "
+          f"p50={latencias[len(latencias) // 2]:.3f} p99={latencias[int(len(latencias) * 0.99)]:.3f} "
+          f"max={latencias[-1]:.3f} despertares/s inactivo={inactivo:.1f} parada={parada_ms:.2f} ms")
+
+
+def comprobar_terminacion(cola: ColaMensajes):
+    """_bucle_mensajes devuelve False con WM_QUIT y deja de despachar cuando 'continuar()' es falso."""
+    evento_detener = Evento()
+    cola.publicar(captura_huella.win32con.WM_QUIT)
+    print("WM_QUIT termina el bucle:", captura_huella._bucle_mensajes(evento_detener) is False)
+
+    despachados = []
+    captura_huella.win32gui.DispatchMessage = despachados.append
+    for _ in range(5):
+        cola.publicar(1)
+    captura_huella._bucle_mensajes(evento_detener, lambda: len(despachados) < 3)
+    print(f"continuar() detiene el despacho: {len(despachados)} despachados, {len(cola.mensajes)} pendientes")
+
+
+def main(argv: list[str]):
+    eventos = int(argv[argv.index("--eventos") + 1]) if "--eventos" in argv else 200
+    segundos_inactivo = float(argv[argv.index("--inactivo") + 1]) if "--inactivo" in argv else 3.0
+    cola = ColaMensajes()
+    set_event = _instalar_win32_simulado(cola)
+    medir("sondeo 50", lambda detener: _bucle_sondeo(cola, detener), cola, set_event, eventos, segundos_inactivo)
+    medir("MsgWait", captura_huella._bucle_mensajes, cola, set_event, eventos, segundos_inactivo)
+    comprobar_terminacion(cola)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
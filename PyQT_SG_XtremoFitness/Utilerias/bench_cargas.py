@@ -0,0 +1,110 @@
+"""
+Banco de pruebas de las estrategias de carga de aplicacion/cargas.py con un historial realista.
+
+Crea una base sintética (Utilerias/bench_datos.py) con N socios de 40 renovaciones cada uno, foto y
+QR de 30 KB y huella de 1 KB, y compara para el listado completo y para la ficha del socio:
+  - listado: joinedload del historial (SocioModel.membresias) con los BLOBs, joinedload de la
+    membresía vigente (la consulta anterior a cargas.py) y CARGA_LISTADO;
+  - ficha:   joinedload de la membresía vigente con los BLOBs y CARGA_DETALLE, sobre R socios al azar.
+Para cada una reporta el tiempo, las SELECT emitidas y las filas y bytes que devuelve SQLite (cada
+SELECT capturada se vuelve a ejecutar aparte para sumar el tamaño de sus valores).
+
+Uso:
+    python -m Utilerias.bench_cargas                               # 2000 socios x 40 renovaciones, 300 fichas
+    python -m Utilerias.bench_cargas --socios 10000 --renovaciones 20 --fichas 1000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, joinedload, undefer_group
+
+from Utilerias.bench_datos import crear_base_sintetica
+from Utilerias.verificar_planes_consulta import CapturaSelects
+from aplicacion.cargas import CARGA_DETALLE, CARGA_LISTADO
+from dominio.modelos import MembresiaModel, SocioModel
+
+BYTES_FOTO = 30 * 1024
+BYTES_HUELLA = 1024
+
+LISTADOS = [
+    ("joinedload(membresias) + BLOBs",
+     (joinedload(SocioModel.membresias).joinedload(MembresiaModel.plan), undefer_group("binarios"))),
+    ("joinedload(membresia_actual)", (joinedload(SocioModel.membresia_actual).joinedload(MembresiaModel.plan),)),
+    ("CARGA_LISTADO", CARGA_LISTADO),
+]
+FICHAS = [
+    ("joinedload(membresia_actual) + BLOBs",
+     (joinedload(SocioModel.membresia_actual).joinedload(MembresiaModel.plan), undefer_group("binarios"))),
+    ("CARGA_DETALLE", CARGA_DETALLE),
+]
+
+
+def _tamano(valor) -> int:
+    if valor is None:
+        return 0
+    if isinstance(valor, (bytes, str)):
+        return len(valor)
+    return 8
+
+
+def volumen(engine_prueba, sentencias) -> tuple[int, int]:
+    """(filas, bytes) que devuelven las SELECT capturadas."""
+    filas = bytes_leidos = 0
+    with engine_prueba.connect() as conexion:
+        for sentencia, parametros in sentencias:
+            for fila in conexion.exec_driver_sql(sentencia, parametros):
+                filas += 1
+                bytes_leidos += sum(_tamano(valor) for valor in fila)
+    return filas, bytes_leidos
+
+
+def medir(nombre: str, engine_prueba, operacion):
+    operacion()     # calienta la caché de sentencias y de páginas de SQLite
+    inicio = time.perf_counter()
+    operacion()
+    segundos = time.perf_counter() - inicio
+    with CapturaSelects(engine_prueba) as captura:
+        operacion()
+    filas, bytes_leidos = volumen(engine_prueba, captura.sentencias)
+    print(f"  {nombre:38s} {segundos * 1000:9.0f} ms  selects={len(captura.sentencias):5d} "
+          f"filas={filas:9d}  leído={bytes_leidos / 2 ** 20:9.2f} MB")
+
+
+def main(argv: list[str]):
+    socios = int(argv[argv.index("--socios") + 1]) if "--socios" in argv else 2000
+    renovaciones = int(argv[argv.index("--renovaciones") + 1]) if "--renovaciones" in argv else 40
+    fichas = int(argv[argv.index("--fichas") + 1]) if "--fichas" in argv else 300
+    print(f"{socios} socios x {renovaciones} renovaciones, foto y QR de {BYTES_FOTO // 1024} KB, "
+          f"huella de {BYTES_HUELLA // 1024} KB")
+    with tempfile.TemporaryDirectory() as carpeta:
+        engine_prueba = crear_base_sintetica(os.path.join(carpeta, "cargas.sqlite"), socios=socios,
+                                             membresias=(renovaciones, renovaciones), bytes_foto=BYTES_FOTO)
+        try:
+            with engine_prueba.begin() as conexion:
+                conexion.execute(text("UPDATE Socios SET Huella_Template = randomblob(:n)"), {"n": BYTES_HUELLA})
+
+            print("listado completo")
+            for nombre, opciones in LISTADOS:
+                def listado(opciones=opciones):
+                    with Session(engine_prueba) as session:
+                        return session.query(SocioModel).options(*opciones).all()
+                medir(nombre, engine_prueba, listado)
+
+            ids = random.Random(1).sample(range(1, socios + 1), min(fichas, socios))
+            print(f"{len(ids)} fichas")
+            for nombre, opciones in FICHAS:
+                def detalle(opciones=opciones):
+                    for socio_id in ids:
+                        with Session(engine_prueba) as session:
+                            session.query(SocioModel).options(*opciones).filter(SocioModel.id == socio_id).one_or_none()
+                medir(nombre, engine_prueba, detalle)
+        finally:
+            engine_prueba.dispose()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,146 @@
+"""
+Banco de pruebas del perfil de PRAGMAs de bd/conexion.py (PERFIL_SQLITE) contra los valores por
+defecto de SQLite (diario de reversión, synchronous=FULL, sin mmap, caché de 2 MB).
+
+Para cada perfil crea su propia base sintética (Utilerias/bench_datos.py; journal_mode=WAL queda
+grabado en el archivo) y durante unos segundos corre a la vez:
+  - N lectores: la consulta de la recepción, socio por ID con su membresía vigente;
+  - 1 escritor: renovaciones como las de Pagos (Membresias + Pagos + Membresias_Vigentes en una
+    transacción) y el registro de un acceso, en transacciones separadas.
+Reporta lecturas/s y escrituras/s, la latencia de lectura (p50, p99, máximo) y de escritura, y
+los errores "database is locked".
+
+Uso:
+    python -m Utilerias.bench_conexion                       # 20 000 socios, 4 lectores, 5 s
+    python -m Utilerias.bench_conexion --socios 100000 --lectores 8 --segundos 10
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from Utilerias.bench_datos import crear_base_sintetica
+from aplicacion.serviciosAcceso import METODO_QR, RESULTADO_PERMITIDO
+from bd.conexion import PERFIL_SQLITE
+
+PERFILES = [("por defecto", {}), ("PERFIL_SQLITE", PERFIL_SQLITE)]
+
+_LECTURA = text("""
+    SELECT s.ID, s.Nombre, s.Apellido_Paterno, v.Fecha_Fin
+    FROM Socios s LEFT JOIN Membresias_Vigentes v ON v.Socio_ID = s.ID
+    WHERE s.ID = :id
+""")
+
+
+class Resultados:
+    def __init__(self):
+        self.candado = threading.Lock()
+        self.lecturas = []
+        self.escrituras = []
+        self.bloqueos = 0
+
+    def anotar(self, lista: list, segundos: float):
+        with self.candado:
+            lista.append(segundos)
+
+    def bloqueo(self):
+        with self.candado:
+            self.bloqueos += 1
+
+
+def _lector(engine_prueba, socios: int, semilla: int, hasta: float, resultados: Resultados):
+    aleatorio = random.Random(semilla)
+    while time.perf_counter() < hasta:
+        inicio = time.perf_counter()
+        try:
+            with engine_prueba.connect() as conexion:
+                conexion.execute(_LECTURA, {"id": aleatorio.randint(1, socios)}).one_or_none()
+        except OperationalError:
+            resultados.bloqueo()
+            continue
+        resultados.anotar(resultados.lecturas, time.perf_counter() - inicio)
+
+
+def _renovar(conexion, socio_id: int, plan_id: int, plan_nombre: str, precio: float, duracion: int):
+    hoy = date.today()
+    membresia_id = conexion.execute(text(
+        "INSERT INTO Membresias (Socio_ID, Plan_ID, Fecha_Inicio, Fecha_Fin) VALUES (:s, :p, :i, :f) RETURNING ID"
+    ), {"s": socio_id, "p": plan_id, "i": hoy, "f": hoy + timedelta(days=duracion)}).scalar()
+    conexion.execute(text(
+        "INSERT INTO Pagos (Membresia_ID, Socio_ID, Plan_ID, Plan_Nombre, Monto, Fecha_Hora) "
+        "VALUES (:m, :s, :p, :n, :monto, :fecha)"
+    ), {"m": membresia_id, "s": socio_id, "p": plan_id, "n": plan_nombre, "monto": precio, "fecha": datetime.now()})
+    conexion.execute(text(
+        "INSERT OR REPLACE INTO Membresias_Vigentes (Socio_ID, Membresia_ID, Fecha_Fin) VALUES (:s, :m, :f)"
+    ), {"s": socio_id, "m": membresia_id, "f": hoy + timedelta(days=duracion)})
+
+
+def _escritor(engine_prueba, socios: int, hasta: float, resultados: Resultados):
+    aleatorio = random.Random(0)
+    with engine_prueba.connect() as conexion:
+        planes = conexion.execute(text("SELECT ID, Nombre, Precio, Duracion_Dias FROM Planes")).all()
+    while time.perf_counter() < hasta:
+        socio_id = aleatorio.randint(1, socios)
+        inicio = time.perf_counter()
+        try:
+            with engine_prueba.begin() as conexion:
+                _renovar(conexion, socio_id, *aleatorio.choice(planes))
+            with engine_prueba.begin() as conexion:
+                conexion.execute(text(
+                    "INSERT INTO Accesos (Socio_ID, Marca_Tiempo, Metodo, Resultado, Kiosco) VALUES (:s, :t, :m, :r, 1)"
+                ), {"s": socio_id, "t": int(time.time()), "m": METODO_QR, "r": RESULTADO_PERMITIDO})
+        except OperationalError:
+            resultados.bloqueo()
+            continue
+        resultados.anotar(resultados.escrituras, time.perf_counter() - inicio)
+
+
+def _percentil(valores: list[float], fraccion: float) -> float:
+    return valores[min(len(valores) - 1, int(len(valores) * fraccion))] * 1000
+
+
+def medir(nombre: str, engine_prueba, socios: int, lectores: int, segundos: float):
+    with engine_prueba.connect() as conexion:
+        diario = conexion.exec_driver_sql("PRAGMA journal_mode").scalar()
+    resultados = Resultados()
+    hasta = time.perf_counter() + segundos
+    hilos = [threading.Thread(target=_lector, args=(engine_prueba, socios, semilla, hasta, resultados))
+             for semilla in range(lectores)]
+    hilos.append(threading.Thread(target=_escritor, args=(engine_prueba, socios, hasta, resultados)))
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    lecturas = sorted(resultados.lecturas)
+    escrituras = sorted(resultados.escrituras)
+    print(f"{nombre:14s} ({diario}) lecturas/s={len(lecturas) / segundos:8.0f} "
+          f"p50={_percentil(lecturas, 0.5):.3f} p99={_percentil(lecturas, 0.99):.3f} max={lecturas[-1] * 1000:.1f} ms | "
+          f"escrituras/s={len(escrituras) / segundos:6.0f} "
+          f"p50={_percentil(escrituras, 0.5):.3f} p99={_percentil(escrituras, 0.99):.3f} ms | "
+          f"bloqueos={resultados.bloqueos}")
+
+
+def main(argv: list[str]):
+    socios = int(argv[argv.index("--socios") + 1]) if "--socios" in argv else 20000
+    lectores = int(argv[argv.index("--lectores") + 1]) if "--lectores" in argv else 4
+    segundos = float(argv[argv.index("--segundos") + 1]) if "--segundos" in argv else 5.0
+    print(f"{socios} socios, {lectores} lectores + 1 escritor, {segundos:g} s por perfil")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for nombre, perfil in PERFILES:
+            engine_prueba = crear_base_sintetica(os.path.join(carpeta, f"conexion_{len(perfil)}.sqlite"),
+                                                 socios=socios, perfil=perfil)
+            try:
+                medir(nombre, engine_prueba, socios, lectores, segundos)
+            finally:
+                engine_prueba.dispose()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,87 @@
+"""
+Base de datos sintética para los bancos de pruebas (Utilerias/bench_*.py y verificar_planes_consulta.py).
+
+crear_base_sintetica arma un xtremo.sqlite desechable con el esquema completo (bd.migraciones) y
+N socios con nombres acentuados, un historial de membresías por socio (la última vencida, por
+vencer o activa), su libro de Pagos, Membresias_Vigentes, el índice de búsqueda y las
+estadísticas de ANALYZE, así los planes de consulta son los de una base de ese tamaño.
+Las filas se insertan con executemany directo, no por los servicios: 100k socios tardan segundos.
+"""
+import contextlib
+import io
+import os
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from bd import busqueda, resumenes
+from bd.conexion import crear_engine
+from bd.migraciones import _m007_libro_pagos, aplicar_migraciones, reconstruir_membresias_vigentes
+
+NOMBRES = ["José", "María", "Juan", "Guadalupe", "Luis", "Ana", "Jesús", "Sofía", "Héctor", "Mónica",
+           "Raúl", "Andrés", "Lucía", "Ramón", "Verónica", "Óscar", "Ángel", "Inés", "Martín", "Noemí"]
+APELLIDOS = ["Pérez", "García", "Hernández", "López", "Martínez", "González", "Rodríguez", "Sánchez",
+             "Ramírez", "Cruz", "Flores", "Gómez", "Díaz", "Reyes", "Morales", "Jiménez", "Ruiz",
+             "Álvarez", "Mendoza", "Vázquez", "Castillo", "Ortiz", "Chávez", "Núñez", "Domínguez"]
+PLANES = [("Visita", 60.0, 1), ("Semana", 180.0, 7), ("Mensualidad", 350.0, 30),
+          ("Trimestre", 950.0, 90), ("Anualidad", 3200.0, 365)]
+
+TAMANO_LOTE = 5000
+
+
+def nombre_sintetico(aleatorio: random.Random) -> tuple[str, str, str]:
+    return aleatorio.choice(NOMBRES), aleatorio.choice(APELLIDOS), aleatorio.choice(APELLIDOS)
+
+
+def crear_base_sintetica(ruta: str, socios: int = 20000, membresias: tuple[int, int] = (1, 5),
+                         bytes_foto: int = 0, semilla: int = 1, perfil: dict | None = None):
+    """
+    Crea (reemplazando) la base en 'ruta' y devuelve su engine.
+      - membresias: rango (mínimo, máximo) de membresías en el historial de cada socio;
+      - bytes_foto: tamaño de la foto y del QR de cada socio (0 = sin BLOBs).
+    """
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    engine_destino = crear_engine(f"sqlite:///{ruta}", perfil=perfil)
+    with contextlib.redirect_stdout(io.StringIO()):
+        aplicar_migraciones(engine_destino)
+
+    aleatorio = random.Random(semilla)
+    hoy = date.today()
+    binario = os.urandom(bytes_foto) if bytes_foto else None
+    with engine_destino.begin() as conexion:
+        conexion.execute(text("INSERT INTO Planes (Nombre, Precio, Duracion_Dias) VALUES (:n, :p, :d)"),
+                         [{"n": n, "p": p, "d": d} for n, p, d in PLANES])
+        planes = conexion.execute(text("SELECT ID, Duracion_Dias FROM Planes")).all()
+        for inicio in range(0, socios, TAMANO_LOTE):
+            cantidad = min(TAMANO_LOTE, socios - inicio)
+            conexion.execute(text(
+                "INSERT INTO Socios (ID, Nombre, Apellido_Paterno, Apellido_Materno, Foto_Ruta, QR_Code) "
+                "VALUES (:id, :n, :ap, :am, :foto, :qr)"
+            ), [
+                {"id": socio_id, "n": n, "ap": ap, "am": am, "foto": binario, "qr": binario}
+                for socio_id in range(inicio + 1, inicio + cantidad + 1)
+                for n, ap, am in [nombre_sintetico(aleatorio)]
+            ])
+            filas = []
+            for socio_id in range(inicio + 1, inicio + cantidad + 1):
+                # La última membresía termina entre 60 días atrás y 60 adelante; las anteriores la preceden
+                fin = hoy + timedelta(days=aleatorio.randint(-60, 60))
+                for _ in range(aleatorio.randint(*membresias)):
+                    plan_id, duracion = aleatorio.choice(planes)
+                    inicio_membresia = fin - timedelta(days=duracion)
+                    filas.append({"s": socio_id, "p": plan_id, "i": inicio_membresia, "f": fin})
+                    fin = inicio_membresia - timedelta(days=1)
+            # Orden cronológico por ID, como quedarían al registrarse una por una
+            filas.sort(key=lambda fila: fila["i"])
+            conexion.execute(text(
+                "INSERT INTO Membresias (Socio_ID, Plan_ID, Fecha_Inicio, Fecha_Fin) VALUES (:s, :p, :i, :f)"
+            ), filas)
+        reconstruir_membresias_vigentes(conexion)
+        _m007_libro_pagos(conexion)
+        busqueda.reconstruir_indice(conexion)
+        resumenes.reconstruir_diarios(conexion)
+        conexion.execute(text("ANALYZE"))
+    return engine_destino
@@ -0,0 +1,113 @@
+"""
+Banco de pruebas del listado de socios (Form_socios / Form_pagos): filas planas FilaSocio
+(ServiciosSocio.obtener_pagina_socios) contra entidades ORM.
+
+Sobre una base sintética (Utilerias/bench_datos.py) compara tres formas de leer el listado:
+  - "joinedload":    la consulta anterior, SocioModel con joinedload(membresia_actual).joinedload(plan);
+  - "CARGA_LISTADO": SocioModel con las opciones de aplicacion/cargas.py (selectinload);
+  - "FilaSocio":     obtener_pagina_socios, un SELECT de Core armado en filas con __slots__.
+Para cada una mide el listado completo en una sola llamada (tiempo, pico de memoria y memoria
+retenida por el resultado, con tracemalloc) y el recorrido por páginas de 100 como lo hace el
+desplazamiento de la tabla (tiempo total y p50/p99 por página).
+Con joinedload SQLite recorre Membresias_Vigentes completa en cada página (ver aplicacion/cargas.py):
+a 100 000 socios ese recorrido paginado tarda varios minutos.
+
+Uso:
+    python -m Utilerias.bench_listado_socios                      # 10 000 y 100 000 socios
+    python -m Utilerias.bench_listado_socios --socios 20000
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, joinedload
+
+from Utilerias.bench_datos import crear_base_sintetica
+from aplicacion.cargas import CARGA_LISTADO
+from aplicacion.serviciosSocio import ServiciosSocio
+from dominio.modelos import MembresiaModel, SocioModel
+
+TAMANO_PAGINA = 100
+_GRANDE = 10 ** 9
+
+
+def _pagina_orm(engine_prueba, opciones, cursor, tamano):
+    """Página por llave de SocioModel con las opciones de carga indicadas (como antes de FilaSocio)."""
+    with Session(engine_prueba) as session:
+        consulta = session.query(SocioModel).options(*opciones)
+        if cursor is not None:
+            consulta = consulta.filter(tuple_(SocioModel.id) > tuple_(*cursor))
+        socios = consulta.order_by(SocioModel.id).limit(tamano + 1).all()
+    if len(socios) <= tamano:
+        return socios, None
+    socios = socios[:tamano]
+    return socios, (socios[-1].id,)
+
+
+def formas_de_leer(engine_prueba):
+    servicio = ServiciosSocio()
+    servicio.engine = engine_prueba
+    return [
+        ("joinedload", lambda cursor, tamano: _pagina_orm(
+            engine_prueba, (joinedload(SocioModel.membresia_actual).joinedload(MembresiaModel.plan),), cursor, tamano)),
+        ("CARGA_LISTADO", lambda cursor, tamano: _pagina_orm(engine_prueba, CARGA_LISTADO, cursor, tamano)),
+        ("FilaSocio", lambda cursor, tamano: servicio.obtener_pagina_socios(cursor, tamano)),
+    ]
+
+
+def _memoria(leer) -> tuple[float, float, int]:
+    """(pico MB, MB retenidos por el resultado, filas) del listado completo."""
+    gc.collect()
+    tracemalloc.start()
+    filas, _ = leer(None, _GRANDE)
+    retenida = tracemalloc.get_traced_memory()[0]
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    total = len(filas)
+    del filas
+    return pico / 2 ** 20, retenida / 2 ** 20, total
+
+
+def _recorrer_paginas(leer) -> list[float]:
+    tiempos = []
+    cursor = None
+    while True:
+        inicio = time.perf_counter()
+        _, cursor = leer(cursor, TAMANO_PAGINA)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        if cursor is None:
+            return tiempos
+
+
+def medir(engine_prueba):
+    for nombre, leer in formas_de_leer(engine_prueba):
+        leer(None, TAMANO_PAGINA)     # calienta la caché de sentencias y de páginas de SQLite
+        gc.collect()
+        inicio = time.perf_counter()
+        leer(None, _GRANDE)
+        completo = time.perf_counter() - inicio
+        pico, retenida, total = _memoria(leer)
+        paginas = sorted(_recorrer_paginas(leer))
+        print(f"  {nombre:14s} completo={completo * 1000:8.0f} ms pico={pico:7.1f} MB retenido={retenida:7.1f} MB "
+              f"filas={total} | páginas={len(paginas)} total={sum(paginas):7.0f} ms "
+              f"p50={paginas[len(paginas) // 2]:.2f} p99={paginas[min(len(paginas) - 1, int(len(paginas) * 0.99))]:.2f} ms")
+
+
+def main(argv: list[str]):
+    tamanos = [int(argv[argv.index("--socios") + 1])] if "--socios" in argv else [10000, 100000]
+    with tempfile.TemporaryDirectory() as carpeta:
+        for socios in tamanos:
+            print(f"{socios} socios")
+            engine_prueba = crear_base_sintetica(os.path.join(carpeta, f"listado_{socios}.sqlite"), socios=socios)
+            try:
+                medir(engine_prueba)
+            finally:
+                engine_prueba.dispose()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
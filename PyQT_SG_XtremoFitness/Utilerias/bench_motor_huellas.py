@@ -0,0 +1,95 @@
+"""
+Banco de pruebas de los motores de identificación 1-a-N (Utilerias/motor_huellas.py).
+
+Corre en cualquier sistema (también Linux): usa ComparadorReferencia en lugar de dpHMatch.dll, sobre
+una GaleriaHuellas de N plantillas aleatorias. Compara la búsqueda secuencial de la galería con
+MotorHilos y MotorProcesos para huellas que coinciden al inicio, a la mitad y al final del orden de
+búsqueda, y para una que no coincide con nadie (recorre la galería completa). Reporta la latencia
+media y p50 de cada caso y las comparaciones por segundo de la búsqueda sin coincidencia; si algún
+motor identifica a un socio distinto del esperado, se detiene con AssertionError.
+
+ComparadorReferencia usa NumPy si está instalado; sin NumPy compara en Python puro y no suelta el
+GIL, así que MotorHilos no puede ganar y MotorProcesos es la opción en paralelo. Con dpHMatch.dll
+(que suelta el GIL) los hilos se comportan como los procesos sin el costo de repartir.
+
+Uso:
+    python -m Utilerias.bench_motor_huellas                    # 5000 plantillas de 1000 bytes, 10 búsquedas
+    python -m Utilerias.bench_motor_huellas --plantillas 20000 --trabajadores 8 --busquedas 20
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+from Utilerias import motor_huellas
+from Utilerias.galeria_huellas import GaleriaHuellas
+from Utilerias.motor_huellas import ComparadorReferencia, MotorHilos, MotorProcesos
+
+BYTES_PLANTILLA = 1000
+# Bytes alterados en la huella capturada respecto a la registrada (debajo del umbral de ComparadorReferencia)
+BYTES_ALTERADOS = 20
+
+
+def _captura(plantilla: bytes, aleatorio: random.Random) -> bytes:
+    """La plantilla registrada con unos bytes distintos, como una segunda lectura del mismo dedo."""
+    captura = bytearray(plantilla)
+    for posicion in aleatorio.sample(range(len(captura)), BYTES_ALTERADOS):
+        captura[posicion] ^= 0xFF
+    return bytes(captura)
+
+
+def casos(plantillas: list[bytes], aleatorio: random.Random) -> list[tuple[str, bytes, int | None]]:
+    """(nombre, huella capturada, socio_id esperado); los socios son 1..N en el orden de búsqueda."""
+    total = len(plantillas)
+    return [
+        ("inicio", _captura(plantillas[0], aleatorio), 1),
+        ("mitad", _captura(plantillas[total // 2], aleatorio), total // 2 + 1),
+        ("final", _captura(plantillas[-1], aleatorio), total),
+        ("sin coincidencia", aleatorio.randbytes(BYTES_PLANTILLA), None),
+    ]
+
+
+def medir(nombre: str, galeria: GaleriaHuellas, plantillas: list[bytes], busquedas: int, aleatorio: random.Random):
+    galeria.identificar(plantillas[0])     # arranca el pool y los comparadores
+    partes = []
+    for caso, captura, esperado in casos(plantillas, aleatorio):
+        tiempos = []
+        for _ in range(busquedas):
+            inicio = time.perf_counter()
+            socio_id = galeria.identificar(captura)
+            tiempos.append(time.perf_counter() - inicio)
+            if socio_id != esperado:
+                raise AssertionError(f"{nombre}, {caso}: identificó {socio_id}, se esperaba {esperado}")
+        tiempos.sort()
+        partes.append(f"{caso} {statistics.mean(tiempos) * 1000:.1f}/{tiempos[len(tiempos) // 2] * 1000:.1f}")
+        if caso == "sin coincidencia":
+            partes.append(f"{len(plantillas) / statistics.mean(tiempos):,.0f} comparaciones/s")
+    print(f"  {nombre:18s} " + " | ".join(partes))
+
+
+def main(argv: list[str]):
+    total = int(argv[argv.index("--plantillas") + 1]) if "--plantillas" in argv else 5000
+    trabajadores = int(argv[argv.index("--trabajadores") + 1]) if "--trabajadores" in argv else max(2, os.cpu_count() or 1)
+    busquedas = int(argv[argv.index("--busquedas") + 1]) if "--busquedas" in argv else 10
+    aleatorio = random.Random(1)
+    plantillas = [aleatorio.randbytes(BYTES_PLANTILLA) for _ in range(total)]
+    print(f"{total} plantillas de {BYTES_PLANTILLA} bytes, {trabajadores} trabajadores, {os.cpu_count()} núcleos, "
+          f"NumPy {'sí' if motor_huellas.NUMPY_DISPONIBLE else 'no'}; latencia media/p50 en ms")
+
+    motores = [
+        ("secuencial", None),
+        (f"MotorHilos x{trabajadores}", MotorHilos(ComparadorReferencia, trabajadores)),
+        (f"MotorProcesos x{trabajadores}", MotorProcesos(ComparadorReferencia, trabajadores)),
+    ]
+    for nombre, motor in motores:
+        galeria = GaleriaHuellas(ComparadorReferencia() if motor is None else None, motor)
+        galeria.cargar(enumerate(plantillas, start=1), total * BYTES_PLANTILLA)
+        try:
+            medir(nombre, galeria, plantillas, busquedas, aleatorio)
+        finally:
+            galeria.cerrar()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,109 @@
+"""
+Banco de pruebas de ServiciosSocioAsync (aplicacion/serviciosAsincronos.py) contra ServiciosSocio
+atendiendo consultas concurrentes, como un demonio de accesos con varios kioscos.
+
+Sobre una base sintética (Utilerias/bench_datos.py) lanza N consultas con C en vuelo a la vez:
+  - "hilos": ServiciosSocio en un ThreadPoolExecutor de C hilos (lo que haría un servidor síncrono);
+  - "async": ServiciosSocioAsync con asyncio.gather limitado por un semáforo de C, en un solo hilo.
+Operaciones: la ficha del socio (obtener_socio_por_id, con la caché vaciada antes de cada corrida
+e IDs distintos, así toda consulta va a la base) y la búsqueda por nombre (buscar_ids_por_nombre).
+Reporta consultas/s y la latencia por consulta (p50, p99) de cada combinación.
+
+Uso:
+    python -m Utilerias.bench_servicios_async                  # 20 000 socios, 2000 consultas, C = 1, 8, 32
+    python -m Utilerias.bench_servicios_async --consultas 5000 --concurrencia 16
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from Utilerias.bench_datos import APELLIDOS, NOMBRES, crear_base_sintetica
+from aplicacion.cache import cache_socios
+from aplicacion.serviciosAsincronos import ServiciosSocioAsync
+from aplicacion.serviciosSocio import ServiciosSocio
+from bd.conexion import PERFIL_SQLITE, aplicar_perfil_sqlite
+
+
+def _operaciones(socios: int, consultas: int) -> list[tuple[str, list]]:
+    aleatorio = random.Random(1)
+    ids = aleatorio.sample(range(1, socios + 1), min(consultas, socios))
+    textos = [f"{aleatorio.choice(NOMBRES)[:3]} {aleatorio.choice(APELLIDOS)}" for _ in range(consultas)]
+    return [("obtener_socio_por_id", ids), ("buscar_ids_por_nombre", textos)]
+
+
+def _resumen(nombre: str, total: float, latencias: list[float]) -> str:
+    latencias = sorted(latencias)
+    return (f"{nombre:6s} {len(latencias) / total:8.0f} consultas/s  p50={latencias[len(latencias) // 2] * 1000:7.2f} "
+            f"p99={latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000:7.2f} ms")
+
+
+def medir_hilos(servicio: ServiciosSocio, operacion: str, argumentos: list, concurrencia: int) -> str:
+    metodo = getattr(servicio, operacion)
+
+    def cronometrada(argumento):
+        inicio = time.perf_counter()
+        metodo(argumento)
+        return time.perf_counter() - inicio
+
+    cache_socios.limpiar()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concurrencia) as ejecutor:
+        latencias = list(ejecutor.map(cronometrada, argumentos))
+    return _resumen("hilos", time.perf_counter() - inicio, latencias)
+
+
+async def medir_async(servicio: ServiciosSocioAsync, operacion: str, argumentos: list, concurrencia: int) -> str:
+    metodo = getattr(servicio, operacion)
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def cronometrada(argumento):
+        async with semaforo:
+            inicio = time.perf_counter()
+            await metodo(argumento)
+            return time.perf_counter() - inicio
+
+    cache_socios.limpiar()
+    inicio = time.perf_counter()
+    latencias = await asyncio.gather(*(cronometrada(argumento) for argumento in argumentos))
+    return _resumen("async", time.perf_counter() - inicio, latencias)
+
+
+async def medir(ruta: str, engine_prueba, socios: int, consultas: int, niveles: list[int]):
+    sincrono = ServiciosSocio()
+    sincrono.engine = engine_prueba
+    engine_async = create_async_engine(f"sqlite+aiosqlite:///{ruta}")
+    aplicar_perfil_sqlite(engine_async.sync_engine, PERFIL_SQLITE)
+    asincrono = ServiciosSocioAsync()
+    asincrono.engine = engine_async
+    asincrono._sesiones = async_sessionmaker(engine_async, expire_on_commit=False)
+    try:
+        for operacion, argumentos in _operaciones(socios, consultas):
+            for concurrencia in niveles:
+                print(f"{operacion} x{len(argumentos)}, {concurrencia} en vuelo")
+                print("    " + medir_hilos(sincrono, operacion, argumentos, concurrencia))
+                print("    " + await medir_async(asincrono, operacion, argumentos, concurrencia))
+    finally:
+        await engine_async.dispose()
+
+
+def main(argv: list[str]):
+    socios = int(argv[argv.index("--socios") + 1]) if "--socios" in argv else 20000
+    consultas = int(argv[argv.index("--consultas") + 1]) if "--consultas" in argv else 2000
+    niveles = [int(argv[argv.index("--concurrencia") + 1])] if "--concurrencia" in argv else [1, 8, 32]
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "async.sqlite")
+        engine_prueba = crear_base_sintetica(ruta, socios=socios, bytes_foto=4096)
+        try:
+            asyncio.run(medir(ruta, engine_prueba, socios, consultas, niveles))
+        finally:
+            engine_prueba.dispose()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
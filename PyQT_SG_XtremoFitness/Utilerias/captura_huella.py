@@ -1,8 +1,23 @@
+"""
+Lector de huellas DigitalPersona para todo el proceso.
+
+ServicioBiometrico es el único dueño del SDK: un hilo que carga las DLL, inicializa DPFP/FX/MC,
+crea los contextos, la ventana invisible y la operación de adquisición una sola vez, y los
+conserva hasta que la aplicación se cierra. Los formularios no tocan el SDK: crean una sesión con
+obtener_servicio_biometrico().crear_sesion(modo), conectan sus señales, la abren con abrir() y
+sueltan el lector con cerrar().
+  - La adquisición corre mientras haya al menos una sesión abierta (conteo de referencias) y se
+    detiene, sin liberar el SDK, cuando se cierra la última.
+  - La sesión abierta más reciente recibe los eventos y decide el modo (identificación o
+    enrolamiento); al cerrarla, la anterior vuelve a recibirlos.
+Así cambiar de pestaña o pasar de identificar a enrolar sólo arranca o detiene la adquisición.
+"""
+import atexit
 import ctypes
 import os
 import platform
-import time
-from PyQt6.QtCore import QThread, pyqtSignal
+import threading
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
 
 try:
     import win32event, win32api, win32gui, win32con, pythoncom
@@ -36,70 +51,190 @@ WN_FINGER_GONE = 6
 
 DP_PRIORITY_LOW = 3
 
+MODO_IDENTIFICACION = "identificacion"
+MODO_ENROLAMIENTO = "enrolamiento"
+
+def _crear_evento(reinicio_manual: bool):
+    """Evento de Windows para despertar al bucle de mensajes desde otro hilo (None fuera de Windows)."""
+    return win32event.CreateEvent(None, reinicio_manual, False, None) if 'win32event' in globals() else None
+
+def _bucle_mensajes(evento_detener, continuar=lambda: True, evento_cambios=None, al_cambiar=None) -> bool:
+    """
+    Bucle de mensajes de Windows del hilo del lector. El hilo duerme en
+    MsgWaitForMultipleObjects hasta que llega un mensaje (los avisos WMUS_FP_NOTIFY del SDK), se
+    señala 'evento_detener' o se señala 'evento_cambios' (entonces llama a 'al_cambiar()'), así
+    cada aviso se atiende en cuanto llega y sin despertar mientras nadie usa el lector.
+    Termina cuando 'continuar()' es falso; devuelve False si fue por 'evento_detener' o WM_QUIT.
+    """
+    eventos = [evento_detener] if evento_cambios is None else [evento_detener, evento_cambios]
+    while continuar():
+        resultado = win32event.MsgWaitForMultipleObjects(eventos, False, win32event.INFINITE, win32event.QS_ALLINPUT)
+        if resultado == win32event.WAIT_OBJECT_0:
+            return False
+        if evento_cambios is not None and resultado == win32event.WAIT_OBJECT_0 + 1:
+            al_cambiar()
+            continue
+        # Se vacía toda la cola: MsgWaitForMultipleObjects sólo vuelve a despertar con mensajes nuevos.
+        # Sin filtro de ventana para recibir también WM_QUIT, que llega al hilo y no a la ventana.
+        while True:
+            msg = win32gui.PeekMessage(0, 0, 0, win32con.PM_REMOVE)
+            if msg[0] == 0:
+                break
+            if msg[1][1] == win32con.WM_QUIT:
+                return False
+            win32gui.TranslateMessage(msg[1])
+            win32gui.DispatchMessage(msg[1])
+            if not continuar():
+                break
+    return True
+
 class DATA_BLOB(ctypes.Structure):
     _fields_ = [("cbData", ULONG), ("pbData", ctypes.POINTER(FT_BYTE))]
 
 class MC_SETTINGS(ctypes.Structure):
     _fields_ = [("numPreRegFeatures", ctypes.c_int)]
 
-class EnrollmentWorker(QThread):
+class SesionBiometrica(QObject):
     """
-    Worker que maneja el proceso de enrolamiento de huella en un hilo separado.
-    Utiliza DPFPApi.dll y un bucle de mensajes de Windows para una captura robusta.
+    Uso del lector por un formulario (ServicioBiometrico.crear_sesion). Se conectan las señales
+    antes de abrir(); mientras sea la sesión abierta más reciente recibe los eventos del lector.
     """
-    proceso_finalizado = pyqtSignal(bytes, int)
+    huella_capturada = pyqtSignal(bytes)            # Identificación: plantilla de verificación
+    proceso_finalizado = pyqtSignal(bytes, int)     # Enrolamiento: plantilla de registro y su tamaño
+    estado = pyqtSignal(str)
     error_sdk = pyqtSignal(str)
-    estado_actualizado = pyqtSignal(str)
+
+    def __init__(self, servicio, modo: str):
+        super().__init__()
+        self.servicio = servicio
+        self.modo = modo
+        self.abierta = False
+        self.terminada = False      # Enrolamiento: la plantilla ya se entregó
+
+    def abrir(self):
+        """Toma el lector; arranca el hilo del SDK si es la primera sesión."""
+        if not self.abierta:
+            self.abierta = True
+            self.terminada = False
+            self.servicio._abrir_sesion(self)
+
+    def cerrar(self):
+        """Suelta el lector; no espera al hilo del SDK. Llamarlo más de una vez no hace nada."""
+        if self.abierta:
+            self.abierta = False
+            self.servicio._cerrar_sesion(self)
+
+
+class ServicioBiometrico(QThread):
+    """
+    Hilo dueño del SDK de DigitalPersona (ver el inicio del módulo). Todas las llamadas al SDK
+    ocurren en este hilo; abrir y cerrar una sesión sólo actualizan la pila de sesiones y lo
+    despiertan con un evento.
+    """
 
     def __init__(self):
         super().__init__()
-        self._is_running = True
+        self._candado = threading.Lock()
+        self._sesiones = []         # Sesiones abiertas, de la más antigua a la más reciente
+        self._activa = None         # Sesión que atiende el hilo del SDK en este momento
+        self._evento_detener = _crear_evento(reinicio_manual=True)
+        self._evento_cambios = _crear_evento(reinicio_manual=False)
+        self.inicializaciones = 0   # Veces que se cargó el SDK (una mientras no haya errores)
+        self.dpfpapi_dll = None
         self.dphftrex_dll = None
         self.dphmatch_dll = None
-        self.dpfpapi_dll = None
         self.fx_context = FT_HANDLE(0)
         self.mc_context = FT_HANDLE(0)
         self.op_handle = HDPOPERATION(0)
+        self.adquiriendo = False
         self.hwnd = 0
         self.class_atom = 0
         self.captures_needed = 4
         self.pre_enrollment_templates = []
         self.pre_reg_feature_len = 0
+        self.ver_feature_len = 0
+
+    # --- SESIONES (desde cualquier hilo) ---
+
+    def crear_sesion(self, modo: str) -> SesionBiometrica:
+        """Sesión en 'modo' (MODO_IDENTIFICACION o MODO_ENROLAMIENTO), todavía cerrada."""
+        return SesionBiometrica(self, modo)
+
+    def _abrir_sesion(self, sesion: SesionBiometrica):
+        with self._candado:
+            self._sesiones.append(sesion)
+            if not self.isRunning():
+                # Primera sesión, o el SDK falló antes y se vuelve a intentar
+                if self._evento_detener:
+                    win32event.ResetEvent(self._evento_detener)
+                self.start()
+        self._avisar_cambio()
+
+    def _cerrar_sesion(self, sesion: SesionBiometrica):
+        with self._candado:
+            if sesion in self._sesiones:
+                self._sesiones.remove(sesion)
+        self._avisar_cambio()
+
+    def _avisar_cambio(self):
+        if self._evento_cambios:
+            win32event.SetEvent(self._evento_cambios)
+
+    def detener(self, espera_ms: int = 5000):
+        """Libera el SDK y termina el hilo (se llama al cerrar la aplicación)."""
+        if self._evento_detener:
+            win32event.SetEvent(self._evento_detener)
+        if self.isRunning():
+            self.wait(espera_ms)
+
+    # --- HILO DEL SDK ---
 
     def run(self):
         if platform.system().lower() != "windows":
-            self.error_sdk.emit("La captura de huella solo es compatible con Windows.")
+            self._emitir_error("La captura de huella solo es compatible con Windows.")
             return
 
         pythoncom.CoInitialize()
         try:
             self._load_and_init_sdk()
             self._create_invisible_window()
-            self._start_acquisition()
-
-            self.estado_actualizado.emit(f"Coloque el dedo {self.captures_needed} veces.")
-
-            # Bucle de mensajes de Windows
-            while self._is_running and len(self.pre_enrollment_templates) < self.captures_needed:
-                msg = win32gui.PeekMessage(self.hwnd, 0, 0, win32con.PM_REMOVE)
-                if msg[0] != 0:
-                    if msg[1][1] == win32con.WM_QUIT:
-                        self._is_running = False
-                        break
-                    win32gui.TranslateMessage(msg[1])
-                    win32gui.DispatchMessage(msg[1])
-                else:
-                    self.msleep(50) # Pausa para no consumir 100% de CPU
-
-            if self._is_running and len(self.pre_enrollment_templates) >= self.captures_needed:
-                self._generate_final_template()
-
+            self._create_acquisition()
+            self.inicializaciones += 1
+            self._sincronizar()
+            # Bucle de mensajes de Windows (bloqueante: despierta con cada aviso del lector,
+            # con cada sesión que se abre o se cierra, o con detener())
+            _bucle_mensajes(self._evento_detener, evento_cambios=self._evento_cambios, al_cambiar=self._sincronizar)
         except Exception as e:
-            self.error_sdk.emit(f"Error en captura: {e}")
+            self._emitir_error(f"Error en el lector de huellas: {e}")
         finally:
+            self._activa = None
             self._cleanup()
             pythoncom.CoUninitialize()
 
+    def _emitir_error(self, mensaje: str):
+        """Avisa a todas las sesiones abiertas (el SDK no se pudo usar)."""
+        with self._candado:
+            sesiones = list(self._sesiones)
+        for sesion in sesiones:
+            sesion.error_sdk.emit(mensaje)
+
+    def _sincronizar(self):
+        """Aplica las sesiones abiertas o cerradas: arranca o detiene la adquisición y cambia de modo."""
+        with self._candado:
+            activa = self._sesiones[-1] if self._sesiones else None
+        if activa is self._activa:
+            return
+        self._activa = activa
+        if activa is None:
+            self._stop_acquisition()
+            return
+        self.pre_enrollment_templates = []
+        self._start_acquisition()
+        if activa.modo == MODO_ENROLAMIENTO:
+            activa.estado.emit(f"Coloque el dedo {self.captures_needed} veces.")
+        else:
+            activa.estado.emit("Lector de huellas activo. Coloque el dedo para identificar.")
+
     def _load_and_init_sdk(self):
         try:
             self.dpfpapi_dll = ctypes.WinDLL('DPFPApi.dll')
@@ -120,14 +255,14 @@ class EnrollmentWorker(QThread):
         self.dpfpapi_dll.DPFPDestroyAcquisition.argtypes = [HDPOPERATION]
         self.dpfpapi_dll.DPFPDestroyAcquisition.restype = HRESULT
         self.dpfpapi_dll.DPFPBufferFree.argtypes = [ctypes.c_void_p]
-        
+
         # --- Definición de Prototipos (argtypes/restype) para dphftrex_dll ---
         self.dphftrex_dll.FX_init.restype = FT_RETCODE
         self.dphftrex_dll.FX_createContext.argtypes = [ctypes.POINTER(FT_HANDLE)]
         self.dphftrex_dll.FX_createContext.restype = FT_RETCODE
         self.dphftrex_dll.FX_getFeaturesLen.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
         self.dphftrex_dll.FX_getFeaturesLen.restype = FT_RETCODE
-        # Ajustado según tu ejemplo para usar ctypes.c_int para image_size, buffer_len y los punteros de calidad
+        # Se usa ctypes.c_int para image_size, buffer_len y los punteros de calidad
         self.dphftrex_dll.FX_extractFeatures.argtypes = [FT_HANDLE, ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.c_int, ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(FT_BOOL)]
         self.dphftrex_dll.FX_extractFeatures.restype = FT_RETCODE
         self.dphftrex_dll.FX_closeContext.argtypes = [FT_HANDLE]
@@ -144,8 +279,6 @@ class EnrollmentWorker(QThread):
         self.dphmatch_dll.MC_getFeaturesLen.restype = FT_RETCODE
         self.dphmatch_dll.MC_generateRegFeatures.argtypes = [FT_HANDLE, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.POINTER(FT_BYTE)), ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.c_void_p, ctypes.POINTER(FT_BOOL)]
         self.dphmatch_dll.MC_generateRegFeatures.restype = FT_RETCODE
-        # self.dphmatch_dll.MC_verifyFeaturesEx.argtypes = [FT_HANDLE, ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_double), ctypes.POINTER(FT_BOOL)]
-        # self.dphmatch_dll.MC_verifyFeaturesEx.restype = FT_RETCODE
         self.dphmatch_dll.MC_closeContext.argtypes = [FT_HANDLE]
         self.dphmatch_dll.MC_closeContext.restype = FT_RETCODE
         self.dphmatch_dll.MC_terminate.restype = FT_RETCODE
@@ -166,6 +299,10 @@ class EnrollmentWorker(QThread):
         self.dphftrex_dll.FX_getFeaturesLen(FT_PRE_REG_FTR, ctypes.byref(pre_reg_feature_len_ptr), None)
         self.pre_reg_feature_len = pre_reg_feature_len_ptr.value
 
+        ver_feature_len_ptr = ctypes.c_int(0)
+        self.dphftrex_dll.FX_getFeaturesLen(FT_VER_FTR, ctypes.byref(ver_feature_len_ptr), None)
+        self.ver_feature_len = ver_feature_len_ptr.value
+
     def _create_invisible_window(self):
         wc = win32gui.WNDCLASS()
         wc.lpfnWndProc = self._wnd_proc
@@ -176,74 +313,106 @@ class EnrollmentWorker(QThread):
         if not self.hwnd:
             raise Exception("No se pudo crear la ventana invisible para el lector.")
 
-    def _start_acquisition(self):
+    def _create_acquisition(self):
         GUID_NULL = GUID()
         hr = self.dpfpapi_dll.DPFPCreateAcquisition(DP_PRIORITY_LOW, ctypes.byref(GUID_NULL), 4, self.hwnd, WMUS_FP_NOTIFY, ctypes.byref(self.op_handle))
         if hr != 0: raise Exception(f"Fallo en DPFPCreateAcquisition: {hr}")
 
+    def _start_acquisition(self):
+        if self.adquiriendo:
+            return
         hr = self.dpfpapi_dll.DPFPStartAcquisition(self.op_handle)
         if hr != 0: raise Exception(f"Fallo en DPFPStartAcquisition: {hr}")
+        self.adquiriendo = True
+
+    def _stop_acquisition(self):
+        if self.adquiriendo:
+            self.dpfpapi_dll.DPFPStopAcquisition(self.op_handle)
+            self.adquiriendo = False
 
     def _wnd_proc(self, hwnd, msg, wparam, lparam):
         if msg == WMUS_FP_NOTIFY:
+            sesion = self._activa
+            if sesion is None or not sesion.abierta:
+                return 0
+            enrolando = sesion.modo == MODO_ENROLAMIENTO
             event_type = wparam
             if event_type == WN_FINGER_TOUCHED:
-                self.estado_actualizado.emit("Dedo detectado. Mantenga quieto.")
+                sesion.estado.emit("Dedo detectado. Mantenga quieto." if enrolando else "Dedo detectado. Procesando...")
             elif event_type == WN_FINGER_GONE:
-                capturas_restantes = self.captures_needed - len(self.pre_enrollment_templates)
-                if capturas_restantes > 0:
-                    self.estado_actualizado.emit(f"¡Bien! Levante el dedo. Faltan {capturas_restantes} capturas.")
+                if not enrolando:
+                    sesion.estado.emit("Lector de huellas activo. Coloque el dedo para identificar.")
+                elif not sesion.terminada:
+                    capturas_restantes = self.captures_needed - len(self.pre_enrollment_templates)
+                    if capturas_restantes > 0:
+                        sesion.estado.emit(f"¡Bien! Levante el dedo. Faltan {capturas_restantes} capturas.")
             elif event_type == WN_COMPLETED:
                 image_blob_ptr = ctypes.cast(lparam, ctypes.POINTER(DATA_BLOB))
-                self._process_fingerprint_sample(image_blob_ptr)
+                if enrolando:
+                    self._procesar_enrolamiento(sesion, image_blob_ptr)
+                else:
+                    self._procesar_identificacion(sesion, image_blob_ptr)
             elif event_type == WN_ERROR:
-                self.error_sdk.emit(f"Error del lector: {lparam}")
-                self.stop()
+                sesion.error_sdk.emit(f"Error del lector: {lparam}")
             return 0
         elif msg == win32con.WM_DESTROY or msg == win32con.WM_CLOSE:
             win32gui.PostQuitMessage(0)
             return 0
         return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
 
-    def _process_fingerprint_sample(self, image_blob_ptr):
-        try:
-            if not image_blob_ptr or not image_blob_ptr.contents.pbData or image_blob_ptr.contents.cbData == 0:
-                self.estado_actualizado.emit("Error: Datos de imagen inválidos.")
-                return
+    def _extract_features(self, image_blob_ptr, feature_type: int, feature_len: int) -> bytes | None:
+        """Extrae las características de la imagen del aviso WN_COMPLETED; None si no se pudieron extraer."""
+        if not image_blob_ptr or not image_blob_ptr.contents.pbData or image_blob_ptr.contents.cbData == 0:
+            return None
 
-            image_size = image_blob_ptr.contents.cbData
-            image_data_ptr = image_blob_ptr.contents.pbData
-            image_data_copy = ctypes.string_at(image_data_ptr, image_size)
-
-            buffer = (FT_BYTE * self.pre_reg_feature_len)()
-            features_created = FT_BOOL(0)
-            image_data_ctype = (FT_BYTE * image_size).from_buffer_copy(image_data_copy)
-            
-            # --- CORRECCIÓN CRUCIAL ---
-            # Creamos variables para recibir los valores de calidad, aunque no los usemos.
-            # La función espera punteros válidos, no punteros nulos (None).
-            image_quality = ctypes.c_int(0)
-            feature_quality = ctypes.c_int(0)
-
-            rc = self.dphftrex_dll.FX_extractFeatures(
-                self.fx_context, ctypes.c_int(image_size), ctypes.cast(image_data_ctype, ctypes.POINTER(FT_BYTE)), FT_PRE_REG_FTR, self.pre_reg_feature_len, buffer, ctypes.byref(image_quality), ctypes.byref(feature_quality), ctypes.byref(features_created)
-            )
+        image_size = image_blob_ptr.contents.cbData
+        image_data_copy = ctypes.string_at(image_blob_ptr.contents.pbData, image_size)
+        image_data_ctype = (FT_BYTE * image_size).from_buffer_copy(image_data_copy)
 
-            if rc == 0 and features_created.value:
-                feature_set_bytes = bytes(buffer)
-                self.pre_enrollment_templates.append(feature_set_bytes)
-                capturas_hechas = len(self.pre_enrollment_templates)
-                self.estado_actualizado.emit(f"Captura {capturas_hechas}/{self.captures_needed} exitosa.")
-            else:
-                self.estado_actualizado.emit("Fallo en captura. Intente de nuevo.")
-        except Exception as e:
-            self.error_sdk.emit(f"Error procesando huella: {e}")
+        buffer = (FT_BYTE * feature_len)()
+        features_created = FT_BOOL(0)
+        # La función espera punteros válidos para la calidad, no punteros nulos (None)
+        image_quality = ctypes.c_int(0)
+        feature_quality = ctypes.c_int(0)
+
+        rc = self.dphftrex_dll.FX_extractFeatures(
+            self.fx_context, ctypes.c_int(image_size), ctypes.cast(image_data_ctype, ctypes.POINTER(FT_BYTE)), feature_type, feature_len, buffer, ctypes.byref(image_quality), ctypes.byref(feature_quality), ctypes.byref(features_created)
+        )
         # No se debe llamar a DPFPBufferFree aquí. El SDK gestiona la liberación
         # del búfer de imagen (lparam) después de que el manejador de mensajes retorna.
+        return bytes(buffer) if rc == 0 and features_created.value else None
 
-    def _generate_final_template(self):
+    def _procesar_identificacion(self, sesion: SesionBiometrica, image_blob_ptr):
         try:
-            self.estado_actualizado.emit("Generando plantilla final...")
+            feature_set_bytes = self._extract_features(image_blob_ptr, FT_VER_FTR, self.ver_feature_len)
+            if feature_set_bytes:
+                sesion.huella_capturada.emit(feature_set_bytes)
+            else:
+                sesion.estado.emit("Fallo en captura. Intente de nuevo.")
+        except Exception as e:
+            sesion.error_sdk.emit(f"Error procesando huella: {e}")
+
+    def _procesar_enrolamiento(self, sesion: SesionBiometrica, image_blob_ptr):
+        if sesion.terminada:
+            return
+        try:
+            feature_set_bytes = self._extract_features(image_blob_ptr, FT_PRE_REG_FTR, self.pre_reg_feature_len)
+            if not feature_set_bytes:
+                sesion.estado.emit("Fallo en captura. Intente de nuevo.")
+                return
+            self.pre_enrollment_templates.append(feature_set_bytes)
+            capturas_hechas = len(self.pre_enrollment_templates)
+            sesion.estado.emit(f"Captura {capturas_hechas}/{self.captures_needed} exitosa.")
+        except Exception as e:
+            sesion.error_sdk.emit(f"Error procesando huella: {e}")
+            return
+        if len(self.pre_enrollment_templates) >= self.captures_needed:
+            sesion.terminada = True
+            self._generate_final_template(sesion)
+
+    def _generate_final_template(self, sesion: SesionBiometrica):
+        try:
+            sesion.estado.emit("Generando plantilla final...")
 
             reg_template_len_ptr = ctypes.c_int(0)
             self.dphmatch_dll.MC_getFeaturesLen(FT_REG_FTR, 0, ctypes.byref(reg_template_len_ptr), None)
@@ -253,7 +422,7 @@ class EnrollmentWorker(QThread):
             template_created = FT_BOOL(0)
             PunteroArrayFT_BYTE = ctypes.POINTER(FT_BYTE) * self.captures_needed
             feature_set_pointers = PunteroArrayFT_BYTE()
-            
+
             # Es crucial mantener vivos los buffers temporales durante la llamada a C
             buffers_temporales = []
             for i, fs_bytes in enumerate(self.pre_enrollment_templates):
@@ -269,24 +438,20 @@ class EnrollmentWorker(QThread):
 
             if rc == 0 and template_created.value:
                 final_template = bytes(reg_template_buffer)
-                self.proceso_finalizado.emit(final_template, len(final_template))
+                sesion.proceso_finalizado.emit(final_template, len(final_template))
             else:
-                self.error_sdk.emit(f"No se pudo generar la plantilla final. Código: {rc}")
+                sesion.error_sdk.emit(f"No se pudo generar la plantilla final. Código: {rc}")
         except Exception as e:
-            self.error_sdk.emit(f"Error generando plantilla: {e}")
+            sesion.error_sdk.emit(f"Error generando plantilla: {e}")
         finally:
-            self.stop()
-
-    def stop(self):
-        self._is_running = False
-        if self.hwnd:
-            win32gui.PostMessage(self.hwnd, win32con.WM_CLOSE, 0, 0)
+            self.pre_enrollment_templates = []
 
     def _cleanup(self):
         if self.op_handle and self.op_handle.value:
-            self.dpfpapi_dll.DPFPStopAcquisition(self.op_handle)
+            self._stop_acquisition()
             self.dpfpapi_dll.DPFPDestroyAcquisition(self.op_handle)
             self.op_handle = HDPOPERATION(0)
+        self.adquiriendo = False
 
         if self.mc_context and self.mc_context.value:
             self.dphmatch_dll.MC_closeContext(self.mc_context)
@@ -299,6 +464,7 @@ class EnrollmentWorker(QThread):
         if self.dphmatch_dll: self.dphmatch_dll.MC_terminate()
         if self.dphftrex_dll: self.dphftrex_dll.FX_terminate()
         if self.dpfpapi_dll: self.dpfpapi_dll.DPFPTerm()
+        self.dpfpapi_dll = self.dphftrex_dll = self.dphmatch_dll = None
 
         if self.hwnd:
             win32gui.DestroyWindow(self.hwnd)
@@ -307,184 +473,16 @@ class EnrollmentWorker(QThread):
             win32gui.UnregisterClass(self.class_atom, win32api.GetModuleHandle(None))
             self.class_atom = 0
 
-class IdentificationWorker(QThread):
-    """
-    Worker que maneja la captura de una huella para identificación en un hilo separado.
-    Emite la plantilla capturada para que sea comparada con la base de datos.
-    """
-    huella_capturada = pyqtSignal(bytes)
-    error_sdk = pyqtSignal(str)
-    estado_lector = pyqtSignal(str)
-
-    def __init__(self):
-        super().__init__()
-        self._is_running = True
-        self.dpfpapi_dll = None
-        self.dphftrex_dll = None
-        self.fx_context = FT_HANDLE(0)
-        self.op_handle = HDPOPERATION(0)
-        self.hwnd = 0
-        self.class_atom = 0
-        self.ver_feature_len = 0
-
-    def run(self):
-        if platform.system().lower() != "windows":
-            self.error_sdk.emit("La identificación por huella solo es compatible con Windows.")
-            return
-
-        pythoncom.CoInitialize()
-        try:
-            self._load_and_init_sdk()
-            self._create_invisible_window()
-            self._start_acquisition()
-
-            self.estado_lector.emit("Lector de huellas activo. Coloque el dedo para identificar.")
-
-            # Bucle de mensajes de Windows
-            while self._is_running:
-                msg = win32gui.PeekMessage(self.hwnd, 0, 0, win32con.PM_REMOVE)
-                if msg[0] != 0:
-                    if msg[1][1] == win32con.WM_QUIT:
-                        self._is_running = False
-                        break
-                    win32gui.TranslateMessage(msg[1])
-                    win32gui.DispatchMessage(msg[1])
-                else:
-                    self.msleep(50) # Pausa para no consumir 100% de CPU
 
-        except Exception as e:
-            self.error_sdk.emit(f"Error en identificación: {e}")
-        finally:
-            self._cleanup()
-            pythoncom.CoUninitialize()
+_servicio = None
+_candado_servicio = threading.Lock()
 
-    def _load_and_init_sdk(self):
-        try:
-            self.dpfpapi_dll = ctypes.WinDLL('DPFPApi.dll')
-            self.dphftrex_dll = ctypes.WinDLL('dpHFtrEx.dll')
-        except OSError as e:
-            raise Exception(f"Error al cargar DLLs: {e}. Asegúrese de que el RTE de DigitalPersona esté instalado.")
 
-        # --- Definición de Prototipos (argtypes/restype) para dpfpapi_dll ---
-        self.dpfpapi_dll.DPFPInit.restype = HRESULT
-        self.dpfpapi_dll.DPFPTerm.restype = None
-        self.dpfpapi_dll.DPFPCreateAcquisition.argtypes = [ctypes.c_int, ctypes.POINTER(GUID), ULONG, HWND, ULONG, ctypes.POINTER(HDPOPERATION)]
-        self.dpfpapi_dll.DPFPCreateAcquisition.restype = HRESULT
-        self.dpfpapi_dll.DPFPStartAcquisition.argtypes = [HDPOPERATION]
-        self.dpfpapi_dll.DPFPStartAcquisition.restype = HRESULT
-        self.dpfpapi_dll.DPFPStopAcquisition.argtypes = [HDPOPERATION]
-        self.dpfpapi_dll.DPFPStopAcquisition.restype = HRESULT
-        self.dpfpapi_dll.DPFPDestroyAcquisition.argtypes = [HDPOPERATION]
-        self.dpfpapi_dll.DPFPDestroyAcquisition.restype = HRESULT
-        
-        # --- Definición de Prototipos (argtypes/restype) para dphftrex_dll ---
-        self.dphftrex_dll.FX_init.restype = FT_RETCODE
-        self.dphftrex_dll.FX_createContext.argtypes = [ctypes.POINTER(FT_HANDLE)]
-        self.dphftrex_dll.FX_createContext.restype = FT_RETCODE
-        self.dphftrex_dll.FX_getFeaturesLen.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
-        self.dphftrex_dll.FX_getFeaturesLen.restype = FT_RETCODE
-        self.dphftrex_dll.FX_extractFeatures.argtypes = [FT_HANDLE, ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.c_int, ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(FT_BOOL)]
-        self.dphftrex_dll.FX_extractFeatures.restype = FT_RETCODE
-        self.dphftrex_dll.FX_closeContext.argtypes = [FT_HANDLE]
-        self.dphftrex_dll.FX_closeContext.restype = FT_RETCODE
-        self.dphftrex_dll.FX_terminate.restype = FT_RETCODE
-
-        # --- Inicialización de los SDKs ---
-        if self.dpfpapi_dll.DPFPInit() != 0: raise Exception("Fallo al inicializar DPFPInit")
-        if self.dphftrex_dll.FX_init() != 0: raise Exception("Fallo al inicializar FX_init")
-
-        if self.dphftrex_dll.FX_createContext(ctypes.byref(self.fx_context)) != 0: raise Exception("Fallo al crear contexto FX")
-
-        ver_feature_len_ptr = ctypes.c_int(0)
-        self.dphftrex_dll.FX_getFeaturesLen(FT_VER_FTR, ctypes.byref(ver_feature_len_ptr), None)
-        self.ver_feature_len = ver_feature_len_ptr.value
-
-    def _create_invisible_window(self):
-        wc = win32gui.WNDCLASS()
-        wc.lpfnWndProc = self._wnd_proc
-        wc.lpszClassName = "FingerprintIdentifier"
-        wc.hInstance = win32api.GetModuleHandle(None)
-        self.class_atom = win32gui.RegisterClass(wc)
-        self.hwnd = win32gui.CreateWindow(self.class_atom, "FP Identifier", 0, 0, 0, 0, 0, 0, 0, wc.hInstance, None)
-        if not self.hwnd:
-            raise Exception("No se pudo crear la ventana invisible para el lector.")
-
-    def _start_acquisition(self):
-        GUID_NULL = GUID()
-        hr = self.dpfpapi_dll.DPFPCreateAcquisition(DP_PRIORITY_LOW, ctypes.byref(GUID_NULL), 4, self.hwnd, WMUS_FP_NOTIFY, ctypes.byref(self.op_handle))
-        if hr != 0: raise Exception(f"Fallo en DPFPCreateAcquisition: {hr}")
-
-        hr = self.dpfpapi_dll.DPFPStartAcquisition(self.op_handle)
-        if hr != 0: raise Exception(f"Fallo en DPFPStartAcquisition: {hr}")
-
-    def _wnd_proc(self, hwnd, msg, wparam, lparam):
-        if msg == WMUS_FP_NOTIFY:
-            event_type = wparam
-            if event_type == WN_FINGER_TOUCHED:
-                self.estado_lector.emit("Dedo detectado. Procesando...")
-            elif event_type == WN_FINGER_GONE:
-                self.estado_lector.emit("Lector de huellas activo. Coloque el dedo para identificar.")
-            elif event_type == WN_COMPLETED:
-                image_blob_ptr = ctypes.cast(lparam, ctypes.POINTER(DATA_BLOB))
-                self._process_fingerprint_sample(image_blob_ptr)
-            elif event_type == WN_ERROR:
-                self.error_sdk.emit(f"Error del lector: {lparam}")
-            return 0
-        elif msg == win32con.WM_DESTROY or msg == win32con.WM_CLOSE:
-            win32gui.PostQuitMessage(0)
-            return 0
-        return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
-
-    def _process_fingerprint_sample(self, image_blob_ptr):
-        try:
-            if not image_blob_ptr or not image_blob_ptr.contents.pbData or image_blob_ptr.contents.cbData == 0:
-                self.estado_lector.emit("Error: Datos de imagen inválidos.")
-                return
-
-            image_size = image_blob_ptr.contents.cbData
-            image_data_ptr = image_blob_ptr.contents.pbData
-            image_data_copy = ctypes.string_at(image_data_ptr, image_size)
-
-            buffer = (FT_BYTE * self.ver_feature_len)()
-            features_created = FT_BOOL(0)
-            image_data_ctype = (FT_BYTE * image_size).from_buffer_copy(image_data_copy)
-            
-            image_quality = ctypes.c_int(0)
-            feature_quality = ctypes.c_int(0)
-
-            rc = self.dphftrex_dll.FX_extractFeatures(
-                self.fx_context, ctypes.c_int(image_size), ctypes.cast(image_data_ctype, ctypes.POINTER(FT_BYTE)), FT_VER_FTR, self.ver_feature_len, buffer, ctypes.byref(image_quality), ctypes.byref(feature_quality), ctypes.byref(features_created)
-            )
-
-            if rc == 0 and features_created.value:
-                feature_set_bytes = bytes(buffer)
-                self.huella_capturada.emit(feature_set_bytes)
-            else:
-                self.estado_lector.emit("Fallo en captura. Intente de nuevo.")
-        except Exception as e:
-            self.error_sdk.emit(f"Error procesando huella: {e}")
-
-    def stop(self):
-        self._is_running = False
-        if self.hwnd:
-            win32gui.PostMessage(self.hwnd, win32con.WM_CLOSE, 0, 0)
-
-    def _cleanup(self):
-        if self.op_handle and self.op_handle.value:
-            self.dpfpapi_dll.DPFPStopAcquisition(self.op_handle)
-            self.dpfpapi_dll.DPFPDestroyAcquisition(self.op_handle)
-            self.op_handle = HDPOPERATION(0)
-
-        if self.fx_context and self.fx_context.value:
-            self.dphftrex_dll.FX_closeContext(self.fx_context)
-            self.fx_context = FT_HANDLE(0)
-
-        if self.dphftrex_dll: self.dphftrex_dll.FX_terminate()
-        if self.dpfpapi_dll: self.dpfpapi_dll.DPFPTerm()
-
-        if self.hwnd:
-            win32gui.DestroyWindow(self.hwnd)
-            self.hwnd = 0
-        if self.class_atom:
-            win32gui.UnregisterClass(self.class_atom, win32api.GetModuleHandle(None))
-            self.class_atom = 0
\ No newline at end of file
+def obtener_servicio_biometrico() -> ServicioBiometrico:
+    """Servicio compartido; su hilo arranca con la primera sesión y libera el SDK al salir."""
+    global _servicio
+    with _candado_servicio:
+        if _servicio is None:
+            _servicio = ServicioBiometrico()
+            atexit.register(_servicio.detener)
+        return _servicio
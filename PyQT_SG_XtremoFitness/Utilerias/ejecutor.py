@@ -0,0 +1,163 @@
+"""
+Ejecutor de consultas en segundo plano para los formularios.
+
+Las llamadas a servicios (consultas a la base, identificación por huella) corren en un
+QThreadPool propio y el resultado vuelve al hilo de la interfaz mediante una señal, así la
+ventana no se congela mientras se espera a SQLite.
+
+Uso típico desde un formulario:
+    self.ejecutor.ejecutar(self.servicio_socios.obtener_socio_por_id, socio_id,
+                           al_terminar=self._mostrar_socio, al_fallar=self._mostrar_error,
+                           clave="seleccion_socio")
+
+'clave' agrupa peticiones que se reemplazan entre sí: al pedir una nueva con la misma clave,
+la anterior se quita de la cola si aún no empezó, y si ya estaba corriendo su resultado se
+descarta al llegar (p. ej. el usuario hizo clic en otra fila antes de que cargara la primera).
+Con cancelable=True la función recibe además cancelado=threading.Event, que se señala cuando la
+petición se reemplaza, se cancela o vence, para que deje de trabajar en lugar de sólo descartar
+su resultado. Con tiempo_maximo_ms, si el resultado no llega a tiempo se llama a
+al_fallar(TimeoutError) y lo que llegue después se descarta.
+ejecutar() y cancelar() deben llamarse desde el hilo de la interfaz.
+"""
+import itertools
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal, pyqtSlot
+
+# Consultas a la base que pueden estar corriendo a la vez; el resto espera en la cola del pool.
+# SQLite admite un solo escritor, así que más hilos sólo añadirían espera por bloqueos.
+MAX_CONSULTAS_SIMULTANEAS = 2
+
+
+class _Tarea(QRunnable):
+    def __init__(self, ejecutor: "EjecutorConsultas", id_tarea: int, funcion, args, kwargs):
+        super().__init__()
+        # El ejecutor conserva la referencia hasta entregar el resultado (tryTake la necesita viva)
+        self.setAutoDelete(False)
+        self.ejecutor = ejecutor
+        self.id_tarea = id_tarea
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            resultado = self.funcion(*self.args, **self.kwargs)
+        except Exception as e:
+            self.ejecutor._tarea_terminada.emit(self.id_tarea, None, e)
+        else:
+            self.ejecutor._tarea_terminada.emit(self.id_tarea, resultado, None)
+
+
+class EjecutorConsultas(QObject):
+    # Se emite desde los hilos del pool; al vivir el ejecutor en el hilo de la interfaz,
+    # Qt entrega la señal en ese hilo (conexión en cola).
+    _tarea_terminada = pyqtSignal(int, object, object)
+
+    def __init__(self, max_simultaneas: int = MAX_CONSULTAS_SIMULTANEAS, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_simultaneas)
+        self._ids = itertools.count(1)
+        self._tareas = {}             # id -> (tarea, clave, al_terminar, al_fallar, cancelado)
+        self._vigente_por_clave = {}  # clave -> id de la petición más reciente con esa clave
+        self._vencidas = set()        # IDs que vencieron mientras corrían: su resultado se descarta
+        self._tarea_terminada.connect(self._entregar)
+
+    def ejecutar(self, funcion, *args, al_terminar=None, al_fallar=None, clave: str | None = None,
+                 tiempo_maximo_ms: int | None = None, cancelable: bool = False, **kwargs) -> int:
+        """
+        Encola funcion(*args, **kwargs) y devuelve el ID de la tarea.
+        al_terminar(resultado) o al_fallar(excepcion) se llaman en el hilo de la interfaz.
+        """
+        id_tarea = next(self._ids)
+        if clave is not None:
+            self.cancelar(clave)
+            self._vigente_por_clave[clave] = id_tarea
+        cancelado = None
+        if cancelable:
+            cancelado = kwargs["cancelado"] = threading.Event()
+        tarea = _Tarea(self, id_tarea, funcion, args, kwargs)
+        self._tareas[id_tarea] = (tarea, clave, al_terminar, al_fallar, cancelado)
+        self._pool.start(tarea)
+        if tiempo_maximo_ms is not None:
+            QTimer.singleShot(tiempo_maximo_ms, lambda: self._vencer(id_tarea, tiempo_maximo_ms))
+        return id_tarea
+
+    def cancelar(self, clave: str):
+        """
+        Descarta la petición pendiente con esa clave: si aún no empezó ni siquiera se ejecuta, y si
+        ya corre y es cancelable se le avisa para que se detenga.
+        """
+        id_anterior = self._vigente_por_clave.pop(clave, None)
+        if id_anterior is None:
+            return
+        registro = self._tareas.get(id_anterior)
+        if registro is None:
+            return
+        if self._pool.tryTake(registro[0]):
+            del self._tareas[id_anterior]
+        elif registro[4] is not None:
+            registro[4].set()
+
+    def _vencer(self, id_tarea: int, tiempo_maximo_ms: int):
+        """El resultado no llegó a tiempo: se cancela la tarea y se avisa con TimeoutError."""
+        registro = self._tareas.get(id_tarea)
+        if registro is None or id_tarea in self._vencidas:
+            return  # Ya se entregó
+        tarea, clave, _, al_fallar, cancelado = registro
+        if clave is not None:
+            if self._vigente_por_clave.get(clave) != id_tarea:
+                return  # Ya reemplazada: su resultado se descarta de todos modos
+            del self._vigente_por_clave[clave]
+        if self._pool.tryTake(tarea):
+            del self._tareas[id_tarea]
+        else:
+            # Sigue corriendo: el pool la conserva hasta que termine (ver _entregar)
+            self._vencidas.add(id_tarea)
+            if cancelado is not None:
+                cancelado.set()
+        error = TimeoutError(f"Sin respuesta después de {tiempo_maximo_ms} ms")
+        if al_fallar:
+            al_fallar(error)
+        else:
+            print(f"Error en consulta en segundo plano ({getattr(tarea.funcion, '__name__', '?')}): {error}")
+
+    def en_curso(self) -> int:
+        """Tareas en cola o corriendo cuyo resultado aún no se entrega."""
+        return len(self._tareas)
+
+    def esperar(self, milisegundos: int = -1) -> bool:
+        """Bloquea hasta que el pool quede vacío (para el cierre de la aplicación)."""
+        return self._pool.waitForDone(milisegundos)
+
+    @pyqtSlot(int, object, object)
+    def _entregar(self, id_tarea: int, resultado, error):
+        registro = self._tareas.pop(id_tarea, None)
+        if registro is None:
+            return
+        if id_tarea in self._vencidas:
+            self._vencidas.discard(id_tarea)
+            return  # Ya se avisó el TimeoutError
+        _, clave, al_terminar, al_fallar, _ = registro
+        if clave is not None:
+            if self._vigente_por_clave.get(clave) != id_tarea:
+                return  # Petición obsoleta: ya hay otra más reciente con la misma clave
+            del self._vigente_por_clave[clave]
+        if error is not None:
+            if al_fallar:
+                al_fallar(error)
+            else:
+                print(f"Error en consulta en segundo plano ({getattr(registro[0].funcion, '__name__', '?')}): {error}")
+        elif al_terminar:
+            al_terminar(resultado)
+
+
+_ejecutor = None
+
+
+def obtener_ejecutor() -> EjecutorConsultas:
+    """Ejecutor compartido por todos los formularios (se crea en el primer uso, ya con QApplication)."""
+    global _ejecutor
+    if _ejecutor is None:
+        _ejecutor = EjecutorConsultas()
+    return _ejecutor
@@ -0,0 +1,375 @@
+"""
+Galería de huellas en memoria para la identificación 1-a-N.
+
+GaleriaHuellas carga una sola vez todas las plantillas registradas en un único búfer contiguo de
+ctypes y guarda, por plantilla, un puntero ya calculado a su posición. Identificar es entonces
+sólo recorrer la galería llamando al comparador: sin consultas a la base, sin copiar BLOBs y sin
+volver a cargar la DLL ni a crear el contexto de comparación en cada huella.
+
+Los cambios llegan como deltas (agregar/actualizar/quitar) desde ServiciosSocio después de cada
+commit que toca Huella_Template:
+  - una plantilla del mismo tamaño o menor se reescribe en su lugar;
+  - una más grande deja una lápida en su posición y se agrega al final;
+  - quitar sólo deja una lápida.
+encolar() es la entrada que usa la interfaz: guarda el delta sin esperar y lo aplica en ese momento
+sólo si la galería ya se cargó y está libre; si una carga o una búsqueda la tiene tomada, el delta
+se aplica al inicio de la siguiente identificar(), priorizar() o al terminar cargar(), bajo el
+mismo candado.
+Cuando las lápidas pasan de FRACCION_COMPACTAR, o el búfer se llena, se reorganiza en uno nuevo
+(con espacio libre para CRECIMIENTO veces lo ocupado) y se recalculan los punteros.
+
+Orden de búsqueda: priorizar() recibe un puntaje por socio (ServiciosSocio lo calcula con las
+visitas recientes, la hora habitual y la membresía vigente) y reorganiza el búfer de mayor a menor
+puntaje, así los socios que más probablemente están en la puerta se comparan primero. Las altas
+posteriores quedan al final hasta la siguiente priorización. estadisticas() informa en qué posición
+se encontraron los últimos VENTANA_PROFUNDIDAD aciertos.
+
+identificar() acepta un threading.Event 'cancelado' (lo señala el ejecutor de la interfaz cuando
+llega otra huella o se agota el tiempo): la búsqueda lo revisa entre comparaciones, suelta la
+galería y lanza BusquedaCancelada.
+
+El comparador es cualquier objeto con comparar(registro, longitud, verificacion, longitud) -> bool
+que reciba punteros ctypes a FT_BYTE; en producción es ComparadorDpHMatch. Con un motor
+(Utilerias/motor_huellas.py) la búsqueda se reparte entre varios hilos o procesos; si el motor
+usa procesos, el búfer se reserva en memoria compartida para que lo lean sin copiarlo.
+"""
+import ctypes
+import threading
+from collections import deque
+from multiprocessing import shared_memory
+
+# --- Tipos del SDK de DigitalPersona (los mismos que en captura_huella.py) ---
+FT_HANDLE = ctypes.c_void_p
+FT_BYTE = ctypes.c_ubyte
+FT_BOOL = ctypes.c_int
+PUNTERO_FT_BYTE = ctypes.POINTER(FT_BYTE)
+
+# Fracción de posiciones con lápida a partir de la cual se compacta el búfer
+FRACCION_COMPACTAR = 0.25
+# Espacio reservado al reorganizar, como múltiplo de los bytes ocupados (deja lugar para altas)
+CRECIMIENTO = 1.5
+# Tamaño mínimo del búfer en bytes
+CAPACIDAD_MINIMA = 64 * 1024
+# Aciertos recientes con los que se calculan las estadísticas de profundidad
+VENTANA_PROFUNDIDAD = 1000
+
+
+class BusquedaCancelada(Exception):
+    """La identificación se abandonó porque su petición fue reemplazada o venció."""
+
+
+class ComparadorDpHMatch:
+    """
+    dpHMatch.dll cargada una vez, con sus prototipos declarados y un contexto MC abierto hasta cerrar().
+    No es seguro entre hilos (reutiliza las variables de salida): GaleriaHuellas lo usa bajo su candado
+    y los motores paralelos crean uno por hilo o proceso.
+    """
+
+    def __init__(self):
+        try:
+            self.dll = ctypes.WinDLL('dpHMatch.dll')
+        except OSError as e:
+            raise Exception(f"Error al cargar dpHMatch.dll: {e}. Asegúrese de que el RTE de DigitalPersona esté instalado.")
+
+        # Prototipos (solo los necesarios para MC_verifyFeaturesEx)
+        self.dll.MC_init.restype = ctypes.c_int
+        self.dll.MC_createContext.argtypes = [ctypes.POINTER(FT_HANDLE)]
+        self.dll.MC_createContext.restype = ctypes.c_int
+        self.dll.MC_verifyFeaturesEx.argtypes = [FT_HANDLE, ctypes.c_int, PUNTERO_FT_BYTE, ctypes.c_int, PUNTERO_FT_BYTE, ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_double), ctypes.POINTER(FT_BOOL)]
+        self.dll.MC_verifyFeaturesEx.restype = ctypes.c_int
+        self.dll.MC_closeContext.argtypes = [FT_HANDLE]
+        self.dll.MC_closeContext.restype = ctypes.c_int
+        self.dll.MC_terminate.restype = ctypes.c_int
+
+        self.contexto = FT_HANDLE(0)
+        if self.dll.MC_init() != 0:
+            raise Exception("Fallo al inicializar MC_init")
+        if self.dll.MC_createContext(ctypes.byref(self.contexto)) != 0:
+            self.dll.MC_terminate()
+            raise Exception("Fallo al crear contexto MC")
+        # Variables de salida reutilizadas en cada comparación
+        self._decision = FT_BOOL(0)
+        self._far = ctypes.c_double(0.0)
+        self._ref_decision = ctypes.byref(self._decision)
+        self._ref_far = ctypes.byref(self._far)
+
+    def comparar(self, registro, longitud_registro: int, verificacion, longitud_verificacion: int) -> bool:
+        rc = self.dll.MC_verifyFeaturesEx(
+            self.contexto, longitud_registro, registro, longitud_verificacion, verificacion,
+            0, None, None, None, self._ref_far, self._ref_decision
+        )
+        return rc == 0 and self._decision.value == 1
+
+    def cerrar(self):
+        if self.contexto and self.contexto.value:
+            self.dll.MC_closeContext(self.contexto)
+            self.contexto = FT_HANDLE(0)
+            self.dll.MC_terminate()
+
+
+class VistaGaleria:
+    """Posiciones de la galería tal como las ve un motor durante una búsqueda (bajo el candado de la galería)."""
+    __slots__ = ("socios", "desplazamientos", "longitudes", "punteros", "nombre_memoria")
+
+    def __init__(self, socios, desplazamientos, longitudes, punteros, nombre_memoria):
+        self.socios = socios                    # socio_id por posición (None = lápida)
+        self.desplazamientos = desplazamientos  # Inicio de cada plantilla dentro del búfer
+        self.longitudes = longitudes
+        self.punteros = punteros                # Punteros FT_BYTE válidos en este proceso
+        self.nombre_memoria = nombre_memoria    # Memoria compartida con el búfer (None si no es compartida)
+
+    def __len__(self):
+        return len(self.socios)
+
+
+class GaleriaHuellas:
+    def __init__(self, comparador=None, motor=None):
+        """
+        comparador: se usa en la búsqueda secuencial (sin motor).
+        motor: MotorHilos o MotorProcesos; cada uno crea sus propios comparadores.
+        """
+        self.comparador = comparador
+        self.motor = motor
+        self._compartida = bool(motor is not None and motor.requiere_memoria_compartida)
+        self._candado = threading.Lock()
+        self._bufer = (FT_BYTE * 0)()
+        self._memoria = None
+        self._usado = 0                 # Bytes ocupados al final del búfer (incluye posiciones con lápida)
+        # Posiciones de la galería (listas paralelas); socio_id None = lápida
+        self._socios = []
+        self._desplazamientos = []
+        self._longitudes = []
+        self._capacidades = []          # Bytes reservados en la posición (una actualización más chica cabe)
+        self._punteros = []
+        self._posicion_por_socio = {}
+        self._lapidas = 0
+        self._prioridad = {}            # socio_id -> puntaje (sin puntaje = 0); se conserva al recargar
+        self._profundidades = deque(maxlen=VENTANA_PROFUNDIDAD)    # Posición (desde 1) de cada acierto
+        self._aciertos = 0
+        self._fallos = 0
+        self.cargada = False
+        # Deltas de encolar() aún sin aplicar: socio_id -> plantilla (None = quitar); el último gana
+        self._pendientes = {}
+        self._candado_pendientes = threading.Lock()
+
+    def __len__(self):
+        return len(self._posicion_por_socio)
+
+    # --- CARGA ---
+
+    def cargar(self, plantillas, total_bytes: int = 0):
+        """
+        Reemplaza el contenido con 'plantillas' (iterable de (socio_id, bytes)).
+        'total_bytes' es la suma de sus tamaños, si se conoce, para reservar el búfer de una vez.
+        """
+        with self._candado:
+            memoria_anterior = self._memoria
+            self._vaciar(max(CAPACIDAD_MINIMA, int(total_bytes * CRECIMIENTO)))
+            _liberar(memoria_anterior)
+            for socio_id, plantilla in plantillas:
+                self._agregar(socio_id, plantilla)
+            if self._prioridad:
+                self._reorganizar(0)
+            # Los deltas confirmados durante la carga son tan o más nuevos que lo leído
+            self._aplicar_pendientes()
+            self.cargada = True
+
+    def _vaciar(self, capacidad: int):
+        """Reserva un búfer nuevo y vacía las posiciones (quien llama libera la memoria compartida anterior)."""
+        if self._compartida:
+            self._memoria = shared_memory.SharedMemory(create=True, size=capacidad)
+            self._bufer = (FT_BYTE * capacidad).from_buffer(self._memoria.buf)
+        else:
+            self._memoria = None
+            self._bufer = (FT_BYTE * capacidad)()
+        self._usado = 0
+        self._socios, self._desplazamientos, self._longitudes, self._capacidades, self._punteros = [], [], [], [], []
+        self._posicion_por_socio = {}
+        self._lapidas = 0
+
+    # --- DELTAS ---
+
+    def encolar(self, socio_id: int, plantilla: bytes | None):
+        """
+        Como actualizar(), pero nunca espera a una carga o búsqueda en curso: si la galería está
+        ocupada, el delta queda pendiente y lo aplica quien la tome después.
+        """
+        with self._candado_pendientes:
+            self._pendientes[socio_id] = plantilla
+        # Antes de la primera carga no se aplica: cargar() vaciaría el búfer y lo perdería
+        if self.cargada and self._candado.acquire(blocking=False):
+            try:
+                self._aplicar_pendientes()
+            finally:
+                self._candado.release()
+
+    def _aplicar_pendientes(self):
+        """Aplica los deltas encolados (con el candado de la galería tomado)."""
+        with self._candado_pendientes:
+            if not self._pendientes:
+                return
+            pendientes, self._pendientes = self._pendientes, {}
+        for socio_id, plantilla in pendientes.items():
+            self._actualizar(socio_id, plantilla)
+
+    def actualizar(self, socio_id: int, plantilla: bytes | None):
+        """Agrega o reemplaza la plantilla del socio; con None (o vacía) lo quita de la galería."""
+        with self._candado:
+            self._actualizar(socio_id, plantilla)
+
+    def _actualizar(self, socio_id: int, plantilla: bytes | None):
+        if not plantilla:
+            self._quitar(socio_id)
+            return
+        posicion = self._posicion_por_socio.get(socio_id)
+        if posicion is not None and len(plantilla) <= self._capacidades[posicion]:
+            inicio = self._desplazamientos[posicion]
+            ctypes.memmove(ctypes.addressof(self._bufer) + inicio, plantilla, len(plantilla))
+            self._longitudes[posicion] = len(plantilla)
+            return
+        self._quitar(socio_id)
+        self._agregar(socio_id, plantilla)
+
+    def quitar(self, socio_id: int):
+        with self._candado:
+            self._quitar(socio_id)
+
+    def _agregar(self, socio_id: int, plantilla: bytes):
+        longitud = len(plantilla)
+        if self._usado + longitud > len(self._bufer):
+            self._reorganizar(longitud)
+        inicio = self._usado
+        direccion = ctypes.addressof(self._bufer) + inicio
+        ctypes.memmove(direccion, plantilla, longitud)
+        self._usado += longitud
+        self._posicion_por_socio[socio_id] = len(self._socios)
+        self._socios.append(socio_id)
+        self._desplazamientos.append(inicio)
+        self._longitudes.append(longitud)
+        self._capacidades.append(longitud)
+        self._punteros.append(ctypes.cast(direccion, PUNTERO_FT_BYTE))
+
+    def _quitar(self, socio_id: int):
+        posicion = self._posicion_por_socio.pop(socio_id, None)
+        if posicion is None:
+            return
+        self._socios[posicion] = None
+        self._lapidas += 1
+        if self._lapidas > len(self._socios) * FRACCION_COMPACTAR:
+            self._reorganizar(0)
+
+    def _reorganizar(self, bytes_adicionales: int):
+        """Copia las posiciones vivas, sin huecos y en orden de prioridad, a un búfer nuevo y recalcula los punteros."""
+        vivas = [
+            (socio_id, inicio, longitud)
+            for socio_id, inicio, longitud in zip(self._socios, self._desplazamientos, self._longitudes)
+            if socio_id is not None
+        ]
+        prioridad = self._prioridad
+        if prioridad:
+            # Estable: con el mismo puntaje se conserva el orden anterior
+            vivas.sort(key=lambda viva: prioridad.get(viva[0], 0.0), reverse=True)
+        ocupado = sum(longitud for _, _, longitud in vivas) + bytes_adicionales
+        bufer_anterior, memoria_anterior = self._bufer, self._memoria
+        self._vaciar(max(CAPACIDAD_MINIMA, int(ocupado * CRECIMIENTO)))
+        for socio_id, inicio, longitud in vivas:
+            self._agregar(socio_id, ctypes.string_at(ctypes.addressof(bufer_anterior) + inicio, longitud))
+        del bufer_anterior  # La memoria compartida no se puede cerrar mientras el arreglo la use
+        _liberar(memoria_anterior)
+
+    # --- ORDEN DE BÚSQUEDA ---
+
+    def priorizar(self, prioridades: dict[int, float]):
+        """Reemplaza los puntajes (socio_id -> puntaje) y reordena la galería de mayor a menor."""
+        with self._candado:
+            self._aplicar_pendientes()
+            self._prioridad = dict(prioridades)
+            if self._socios:
+                self._reorganizar(0)
+
+    # --- IDENTIFICACIÓN ---
+
+    def identificar(self, plantilla_verificacion: bytes, cancelado: threading.Event | None = None) -> int | None:
+        """
+        Devuelve el ID del primer socio (en orden de prioridad) cuya plantilla coincide con la capturada, o None.
+        Lanza BusquedaCancelada si 'cancelado' se señala antes de terminar.
+        """
+        with self._candado:
+            self._aplicar_pendientes()
+            if self.motor is not None:
+                # El candado se conserva hasta que el motor termina: ningún delta mueve el búfer mientras se lee
+                posicion = self.motor.buscar(self._vista(), plantilla_verificacion, cancelado)
+            else:
+                posicion = self._buscar(plantilla_verificacion, cancelado)
+            if cancelado is not None and cancelado.is_set():
+                raise BusquedaCancelada()
+            if posicion is None:
+                self._fallos += 1
+                return None
+            self._aciertos += 1
+            self._profundidades.append(posicion + 1)
+            return self._socios[posicion]
+
+    def _buscar(self, plantilla_verificacion: bytes, cancelado: threading.Event | None) -> int | None:
+        longitud_verificacion = len(plantilla_verificacion)
+        verificacion = (FT_BYTE * longitud_verificacion).from_buffer_copy(plantilla_verificacion)
+        puntero_verificacion = ctypes.cast(verificacion, PUNTERO_FT_BYTE)
+        comparar = self.comparador.comparar
+        for posicion, (socio_id, puntero, longitud) in enumerate(zip(self._socios, self._punteros, self._longitudes)):
+            if cancelado is not None and cancelado.is_set():
+                return None
+            if socio_id is not None and comparar(puntero, longitud, puntero_verificacion, longitud_verificacion):
+                return posicion
+        return None
+
+    def _vista(self) -> VistaGaleria:
+        return VistaGaleria(
+            self._socios, self._desplazamientos, self._longitudes, self._punteros,
+            self._memoria.name if self._memoria is not None else None,
+        )
+
+    def estadisticas(self) -> dict:
+        """
+        Tamaño de la galería y profundidad de los últimos aciertos: posición (desde 1) en la que se
+        encontró al socio, su media, mediana y percentil 90, y la media como fracción de la galería.
+        """
+        with self._candado:
+            profundidades = sorted(self._profundidades)
+            estadisticas = {
+                "plantillas": len(self._posicion_por_socio),
+                "lapidas": self._lapidas,
+                "bytes_usados": self._usado,
+                "bytes_reservados": len(self._bufer),
+                "socios_priorizados": len(self._prioridad),
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+            }
+        if profundidades:
+            media = sum(profundidades) / len(profundidades)
+            estadisticas.update({
+                "profundidad_media": round(media, 1),
+                "profundidad_p50": profundidades[len(profundidades) // 2],
+                "profundidad_p90": profundidades[int(len(profundidades) * 0.9)],
+                "fraccion_media": round(media / max(1, estadisticas["plantillas"]), 4),
+            })
+        return estadisticas
+
+    def cerrar(self):
+        """Libera el comparador, el motor y la memoria compartida (al cerrar la aplicación)."""
+        with self._candado:
+            cerrar = getattr(self.comparador, "cerrar", None)
+            if cerrar:
+                cerrar()
+            if self.motor is not None:
+                self.motor.cerrar()
+            memoria = self._memoria
+            self._compartida = False
+            self._vaciar(0)
+            _liberar(memoria)
+
+
+def _liberar(memoria):
+    """Cierra y elimina un bloque de memoria compartida que la galería ya no usa."""
+    if memoria is not None:
+        memoria.close()
+        memoria.unlink()
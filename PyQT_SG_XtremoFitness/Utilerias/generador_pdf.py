@@ -47,8 +47,11 @@ def generar_voucher_socio(socio: SocioModel, membresia: MembresiaModel, ruta_sal
         c.drawString(0.5 * inch, y_pos, "Detalles de la Membresía:")
 
         c.setFont("Helvetica", 9)
-        c.drawString(0.7 * inch, y_pos - 0.25 * inch, f"Plan Contratado: {membresia.plan.nombre}")
-        c.drawString(0.7 * inch, y_pos - 0.45 * inch, f"Precio: ${membresia.plan.precio:,.2f} MXN")
+        # Plan y precio tal como se cobraron (libro de Pagos), no los valores actuales del plan
+        pago = membresia.pago
+        plan_nombre, precio = (pago.plan_nombre, pago.monto) if pago else (membresia.plan.nombre, membresia.plan.precio)
+        c.drawString(0.7 * inch, y_pos - 0.25 * inch, f"Plan Contratado: {plan_nombre}")
+        c.drawString(0.7 * inch, y_pos - 0.45 * inch, f"Precio: ${precio:,.2f} MXN")
         c.drawString(0.7 * inch, y_pos - 0.65 * inch, f"Fecha de Inicio: {membresia.fecha_inicio.strftime('%d / %b / %Y')}")
         c.drawString(0.7 * inch, y_pos - 0.85 * inch, f"Fecha de Vencimiento: {membresia.fecha_fin.strftime('%d / %b / %Y')}")
 
@@ -1,4 +1,6 @@
 import os
+import re
+import unicodedata
 
 def crear_carpeta_si_no_existe(ruta, nombre_carpeta):
     ruta_completa = os.path.join(ruta, nombre_carpeta)
@@ -6,4 +8,12 @@ def crear_carpeta_si_no_existe(ruta, nombre_carpeta):
         os.makedirs(ruta_completa)
         return True, f"Se ha creado la carpeta '{nombre_carpeta}'"
     else:
-        return False, f"La carpeta '{nombre_carpeta}' ya existe"
\ No newline at end of file
+        return False, f"La carpeta '{nombre_carpeta}' ya existe"
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normaliza un texto para búsquedas: minúsculas, sin acentos (José -> jose)
+    y sin signos de puntuación. Los espacios múltiples se reducen a uno.
+    """
+    sin_acentos = unicodedata.normalize("NFKD", texto or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", sin_acentos.lower()).split())
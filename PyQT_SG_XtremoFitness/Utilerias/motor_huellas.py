@@ -0,0 +1,298 @@
+"""
+Motores de identificación 1-a-N en paralelo para GaleriaHuellas.
+
+La galería se reparte entre los trabajadores de forma intercalada (el trabajador k revisa las
+posiciones k, k + n, k + 2n, ...), así cada uno recorre las plantillas en el orden de prioridad
+de la galería, y cada parte se recorre en un hilo (MotorHilos) o en un proceso (MotorProcesos). La primera coincidencia activa una señal
+de cancelación que los demás trabajadores revisan entre comparaciones, así que dejan de comparar
+casi de inmediato. La búsqueda termina cuando todos se detuvieron: hasta entonces la galería
+conserva su candado y ningún delta puede mover el búfer que están leyendo. La señal 'detener'
+que recibe buscar() (la identificación ya no le interesa a nadie) los detiene igual.
+
+  - MotorHilos: las llamadas ctypes a dpHMatch.dll sueltan el GIL mientras comparan, de modo que
+    los hilos sí comparan en paralelo. Cada hilo usa su propio comparador (y contexto MC).
+  - MotorProcesos: cada proceso carga su comparador una vez y lee las plantillas directamente de
+    la memoria compartida de la galería. Sirve para comparadores que no sueltan el GIL
+    (p. ej. ComparadorReferencia sin NumPy).
+Con menos de MIN_PLANTILLAS_PARALELO plantillas la búsqueda se hace en el hilo que llama:
+repartir cuesta más que comparar.
+
+ComparadorReferencia es un comparador en Python/NumPy que no necesita el SDK de DigitalPersona,
+para construir, probar y medir el motor en cualquier sistema.
+"""
+import ctypes
+import os
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    NUMPY_DISPONIBLE = False
+
+from Utilerias.galeria_huellas import FT_BYTE, PUNTERO_FT_BYTE
+
+# Por debajo de este número de plantillas no conviene repartir la búsqueda
+MIN_PLANTILLAS_PARALELO = 256
+# Comparaciones entre revisiones de la señal de cancelación en los procesos (revisarla cuesta un candado)
+COMPARACIONES_POR_REVISION = 16
+# Segundos entre revisiones de 'detener' mientras se espera a los procesos
+INTERVALO_REVISION_DETENER = 0.02
+# Fracción de bytes iguales a partir de la cual ComparadorReferencia declara coincidencia
+UMBRAL_REFERENCIA = 0.9
+
+MOTOR_SECUENCIAL = "secuencial"
+MOTOR_HILOS = "hilos"
+MOTOR_PROCESOS = "procesos"
+
+
+class ComparadorReferencia:
+    """
+    Comparador de referencia: coinciden dos plantillas de igual longitud cuando al menos
+    'umbral' de sus bytes son iguales. Misma interfaz que ComparadorDpHMatch (punteros FT_BYTE).
+    Con NumPy compara sobre la memoria de la galería sin copiarla.
+    """
+
+    def __init__(self, umbral: float = UMBRAL_REFERENCIA):
+        self.umbral = umbral
+
+    def comparar(self, registro, longitud_registro: int, verificacion, longitud_verificacion: int) -> bool:
+        if longitud_registro != longitud_verificacion or longitud_registro == 0:
+            return False
+        if NUMPY_DISPONIBLE:
+            a = np.ctypeslib.as_array(registro, shape=(longitud_registro,))
+            b = np.ctypeslib.as_array(verificacion, shape=(longitud_verificacion,))
+            iguales = int(np.count_nonzero(a == b))
+        else:
+            a = ctypes.string_at(registro, longitud_registro)
+            b = ctypes.string_at(verificacion, longitud_verificacion)
+            iguales = sum(x == y for x, y in zip(a, b))
+        return iguales >= self.umbral * longitud_registro
+
+    def cerrar(self):
+        pass
+
+
+def _particiones(total: int, partes: int) -> list[tuple[int, int]]:
+    """(inicio, paso) de cada parte: la parte k revisa las posiciones k, k + paso, k + 2 * paso, ..."""
+    partes = max(1, min(partes, total))
+    return [(inicio, partes) for inicio in range(partes)]
+
+
+def _buscar_en_rango(comparar, socios, punteros, longitudes, inicio: int, paso: int,
+                     verificacion, longitud_verificacion: int, cancelado, cada: int = 1, detener=None) -> int | None:
+    """
+    Recorre las posiciones inicio, inicio + paso, ... hasta el final; devuelve la posición del primer
+    socio que coincide, o None si se canceló o no hubo. 'cancelado' lo señala el primero que
+    encuentra; 'detener' (opcional) viene de fuera y sólo se lee.
+    """
+    for revisadas, posicion in enumerate(range(inicio, len(socios), paso)):
+        if revisadas % cada == 0 and (cancelado.is_set() or (detener is not None and detener.is_set())):
+            return None
+        if socios[posicion] is not None and comparar(punteros[posicion], longitudes[posicion], verificacion, longitud_verificacion):
+            cancelado.set()
+            return posicion
+    return None
+
+
+def _plantilla_verificacion(plantilla: bytes):
+    """Copia la plantilla capturada a un arreglo FT_BYTE; devuelve (arreglo, puntero). El arreglo debe seguir vivo."""
+    arreglo = (FT_BYTE * len(plantilla)).from_buffer_copy(plantilla)
+    return arreglo, ctypes.cast(arreglo, PUNTERO_FT_BYTE)
+
+
+class _MotorParalelo:
+    requiere_memoria_compartida = False
+
+    def __init__(self, fabrica_comparador, trabajadores: int | None = None,
+                 minimo_paralelo: int = MIN_PLANTILLAS_PARALELO):
+        self.fabrica_comparador = fabrica_comparador
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.minimo_paralelo = minimo_paralelo
+        self._comparador_local = None   # Para las búsquedas pequeñas, en el hilo que llama
+        self._candado = threading.Lock()
+        self.busquedas = 0
+        self.busquedas_paralelas = 0
+
+    def buscar(self, vista, plantilla: bytes, detener: threading.Event | None = None) -> int | None:
+        """
+        Busca 'plantilla' en la vista de la galería (llamado por GaleriaHuellas.identificar).
+        Devuelve la posición que coincide; si coinciden varias, la de menor posición que se haya visto.
+        Si 'detener' se señala, los trabajadores paran y devuelve None.
+        """
+        with self._candado:
+            self.busquedas += 1
+            if len(vista) < self.minimo_paralelo or self.trabajadores == 1:
+                return self._buscar_secuencial(vista, plantilla, detener)
+            self.busquedas_paralelas += 1
+            # 'arreglo' sigue vivo hasta el final: los hilos leen la plantilla a través de 'verificacion'
+            arreglo, verificacion = _plantilla_verificacion(plantilla)
+            futuros = self._repartir(vista, plantilla, verificacion, _particiones(len(vista), self.trabajadores), detener)
+            encontrado = None
+            pendientes = set(futuros)
+            espera = INTERVALO_REVISION_DETENER if detener is not None and self.requiere_memoria_compartida else None
+            while pendientes and encontrado is None:
+                terminados, pendientes = wait(pendientes, timeout=espera, return_when=FIRST_COMPLETED)
+                if detener is not None and detener.is_set():
+                    self._propagar_detener()
+                for futuro in terminados:
+                    resultado = futuro.result()
+                    if resultado is not None and (encontrado is None or resultado < encontrado):
+                        encontrado = resultado
+            # Los que siguen corriendo ya vieron (o verán enseguida) la cancelación
+            wait(pendientes)
+            return encontrado
+
+    def _buscar_secuencial(self, vista, plantilla: bytes, detener) -> int | None:
+        if self._comparador_local is None:
+            self._comparador_local = self.fabrica_comparador()
+        arreglo, verificacion = _plantilla_verificacion(plantilla)
+        return _buscar_en_rango(
+            self._comparador_local.comparar, vista.socios, vista.punteros, vista.longitudes,
+            0, 1, verificacion, len(plantilla), threading.Event(), detener=detener
+        )
+
+    def _repartir(self, vista, plantilla: bytes, verificacion, partes, detener) -> list:
+        """Envía al pool la búsqueda de cada parte (inicio, paso) y devuelve los futuros; cada uno da una posición o None."""
+        raise NotImplementedError
+
+    def _propagar_detener(self):
+        """Hace llegar 'detener' a trabajadores que no lo pueden leer directamente (otros procesos)."""
+
+    def estadisticas(self) -> dict:
+        return {
+            "motor": type(self).__name__,
+            "trabajadores": self.trabajadores,
+            "busquedas": self.busquedas,
+            "busquedas_paralelas": self.busquedas_paralelas,
+        }
+
+    def cerrar(self):
+        if self._comparador_local is not None:
+            self._comparador_local.cerrar()
+            self._comparador_local = None
+
+
+class MotorHilos(_MotorParalelo):
+    """Reparte la búsqueda en un pool de hilos que leen directamente el búfer de la galería."""
+
+    def __init__(self, fabrica_comparador, trabajadores: int | None = None,
+                 minimo_paralelo: int = MIN_PLANTILLAS_PARALELO):
+        super().__init__(fabrica_comparador, trabajadores, minimo_paralelo)
+        self._pool = ThreadPoolExecutor(max_workers=self.trabajadores, thread_name_prefix="MotorHuellas")
+        self._por_hilo = threading.local()
+        self._comparadores = []         # Todos los comparadores creados, para cerrarlos al final
+
+    def _comparador_del_hilo(self):
+        comparador = getattr(self._por_hilo, "comparador", None)
+        if comparador is None:
+            comparador = self._por_hilo.comparador = self.fabrica_comparador()
+            self._comparadores.append(comparador)
+        return comparador
+
+    def _buscar_particion(self, vista, inicio, paso, verificacion, longitud_verificacion, cancelado, detener):
+        return _buscar_en_rango(
+            self._comparador_del_hilo().comparar, vista.socios, vista.punteros, vista.longitudes,
+            inicio, paso, verificacion, longitud_verificacion, cancelado, detener=detener
+        )
+
+    def _repartir(self, vista, plantilla: bytes, verificacion, partes, detener) -> list:
+        cancelado = threading.Event()
+        return [
+            self._pool.submit(self._buscar_particion, vista, inicio, paso, verificacion, len(plantilla), cancelado, detener)
+            for inicio, paso in partes
+        ]
+
+    def cerrar(self):
+        self._pool.shutdown(wait=True)
+        for comparador in self._comparadores:
+            comparador.cerrar()
+        self._comparadores = []
+        super().cerrar()
+
+
+# --- Estado de cada proceso del pool de MotorProcesos ---
+_comparador_proceso = None
+_cancelado_proceso = None
+_memoria_proceso = None     # (nombre, SharedMemory, arreglo FT_BYTE sobre ella)
+
+
+def _inicializar_proceso(fabrica_comparador, cancelado):
+    global _comparador_proceso, _cancelado_proceso
+    _comparador_proceso = fabrica_comparador()
+    _cancelado_proceso = cancelado
+
+
+def _direccion_memoria(nombre: str) -> int:
+    """Dirección local del búfer compartido 'nombre'; se abre una vez y se cambia cuando la galería se reorganiza."""
+    global _memoria_proceso
+    if _memoria_proceso is None or _memoria_proceso[0] != nombre:
+        if _memoria_proceso is not None:
+            _, memoria_anterior, arreglo_anterior = _memoria_proceso
+            _memoria_proceso = None
+            del arreglo_anterior
+            memoria_anterior.close()
+        memoria = shared_memory.SharedMemory(name=nombre)
+        _memoria_proceso = (nombre, memoria, (FT_BYTE * memoria.size).from_buffer(memoria.buf))
+    return ctypes.addressof(_memoria_proceso[2])
+
+
+def _buscar_particion_en_proceso(nombre_memoria: str, socios, desplazamientos, longitudes, plantilla: bytes,
+                                 inicio: int, paso: int) -> int | None:
+    """Busca en la parte (inicio, paso) de la galería, recibida ya recortada; devuelve la posición en la galería."""
+    base = _direccion_memoria(nombre_memoria)
+    punteros = [ctypes.cast(base + desplazamiento, PUNTERO_FT_BYTE) for desplazamiento in desplazamientos]
+    arreglo, verificacion = _plantilla_verificacion(plantilla)
+    posicion = _buscar_en_rango(
+        _comparador_proceso.comparar, socios, punteros, longitudes, 0, 1,
+        verificacion, len(plantilla), _cancelado_proceso, COMPARACIONES_POR_REVISION
+    )
+    return None if posicion is None else inicio + posicion * paso
+
+
+class MotorProcesos(_MotorParalelo):
+    """Reparte la búsqueda en un pool de procesos que leen la memoria compartida de la galería."""
+    requiere_memoria_compartida = True
+
+    def __init__(self, fabrica_comparador, trabajadores: int | None = None,
+                 minimo_paralelo: int = MIN_PLANTILLAS_PARALELO):
+        super().__init__(fabrica_comparador, trabajadores, minimo_paralelo)
+        contexto = multiprocessing.get_context()
+        self._cancelado = contexto.Event()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.trabajadores, mp_context=contexto,
+            initializer=_inicializar_proceso, initargs=(fabrica_comparador, self._cancelado),
+        )
+
+    def _repartir(self, vista, plantilla: bytes, verificacion, partes, detener) -> list:
+        # Nadie más usa la señal: buscar() espera a que terminen todos antes de la siguiente búsqueda
+        self._cancelado.clear()
+        return [
+            self._pool.submit(
+                _buscar_particion_en_proceso, vista.nombre_memoria, vista.socios[inicio::paso],
+                vista.desplazamientos[inicio::paso], vista.longitudes[inicio::paso], plantilla, inicio, paso
+            )
+            for inicio, paso in partes
+        ]
+
+    def _propagar_detener(self):
+        # Los procesos sólo ven su señal compartida; buscar() la revisa cada INTERVALO_REVISION_DETENER
+        self._cancelado.set()
+
+    def cerrar(self):
+        self._pool.shutdown(wait=True)
+        super().cerrar()
+
+
+def crear_motor(tipo: str, fabrica_comparador, trabajadores: int | None = None):
+    """MotorHilos, MotorProcesos o None (búsqueda secuencial en la galería) según 'tipo'."""
+    if tipo == MOTOR_HILOS:
+        return MotorHilos(fabrica_comparador, trabajadores)
+    if tipo == MOTOR_PROCESOS:
+        return MotorProcesos(fabrica_comparador, trabajadores)
+    if tipo == MOTOR_SECUENCIAL:
+        return None
+    raise ValueError(f"Motor de identificación desconocido: {tipo}")
@@ -0,0 +1,139 @@
+"""
+Verifica con EXPLAIN QUERY PLAN que las consultas calientes de ServiciosSocio, ServiciosMembresia y
+ServiciosPlan usan los índices de bd/migraciones.py.
+
+Sobre una base sintética (Utilerias/bench_datos.py, con ANALYZE) ejecuta cada operación del
+servicio tal cual, captura las SELECT que emite y pide su plan a SQLite. Cada caso indica los
+índices que deben aparecer en alguno de esos planes y las tablas que no deben recorrerse
+completas ("SCAN Membresias" sin índice). Termina con código 1 si algún caso falla, así sirve
+como prueba después de cambiar consultas, cargas (aplicacion/cargas.py) o índices.
+
+Uso:
+    python -m Utilerias.verificar_planes_consulta                # 20 000 socios
+    python -m Utilerias.verificar_planes_consulta --socios 100000 --detalle
+"""
+import os
+import re
+import sys
+import tempfile
+
+from sqlalchemy import event, text
+
+from Utilerias.bench_datos import crear_base_sintetica
+from aplicacion.cache import cache_socios
+from aplicacion.serviciosMembresia import ESTATUS_VENCIDOS, ServiciosMembresia
+from aplicacion.serviciosPlan import ServiciosPlan
+from aplicacion.serviciosSocio import ServiciosSocio
+
+# "SCAN Tabla" sin "USING ... INDEX": recorrido completo de la tabla
+_RECORRIDO_COMPLETO = re.compile(r"\bSCAN (\w+)(?! USING)")
+
+
+class CapturaSelects:
+    """Junta las SELECT (con sus parámetros) que se ejecutan en el engine mientras está activa."""
+
+    def __init__(self, engine_destino):
+        self.engine = engine_destino
+        self.sentencias = []
+
+    def _antes_de_ejecutar(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() == "SELECT" and not executemany:
+            self.sentencias.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._antes_de_ejecutar)
+        return self
+
+    def __exit__(self, *errores):
+        event.remove(self.engine, "before_cursor_execute", self._antes_de_ejecutar)
+
+
+def planes_de(engine_destino, sentencias) -> list[tuple[str, list[str]]]:
+    """(sentencia, líneas del plan) de cada SELECT capturada."""
+    resultado = []
+    with engine_destino.connect() as conexion:
+        for sentencia, parametros in sentencias:
+            filas = conexion.exec_driver_sql(f"EXPLAIN QUERY PLAN {sentencia}", parametros).all()
+            resultado.append((sentencia, [fila[-1] for fila in filas]))
+    return resultado
+
+
+def casos(engine_destino):
+    """(nombre, operación, índices esperados, tablas que no deben recorrerse completas)."""
+    socios = ServiciosSocio()
+    membresias = ServiciosMembresia()
+    planes = ServiciosPlan()
+    for servicio in (socios, membresias, planes):
+        servicio.engine = engine_destino
+
+    with engine_destino.connect() as conexion:
+        socio_medio = conexion.execute(text("SELECT ID FROM Socios ORDER BY ID LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM Socios)")).scalar()
+        vencido = conexion.execute(text(
+            "SELECT Socio_ID FROM Membresias_Vigentes WHERE Fecha_Fin < date('now') ORDER BY Socio_ID LIMIT 1"
+        )).scalar()
+        nombre_medio = conexion.execute(text("SELECT Nombre, Apellido_Paterno, ID FROM Socios WHERE ID = :id"), {"id": socio_medio}).one()
+        conexion.execute(text("INSERT INTO Planes (Nombre, Precio, Duracion_Dias) VALUES ('Plan sin uso', 1, 1)"))
+        plan_sin_uso = conexion.execute(text("SELECT ID FROM Planes WHERE Nombre = 'Plan sin uso'")).scalar()
+        conexion.commit()
+
+    def detalle():
+        cache_socios.invalidar(socio_medio)
+        socios.obtener_socio_por_id(socio_medio)
+
+    return [
+        ("ServiciosSocio.obtener_pagina_socios (por nombre, página intermedia)",
+         lambda: socios.obtener_pagina_socios(tuple(nombre_medio), 100, orden="nombre"),
+         ["IX_Socios_Nombre"], ["Membresias", "Membresias_Vigentes", "Planes"]),
+        ("ServiciosSocio.obtener_pagina_socios (vencidos, por ID)",
+         lambda: socios.obtener_pagina_socios((socio_medio,), 100, estatus=ESTATUS_VENCIDOS),
+         [], ["Membresias", "Membresias_Vigentes", "Planes"]),
+        ("ServiciosSocio.obtener_socio_por_id (ficha con membresía vigente)",
+         detalle, [], ["Socios", "Membresias", "Membresias_Vigentes", "Pagos"]),
+        ("ServiciosMembresia.obtener_membresia_vigente",
+         lambda: membresias.obtener_membresia_vigente(socio_medio), [], ["Membresias", "Membresias_Vigentes"]),
+        ("ServiciosSocio.eliminar (historial del socio)",
+         lambda: socios.eliminar(vencido), ["IX_Membresias_Socio_Fecha_Fin"], ["Membresias"]),
+        ("ServiciosPlan.eliminar (membresías del plan)",
+         lambda: planes.eliminar(plan_sin_uso), ["IX_Membresias_Plan_ID"], ["Membresias"]),
+    ]
+
+
+def verificar(engine_destino, detalle: bool = False) -> bool:
+    todo_bien = True
+    for nombre, operacion, indices, sin_recorrer in casos(engine_destino):
+        with CapturaSelects(engine_destino) as captura:
+            operacion()
+        planes = planes_de(engine_destino, captura.sentencias)
+        texto_planes = "\n".join(linea for _, lineas in planes for linea in lineas)
+        faltantes = [indice for indice in indices if indice not in texto_planes]
+        recorridas = sorted({tabla for tabla in _RECORRIDO_COMPLETO.findall(texto_planes) if tabla in sin_recorrer})
+        ok = bool(planes) and not faltantes and not recorridas
+        todo_bien &= ok
+        problemas = []
+        if not planes:
+            problemas.append("no emitió ninguna SELECT")
+        if faltantes:
+            problemas.append(f"no usa {', '.join(faltantes)}")
+        if recorridas:
+            problemas.append(f"recorre completas {', '.join(recorridas)}")
+        print(f"{'OK   ' if ok else 'FALLA'} {nombre}" + (f": {'; '.join(problemas)}" if problemas else ""))
+        if detalle or not ok:
+            for sentencia, lineas in planes:
+                print(f"        {' '.join(sentencia.split())[:160]}")
+                for linea in lineas:
+                    print(f"          {linea}")
+    return todo_bien
+
+
+def main(argv: list[str]) -> int:
+    socios = int(argv[argv.index("--socios") + 1]) if "--socios" in argv else 20000
+    with tempfile.TemporaryDirectory() as carpeta:
+        engine_prueba = crear_base_sintetica(os.path.join(carpeta, "planes.sqlite"), socios=socios)
+        try:
+            return 0 if verificar(engine_prueba, "--detalle" in argv) else 1
+        finally:
+            engine_prueba.dispose()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,124 @@
+"""
+Caché en memoria para lecturas frecuentes de la capa de servicios.
+
+CacheLRU guarda hasta 'capacidad' entradas; al llenarse descarta la menos usada, y cada
+entrada caduca a los 'ttl_segundos' aunque nadie la invalide (por si otro proceso, como
+una importación o la consola de migraciones, cambió la base).
+Los servicios que escriben deben invalidar las claves que tocan después del commit.
+
+Una carga (obtener_o_cargar) que empezó antes de una invalidación puede traer el valor viejo:
+cada clave lleva un número de generación que invalidar() incrementa (y limpiar() uno global), y
+la carga sólo se guarda si ninguno cambió mientras corría. Las generaciones sólo se anotan mientras
+hay cargas en curso y se olvidan cuando terminan todas, así no crecen con las claves invalidadas.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# Valor centinela para distinguir "no está en caché" de un valor guardado como None
+_AUSENTE = object()
+
+
+class CacheLRU:
+    def __init__(self, capacidad: int = 256, ttl_segundos: float = 60.0):
+        if capacidad <= 0:
+            raise ValueError("La capacidad de la caché debe ser mayor que cero.")
+        self.capacidad = capacidad
+        self.ttl_segundos = ttl_segundos
+        self._entradas = OrderedDict()  # clave -> (momento_de_caducidad, valor)
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.cargas_descartadas = 0
+        # clave -> generación, sólo de las claves invalidadas con alguna carga en curso
+        self._generaciones = {}
+        self._limpiezas = 0
+        self._cargas_en_curso = 0
+
+    def obtener(self, clave, predeterminado=None):
+        """Devuelve el valor guardado o 'predeterminado' si no existe o ya caducó."""
+        with self._candado:
+            entrada = self._entradas.get(clave, _AUSENTE)
+            if entrada is not _AUSENTE:
+                caduca, valor = entrada
+                if caduca > time.monotonic():
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[clave]
+            self.fallos += 1
+            return predeterminado
+
+    def guardar(self, clave, valor):
+        with self._candado:
+            self._guardar(clave, valor)
+
+    def _guardar(self, clave, valor):
+        self._entradas[clave] = (time.monotonic() + self.ttl_segundos, valor)
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+
+    def obtener_o_cargar(self, clave, cargar):
+        """
+        Lectura a través de la caché: si la clave no está, llama a cargar() y guarda el resultado.
+        Los resultados None no se guardan (un socio inexistente se vuelve a consultar), ni los de
+        una carga durante la cual se invalidó la clave.
+        """
+        valor = self.obtener(clave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+        marca = self.iniciar_carga(clave)
+        valor = _AUSENTE
+        try:
+            valor = cargar()
+        finally:
+            self.terminar_carga(clave, marca, valor)
+        return valor
+
+    def iniciar_carga(self, clave) -> tuple[int, int]:
+        """Marca de generación para terminar_carga(); para quien carga por su cuenta (servicios async)."""
+        with self._candado:
+            self._cargas_en_curso += 1
+            return self._generaciones.get(clave, 0), self._limpiezas
+
+    def terminar_carga(self, clave, marca: tuple[int, int], valor):
+        """Guarda 'valor' si no es None y la clave no se invalidó desde iniciar_carga()."""
+        with self._candado:
+            self._cargas_en_curso -= 1
+            if valor is not _AUSENTE and valor is not None:
+                if marca == (self._generaciones.get(clave, 0), self._limpiezas):
+                    self._guardar(clave, valor)
+                else:
+                    self.cargas_descartadas += 1
+            if not self._cargas_en_curso:
+                self._generaciones.clear()
+
+    def invalidar(self, clave):
+        with self._candado:
+            self._entradas.pop(clave, None)
+            if self._cargas_en_curso:
+                self._generaciones[clave] = self._generaciones.get(clave, 0) + 1
+
+    def limpiar(self):
+        with self._candado:
+            self._entradas.clear()
+            self._limpiezas += 1
+
+    def estadisticas(self) -> dict:
+        """Aciertos, fallos, tasa de aciertos, cargas descartadas por invalidación y entradas actuales."""
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "cargas_descartadas": self.cargas_descartadas,
+                "entradas": len(self._entradas),
+                "capacidad": self.capacidad,
+            }
+
+
+# Caché compartida de socios (socio + membresía vigente + plan) indexada por ID de socio.
+# La comparten ServiciosSocio, ServiciosMembresia y ServiciosPlan para poder invalidarla.
+cache_socios = CacheLRU(capacidad=512, ttl_segundos=60.0)
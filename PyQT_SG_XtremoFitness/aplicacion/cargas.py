@@ -0,0 +1,37 @@
+"""
+Estrategias de carga de SocioModel por caso de uso.
+
+Cada consulta de socios pide uno de estos conjuntos en .options(*CARGA_...) en lugar de armar
+sus propios joinedload, así queda explícito qué columnas y relaciones viajan en cada pantalla:
+  - la membresía vigente se carga con selectinload (una SELECT aparte, "WHERE Socio_ID IN (...)"
+    resuelta por llave primaria). Con joinedload, SQLite materializa el join anidado
+    (Membresias_Vigentes JOIN Membresias) recorriendo la tabla completa en cada consulta,
+    incluso cuando sólo se pide un socio;
+  - el historial (SocioModel.membresias) y la vigencia quedan en raiseload: si una pantalla
+    los recorre por error, falla de inmediato en lugar de lanzar una consulta por socio;
+  - los BLOBs (foto, QR, huella) sólo se piden donde se muestran.
+"""
+from sqlalchemy.orm import joinedload, raiseload, selectinload, undefer, undefer_group
+
+from dominio.modelos import SocioModel, MembresiaModel
+
+_MEMBRESIA_VIGENTE = selectinload(SocioModel.membresia_actual).options(
+    joinedload(MembresiaModel.plan), joinedload(MembresiaModel.pago)
+)
+_SIN_HISTORIAL = (raiseload(SocioModel.membresias), raiseload(SocioModel.vigencia))
+
+# Listados: nombres y membresía vigente con su plan y pago; sin BLOBs ni historial.
+CARGA_LISTADO = (_MEMBRESIA_VIGENTE, *_SIN_HISTORIAL)
+
+# Ficha del socio (panel de Socios, Accesos, caché de socios): además foto, QR y huella.
+CARGA_DETALLE = (undefer_group("binarios"), _MEMBRESIA_VIGENTE, *_SIN_HISTORIAL)
+
+# Resultados de búsqueda: se muestran en la credencial, que necesita foto y QR pero no la huella.
+CARGA_CREDENCIAL = (undefer(SocioModel.foto_ruta), undefer(SocioModel.qr_code), _MEMBRESIA_VIGENTE, *_SIN_HISTORIAL)
+
+# Identificación por huella en Accesos: sólo la plantilla para comparar, sin ninguna relación.
+# El socio identificado se pide después con CARGA_DETALLE (vía la caché).
+CARGA_ACCESO = (undefer(SocioModel.huella_template), raiseload("*"))
+
+# Membresía recién creada o renovada (comprobante de pago): plan, pago y socio sin BLOBs.
+CARGA_MEMBRESIA = (joinedload(MembresiaModel.plan), joinedload(MembresiaModel.pago), joinedload(MembresiaModel.socio))
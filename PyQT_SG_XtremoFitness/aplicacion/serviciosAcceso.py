@@ -0,0 +1,232 @@
+"""
+Bitácora de accesos (tabla Accesos) y consultas sobre ella.
+
+El formulario de Accesos registra cada decisión con ServiciosAcceso.registrar_acceso, que sólo
+encola el evento: un hilo escritor (EscritorAccesos) los inserta por lotes cada
+TAMANO_LOTE_ACCESOS eventos o cada INTERVALO_ESCRITURA_MS milisegundos, lo que ocurra primero.
+Así el camino escaneo -> decisión nunca espera a SQLite. Si la base no responde, los eventos
+esperan en memoria (hasta MAX_ACCESOS_PENDIENTES) y se reintentan con espera creciente (del
+intervalo de escritura hasta REINTENTO_MAX_SEGUNDOS); el error se imprime una vez por racha.
+"""
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from bd.conexion import engine
+from dominio.modelos import AccesoModel, SocioModel
+from config import ID_KIOSCO
+
+# Métodos de identificación
+METODO_QR = 1
+METODO_HUELLA = 2
+
+# Resultado de la decisión en el kiosco
+RESULTADO_PERMITIDO = 1
+RESULTADO_SIN_MEMBRESIA = 2     # Socio identificado, pero sin membresía activa hoy
+RESULTADO_NO_ENCONTRADO = 3     # QR de un socio inexistente o huella sin coincidencia
+
+TAMANO_LOTE_ACCESOS = 100
+INTERVALO_ESCRITURA_MS = 500
+MAX_ACCESOS_PENDIENTES = 10000
+REINTENTO_MAX_SEGUNDOS = 30     # Espera máxima entre reintentos mientras la base no responda
+
+
+class EscritorAccesos(threading.Thread):
+    """Hilo que vacía la cola de accesos en la base con un INSERT por lote."""
+
+    def __init__(self, engine_destino=engine, tamano_lote: int = TAMANO_LOTE_ACCESOS,
+                 intervalo_ms: int = INTERVALO_ESCRITURA_MS, max_pendientes: int = MAX_ACCESOS_PENDIENTES):
+        super().__init__(name="EscritorAccesos", daemon=True)
+        self.engine = engine_destino
+        self.tamano_lote = tamano_lote
+        self.intervalo_segundos = intervalo_ms / 1000
+        self.max_pendientes = max_pendientes
+        self._cola = queue.Queue(maxsize=max_pendientes)
+        self._detener = threading.Event()
+        self.escritos = 0
+        self.descartados = 0
+        self.fallos_seguidos = 0    # Intentos fallidos desde la última escritura correcta
+
+    def encolar(self, fila: dict):
+        """No bloquea nunca: si la cola está llena (base caída mucho tiempo) el evento se descarta."""
+        try:
+            self._cola.put_nowait(fila)
+        except queue.Full:
+            self.descartados += 1
+
+    def run(self):
+        lote = []
+        while True:
+            if not lote:
+                # Espera el primer evento del lote sin consumir CPU mientras el gimnasio está vacío
+                try:
+                    fila = self._cola.get(timeout=1.0)
+                except queue.Empty:
+                    if self._detener.is_set():
+                        break
+                    continue
+                if fila is not None:
+                    lote.append(fila)
+            # Junta más eventos hasta llenar el lote o agotar el intervalo
+            fin_del_lote = time.monotonic() + self.intervalo_segundos
+            while len(lote) < self.tamano_lote and not self._detener.is_set():
+                restante = fin_del_lote - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    fila = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if fila is not None:
+                    lote.append(fila)
+            if self._detener.is_set():
+                lote.extend(self._vaciar_cola())
+            lote = self._escribir(lote)
+            if self._detener.is_set() and (lote or self._cola.empty()):
+                break
+            if lote:
+                # La base sigue fallando: esperar antes de reintentar (detener() corta la espera)
+                self._detener.wait(self._espera_reintento())
+        if lote:
+            print(f"Se perdieron {len(lote)} registros de acceso al cerrar (la base no estaba disponible)")
+
+    def _vaciar_cola(self) -> list[dict]:
+        filas = []
+        while True:
+            try:
+                fila = self._cola.get_nowait()
+            except queue.Empty:
+                return filas
+            if fila is not None:
+                filas.append(fila)
+
+    def _espera_reintento(self) -> float:
+        """Segundos antes del siguiente intento: el intervalo de escritura, duplicándose hasta REINTENTO_MAX_SEGUNDOS."""
+        return min(REINTENTO_MAX_SEGUNDOS, self.intervalo_segundos * 2 ** min(self.fallos_seguidos - 1, 16))
+
+    def _escribir(self, lote: list[dict]) -> list[dict]:
+        """Inserta el lote; devuelve lo que quedó sin escribir (vacío si todo salió bien)."""
+        if not lote:
+            return lote
+        try:
+            # INSERT ORM por lotes: un solo executemany con las llaves por nombre de atributo
+            with Session(self.engine) as session, session.begin():
+                session.execute(insert(AccesoModel), lote)
+            self.escritos += len(lote)
+            if self.fallos_seguidos:
+                print(f"Bitácora de accesos guardada de nuevo tras {self.fallos_seguidos} intentos fallidos")
+                self.fallos_seguidos = 0
+            return []
+        except IntegrityError as e:
+            # Datos inválidos: reintentar no lo arreglaría
+            print(f"Se descartan {len(lote)} registros de acceso inválidos: {e}")
+            self.descartados += len(lote)
+            return []
+        except Exception as e:
+            if not self.fallos_seguidos:
+                print(f"Error al guardar {len(lote)} registros de acceso (se reintentará): {e}")
+            self.fallos_seguidos += 1
+            # No crecer sin límite mientras la base siga sin responder
+            sobrantes = len(lote) - self.max_pendientes
+            if sobrantes > 0:
+                self.descartados += sobrantes
+                lote = lote[sobrantes:]
+            return lote
+
+    def detener(self, espera_segundos: float = 5.0):
+        """Escribe lo pendiente y termina el hilo (se llama al cerrar la aplicación)."""
+        self._detener.set()
+        try:
+            self._cola.put_nowait(None)  # Despierta al hilo si está esperando
+        except queue.Full:
+            pass
+        if self.is_alive():
+            self.join(espera_segundos)
+
+
+_escritor = None
+_candado_escritor = threading.Lock()
+
+
+def obtener_escritor_accesos() -> EscritorAccesos:
+    """Escritor compartido; se inicia en el primer registro y se detiene (vaciando la cola) al salir."""
+    global _escritor
+    with _candado_escritor:
+        if _escritor is None:
+            _escritor = EscritorAccesos()
+            _escritor.start()
+            atexit.register(_escritor.detener)
+        return _escritor
+
+
+class ServiciosAcceso:
+    def __init__(self):
+        self.engine = engine
+
+    def registrar_acceso(self, socio_id: int | None, metodo: int, resultado: int, kiosco: int = ID_KIOSCO):
+        """Encola el evento en la bitácora; regresa de inmediato (la escritura es en segundo plano)."""
+        obtener_escritor_accesos().encolar({
+            "socio_id": socio_id,
+            "marca_tiempo": int(time.time()),
+            "metodo": metodo,
+            "resultado": resultado,
+            "kiosco": kiosco,
+        })
+
+    def obtener_accesos(self, desde: datetime, hasta: datetime, solo_permitidos: bool = True) -> list:
+        """
+        Accesos entre 'desde' y 'hasta' (hora local), del más antiguo al más reciente.
+        Cada fila trae socio_id, nombre, apellido_paterno, fecha_hora, metodo, resultado y kiosco.
+        Ej. quién entró entre las 17:00 y las 19:00 de hoy.
+        """
+        consulta = (
+            select(
+                AccesoModel.socio_id, SocioModel.nombre, SocioModel.apellido_paterno,
+                AccesoModel.marca_tiempo, AccesoModel.metodo, AccesoModel.resultado, AccesoModel.kiosco,
+            )
+            .outerjoin(SocioModel, SocioModel.id == AccesoModel.socio_id)
+            .where(AccesoModel.marca_tiempo.between(int(desde.timestamp()), int(hasta.timestamp())))
+            .order_by(AccesoModel.marca_tiempo)
+        )
+        if solo_permitidos:
+            consulta = consulta.where(AccesoModel.resultado == RESULTADO_PERMITIDO)
+        with self.engine.connect() as conexion:
+            return [
+                {
+                    "socio_id": socio_id, "nombre": nombre, "apellido_paterno": apellido_paterno,
+                    "fecha_hora": datetime.fromtimestamp(marca_tiempo), "metodo": metodo,
+                    "resultado": resultado, "kiosco": kiosco,
+                }
+                for socio_id, nombre, apellido_paterno, marca_tiempo, metodo, resultado, kiosco
+                in conexion.execute(consulta)
+            ]
+
+    def detectar_credenciales_compartidas(self, desde: datetime, hasta: datetime,
+                                          ventana_minutos: int = 30) -> dict[int, int]:
+        """
+        Socios con dos o más accesos permitidos separados por menos de 'ventana_minutos'
+        (alguien más entrando con su QR o su credencial). Devuelve {socio_id: repeticiones}.
+        """
+        consulta = text("""
+            SELECT Socio_ID, COUNT(*) FROM (
+                SELECT Socio_ID, Marca_Tiempo,
+                       LAG(Marca_Tiempo) OVER (PARTITION BY Socio_ID ORDER BY Marca_Tiempo) AS Anterior
+                FROM Accesos
+                WHERE Resultado = :permitido AND Marca_Tiempo BETWEEN :desde AND :hasta
+            )
+            WHERE Marca_Tiempo - Anterior < :ventana
+            GROUP BY Socio_ID
+            ORDER BY COUNT(*) DESC
+        """)
+        with self.engine.connect() as conexion:
+            return dict(conexion.execute(consulta, {
+                "permitido": RESULTADO_PERMITIDO,
+                "desde": int(desde.timestamp()), "hasta": int(hasta.timestamp()),
+                "ventana": ventana_minutos * 60,
+            }).all())
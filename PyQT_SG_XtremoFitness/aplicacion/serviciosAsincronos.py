@@ -0,0 +1,298 @@
+"""
+Versiones asyncio de ServiciosSocio, ServiciosPlan y ServiciosMembresia.
+
+Pensadas para procesos sin interfaz (demonio de accesos, endpoints de red) que atienden muchas
+consultas concurrentes en un solo hilo. Usan el engine async de bd.conexion (aiosqlite) y
+reutilizan la lógica de los servicios síncronos:
+  - las consultas se construyen con los mismos métodos (_consulta_pagina_socios, condicion_estatus);
+  - las escrituras corren las mismas funciones de sesión vía AsyncSession.run_sync
+    (_registrar_en_sesion, _modificar_en_sesion, _eliminar_en_sesion, _agregar_socio_en_sesion,
+    _crear_membresia), así que vigencias, contadores e índice de búsqueda se mantienen igual que
+    desde el escritorio;
+  - el trabajo de CPU (generar el QR del alta) corre en un hilo con asyncio.to_thread, no en el bucle;
+  - la validación usa aplicacion.validaciones, igual que el formulario y la importación;
+  - comparten la caché de socios, el catálogo de planes y la galería de huellas con los servicios síncronos.
+Requiere aiosqlite (y greenlet, que SQLAlchemy usa para su capa async): requirements-async.txt.
+"""
+import asyncio
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import NoResultFound
+
+from dominio.modelos import PlanModel, SocioModel, MembresiaModel, MembresiaVigenteModel
+from dominio.lecturas import FilaSocio
+from bd.conexion import obtener_engine_async
+from bd import busqueda
+from aplicacion import validaciones
+from aplicacion.cache import cache_socios
+from aplicacion.cargas import CARGA_LISTADO, CARGA_DETALLE, CARGA_CREDENCIAL, CARGA_MEMBRESIA
+from aplicacion.serviciosMembresia import ServiciosMembresia
+from aplicacion.serviciosPlan import _catalogo
+from aplicacion.serviciosSocio import ServiciosSocio, _actualizar_galeria
+from Utilerias.util_qr import generar_qr_como_bytes
+
+
+class _BaseAsync:
+    def __init__(self):
+        self.engine = obtener_engine_async()
+        # Sin expirar al confirmar: en async no hay carga perezosa, los objetos deben quedar completos
+        self._sesiones = async_sessionmaker(self.engine, expire_on_commit=False)
+
+
+class ServiciosPlanAsync(_BaseAsync):
+    async def _asegurar_catalogo(self):
+        if not _catalogo.cargado:
+            async with self.engine.connect() as conexion:
+                await conexion.run_sync(_catalogo.asegurar_cargado)
+
+    async def obtener_planes(self) -> List[PlanModel]:
+        await self._asegurar_catalogo()
+        return list(_catalogo.por_id.values())
+
+    async def obtener_plan_por_id(self, plan_id: int) -> Optional[PlanModel]:
+        await self._asegurar_catalogo()
+        return _catalogo.por_id.get(plan_id)
+
+    async def obtener_plan_por_nombre(self, nombre: str) -> Optional[PlanModel]:
+        await self._asegurar_catalogo()
+        return _catalogo.por_nombre.get(nombre)
+
+    def version_catalogo(self) -> int:
+        return _catalogo.version
+
+    async def registrar(self, nombre: str, precio: float, duracion_dias: int) -> PlanModel:
+        async with self._sesiones() as session:
+            plan = PlanModel(nombre=nombre, precio=precio, duracion_dias=duracion_dias)
+            session.add(plan)
+            await session.commit()
+        _catalogo.invalidar()
+        return plan
+
+    async def modificar(self, plan_id: int, nombre: str, precio: float, duracion_dias: int) -> bool:
+        async with self._sesiones() as session:
+            plan = await session.get(PlanModel, plan_id)
+            if plan is None:
+                return False
+            plan.nombre = nombre
+            plan.precio = precio
+            plan.duracion_dias = duracion_dias
+            await session.commit()
+        _catalogo.invalidar()
+        cache_socios.limpiar()
+        return True
+
+    async def eliminar(self, plan_id: int) -> bool:
+        async with self._sesiones() as session:
+            try:
+                plan = await session.get(PlanModel, plan_id)
+                if plan is None:
+                    return False
+                await session.delete(plan)
+                await session.commit()
+            except Exception as e:
+                await session.rollback(); print(f"Error al eliminar plan: {e}"); return False
+        _catalogo.invalidar()
+        cache_socios.limpiar()
+        return True
+
+
+class ServiciosMembresiaAsync(_BaseAsync):
+    def __init__(self):
+        super().__init__()
+        self._sincrono = ServiciosMembresia()
+
+    async def renovar_membresia(self, socio_id: int, plan_id: int) -> MembresiaModel:
+        """Crea una nueva membresía a partir de hoy; devuelve la membresía con plan y socio cargados."""
+        async with self._sesiones() as session:
+            try:
+                if await session.get(SocioModel, socio_id) is None:
+                    raise ValueError("El socio seleccionado ya no existe.")
+                plan_obj = (await session.execute(select(PlanModel).filter_by(id=plan_id))).scalar_one()
+                nueva_membresia = await session.run_sync(
+                    self._sincrono._crear_membresia, socio_id, plan_obj, date.today()
+                )
+                await session.commit()
+            except ValueError:
+                await session.rollback()
+                raise
+            except Exception as e:
+                await session.rollback()
+                raise Exception(f"Error al renovar la membresía: {e}")
+            cache_socios.invalidar(socio_id)
+
+            return (await session.execute(
+                select(MembresiaModel).options(*CARGA_MEMBRESIA).filter_by(id=nueva_membresia.id).execution_options(populate_existing=True)
+            )).scalar_one()
+
+    async def obtener_membresia_vigente(self, socio_id: int) -> Optional[MembresiaModel]:
+        async with self._sesiones() as session:
+            return (await session.execute(
+                select(MembresiaModel).join(
+                    MembresiaVigenteModel, MembresiaVigenteModel.membresia_id == MembresiaModel.id
+                ).options(joinedload(MembresiaModel.plan)).where(MembresiaVigenteModel.socio_id == socio_id)
+            )).scalar_one_or_none()
+
+    def calcular_estatus_membresia(self, fecha_fin: date) -> str:
+        return self._sincrono.calcular_estatus_membresia(fecha_fin)
+
+
+class ServiciosSocioAsync(_BaseAsync):
+    def __init__(self):
+        super().__init__()
+        self._sincrono = ServiciosSocio()
+        self._planes = ServiciosPlanAsync()
+
+    async def obtener_socio_por_id(self, socio_id: int) -> Optional[SocioModel]:
+        """Socio con membresía vigente, plan, foto, QR y huella; pasa por la misma caché que la versión síncrona."""
+        socio = cache_socios.obtener(socio_id)
+        if socio is not None:
+            return socio
+        marca = cache_socios.iniciar_carga(socio_id)
+        try:
+            async with self._sesiones() as session:
+                socio = (await session.execute(
+                    select(SocioModel).options(*CARGA_DETALLE).where(SocioModel.id == socio_id)
+                )).scalar_one_or_none()
+        finally:
+            cache_socios.terminar_carga(socio_id, marca, socio)
+        return socio
+
+    async def obtener_pagina_socios(self, cursor: tuple | None = None, tamano: int = 100,
+                                    estatus: str | None = None, orden: str = "id") -> tuple[List[FilaSocio], tuple | None]:
+        """Igual que ServiciosSocio.obtener_pagina_socios (paginación por llave, filas FilaSocio)."""
+        consulta, claves = self._sincrono._consulta_pagina_socios(cursor, tamano, estatus, orden)
+        async with self.engine.connect() as conexion:
+            filas = (await conexion.execute(consulta)).all()
+        return self._sincrono._armar_pagina_socios(filas, tamano, claves)
+
+    async def obtener_socios(self) -> List[SocioModel]:
+        """Todos los socios con su membresía vigente y plan (CARGA_LISTADO, sin BLOBs)."""
+        async with self._sesiones() as session:
+            return list((await session.execute(select(SocioModel).options(*CARGA_LISTADO))).scalars().all())
+
+    async def buscar_ids_por_nombre(self, texto_busqueda: str, limite: int = 20) -> List[int]:
+        async with self.engine.connect() as conexion:
+            return await conexion.run_sync(busqueda.buscar_ids, texto_busqueda, limite)
+
+    async def buscar_por_nombre_aproximado(self, texto_busqueda: str) -> List[SocioModel]:
+        ids = await self.buscar_ids_por_nombre(texto_busqueda)
+        if not ids:
+            return []
+        async with self._sesiones() as session:
+            socios = (await session.execute(
+                select(SocioModel).options(*CARGA_CREDENCIAL).where(SocioModel.id.in_(ids))
+            )).scalars().all()
+        posicion = {socio_id: i for i, socio_id in enumerate(ids)}
+        return sorted(socios, key=lambda socio: posicion[socio.id])
+
+    async def registrar(self, nombre: str, apellido_paterno: str, apellido_materno: str | None) -> SocioModel:
+        """Registra un socio sin membresía; valida los datos como registrar_socio_con_membresia."""
+        es_valido, mensaje = validaciones.validar_datos_socio(nombre, apellido_paterno, apellido_materno or "")
+        if not es_valido:
+            raise ValueError(mensaje)
+        async with self._sesiones() as session:
+            try:
+                socio = await session.run_sync(self._sincrono._registrar_en_sesion, nombre, apellido_paterno, apellido_materno)
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                raise ValueError("Ya existe un socio con estos datos")
+            except Exception as e:
+                await session.rollback()
+                raise Exception(f"Error interno al registrar socio: {e}")
+        cache_socios.invalidar(socio.id)
+        return socio
+
+    async def modificar(self, socio_id: int, nombre: str, apellido_paterno: str, apellido_materno: str | None,
+                        foto_bytes: bytes | None = None, huella_template: bytes | None = None) -> bool:
+        """Igual que ServiciosSocio.modificar (b'' quita la foto o la huella), validando los datos."""
+        es_valido, mensaje = validaciones.validar_datos_socio(nombre, apellido_paterno, apellido_materno or "")
+        if not es_valido:
+            raise ValueError(mensaje)
+        async with self._sesiones() as session:
+            try:
+                await session.run_sync(self._sincrono._modificar_en_sesion, socio_id, nombre, apellido_paterno,
+                                       apellido_materno, foto_bytes, huella_template)
+                await session.commit()
+            except NoResultFound:
+                await session.rollback()
+                raise ValueError(f"No se encontró ningún socio con ID {socio_id}")
+            except IntegrityError:
+                await session.rollback()
+                raise ValueError("Violación de integridad (posible duplicado de datos o huella)")
+            except Exception as e:
+                await session.rollback()
+                raise Exception(f"Error interno al modificar socio: {e}")
+        cache_socios.invalidar(socio_id)
+        if huella_template is not None:
+            _actualizar_galeria(socio_id, huella_template)
+        return True
+
+    async def eliminar(self, socio_id: int) -> bool:
+        """Igual que ServiciosSocio.eliminar: no elimina socios con membresía activa (ValueError)."""
+        async with self._sesiones() as session:
+            try:
+                await session.run_sync(self._sincrono._eliminar_en_sesion, socio_id)
+                await session.commit()
+            except NoResultFound:
+                await session.rollback()
+                raise ValueError(f"No se encontró ningún socio con ID {socio_id}")
+            except ValueError:
+                await session.rollback()
+                raise
+            except IntegrityError as e:
+                await session.rollback()
+                if "FOREIGN KEY constraint failed" in str(e):
+                    raise ValueError("No se puede eliminar el socio porque tiene registros asociados (posiblemente pagos o accesos).")
+                raise ValueError("Error de integridad al intentar eliminar el socio.")
+            except Exception as e:
+                await session.rollback()
+                raise Exception(f"Error interno al eliminar socio: {e}")
+        cache_socios.invalidar(socio_id)
+        _actualizar_galeria(socio_id, None)
+        return True
+
+    async def registrar_socio_con_membresia(self, nombre: str, apellido_paterno: str, apellido_materno: str | None,
+                                            plan_id: int, fecha_inicio: date,
+                                            foto_bytes: bytes | None = None, huella_template: bytes | None = None) -> SocioModel:
+        """
+        Registra un socio y su primera membresía en una transacción.
+        A diferencia de la versión síncrona (que confía en el formulario), aquí se validan los datos:
+        lanza ValueError con el mismo mensaje que mostraría el formulario.
+        """
+        es_valido, mensaje = validaciones.validar_datos_socio(nombre, apellido_paterno, apellido_materno or "")
+        if not es_valido:
+            raise ValueError(mensaje)
+        plan_obj = await self._planes.obtener_plan_por_id(plan_id)
+        es_valido, mensaje = validaciones.validar_plan(plan_obj.nombre if plan_obj else str(plan_id), plan_obj)
+        if not es_valido:
+            raise ValueError(mensaje)
+        if fecha_inicio < date.today():
+            raise ValueError("La fecha de inicio no puede ser anterior a hoy")
+
+        async with self._sesiones() as session:
+            try:
+                # Mismos pasos que _registrar_socio_en_sesion; el QR (unos ms de CPU) se genera en un hilo
+                nuevo_socio = await session.run_sync(
+                    self._sincrono._agregar_socio_en_sesion,
+                    nombre, apellido_paterno, apellido_materno, foto_bytes, huella_template
+                )
+                qr_bytes = await asyncio.to_thread(generar_qr_como_bytes, f"socio_id:{nuevo_socio.id}")
+                await session.run_sync(
+                    self._sincrono._completar_registro_en_sesion, nuevo_socio, qr_bytes, plan_obj, fecha_inicio
+                )
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                raise ValueError("Ya existe un socio con estos datos")
+            except Exception as e:
+                await session.rollback()
+                raise Exception(f"Error interno al registrar socio con membresía: {e}")
+        cache_socios.invalidar(nuevo_socio.id)
+        if huella_template:
+            _actualizar_galeria(nuevo_socio.id, huella_template)
+        return await self.obtener_socio_por_id(nuevo_socio.id)
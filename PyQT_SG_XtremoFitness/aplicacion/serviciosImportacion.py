@@ -0,0 +1,317 @@
+"""
+Importación masiva de socios desde un archivo CSV o XLSX.
+
+El archivo se lee fila por fila (no se carga completo en memoria) y se procesa en lotes:
+  1. Cada fila se valida con las mismas reglas del formulario de socios (aplicacion.validaciones).
+  2. Las fotos de las filas válidas se recortan en paralelo en un pool de procesos.
+  3. El lote se inserta en una sola transacción con INSERT por lotes (executemany; socios,
+     membresías, vigencias e índice de búsqueda). Los QR, que dependen del ID asignado, se generan
+     en el pool mientras tanto y se guardan al final de la misma transacción.
+Si un lote falla al guardarse, se reintenta fila por fila para que sólo queden fuera las filas con
+problemas. Todas las filas rechazadas quedan en el reporte de errores con su número de fila.
+
+La importación trae socios de otro sistema, así que a propósito difiere del alta en el formulario:
+  - la fecha de inicio puede ser anterior a hoy (el formulario la rechaza): la membresía conserva
+    sus fechas reales y el socio queda activo, por vencer o vencido según su fecha de fin;
+  - las membresías no registran pago (cobrar=False): se cobraron en el sistema anterior y no son
+    ingresos de hoy. Sólo se actualizan las vigencias y la foto de estatus del tablero.
+
+Columnas reconocidas (sin importar mayúsculas, acentos o espacios en el encabezado):
+    nombre, apellido_paterno, apellido_materno (opcional), plan,
+    fecha_inicio (opcional, AAAA-MM-DD o DD/MM/AAAA; por defecto hoy),
+    foto (opcional, ruta de la imagen, relativa a la carpeta del archivo)
+Para archivos .xlsx se necesita openpyxl instalado.
+
+Uso desde consola:
+    python -m aplicacion.serviciosImportacion socios.csv [--reporte errores.csv]
+"""
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import partial
+from itertools import islice
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from dominio.modelos import SocioModel
+from bd.conexion import engine
+from bd import busqueda
+from aplicacion import validaciones
+from aplicacion.cache import cache_socios
+from aplicacion.serviciosMembresia import ServiciosMembresia
+from aplicacion.serviciosPlan import ServiciosPlan
+from Utilerias.generico import normalizar_texto
+from Utilerias.util_qr import generar_qr_como_bytes
+
+# Filas por transacción. Lotes más grandes insertan más rápido pero un error obliga a reintentar más filas.
+TAMANO_LOTE_IMPORTACION = 500
+# Máscara fija para los QR importados: evita evaluar las 8 máscaras por código (la parte más lenta)
+MASCARA_QR_IMPORTACION = 0
+
+COLUMNAS_OBLIGATORIAS = ("nombre", "apellido_paterno", "plan")
+# Otros encabezados aceptados -> nombre de columna interno
+ALIAS_COLUMNAS = {"membresia": "plan", "fecha": "fecha_inicio", "foto_ruta": "foto"}
+
+
+class ResultadoImportacion:
+    """Conteo de filas importadas y lista de errores (numero_fila, mensaje) de una importación."""
+
+    def __init__(self):
+        self.importados = 0
+        self.errores: list[tuple[int, str]] = []
+        self.segundos = 0.0
+
+    @property
+    def procesadas(self) -> int:
+        return self.importados + len(self.errores)
+
+    def resumen(self) -> str:
+        velocidad = self.importados / self.segundos if self.segundos else 0
+        return (f"{self.importados} socios importados, {len(self.errores)} filas con error "
+                f"en {self.segundos:.1f} s ({velocidad:,.0f} socios/s)")
+
+    def guardar_reporte(self, ruta_reporte: str):
+        """Escribe el reporte de errores en CSV (columnas Fila, Error)."""
+        with open(ruta_reporte, "w", newline="", encoding="utf-8-sig") as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(["Fila", "Error"])
+            escritor.writerows(sorted(self.errores))
+
+
+# --- LECTURA DEL ARCHIVO ---
+
+def _nombre_columna(encabezado) -> str:
+    columna = normalizar_texto(str(encabezado or "")).replace(" ", "_")
+    return ALIAS_COLUMNAS.get(columna, columna)
+
+
+def _mapear_encabezados(encabezados) -> list[str]:
+    columnas = [_nombre_columna(encabezado) for encabezado in encabezados]
+    faltantes = [columna for columna in COLUMNAS_OBLIGATORIAS if columna not in columnas]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias en el archivo: {', '.join(faltantes)}")
+    return columnas
+
+
+def leer_filas(ruta_archivo: str):
+    """Genera tuplas (numero_fila, {columna: valor}); la fila 1 es el encabezado."""
+    extension = os.path.splitext(ruta_archivo)[1].lower()
+    if extension == ".csv":
+        yield from _leer_csv(ruta_archivo)
+    elif extension in (".xlsx", ".xlsm"):
+        yield from _leer_xlsx(ruta_archivo)
+    else:
+        raise ValueError(f"Formato de archivo no soportado: '{extension}'. Use .csv o .xlsx")
+
+
+def _leer_csv(ruta_archivo: str):
+    with open(ruta_archivo, newline="", encoding="utf-8-sig") as archivo:
+        lector = csv.reader(archivo)
+        columnas = _mapear_encabezados(next(lector, []))
+        for numero_fila, valores in enumerate(lector, start=2):
+            if any(valor.strip() for valor in valores):
+                yield numero_fila, dict(zip(columnas, valores))
+
+
+def _leer_xlsx(ruta_archivo: str):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Para importar archivos .xlsx instale openpyxl (pip install openpyxl).")
+    libro = load_workbook(ruta_archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        columnas = _mapear_encabezados(next(filas, ()))
+        for numero_fila, valores in enumerate(filas, start=2):
+            if any(valor not in (None, "") for valor in valores):
+                yield numero_fila, dict(zip(columnas, valores))
+    finally:
+        libro.close()
+
+
+def _texto(valor) -> str:
+    return "" if valor is None else str(valor).strip()
+
+
+def _fecha(valor) -> date:
+    """Convierte la celda de fecha de inicio; vacía equivale a hoy. Se aceptan fechas pasadas (ver arriba)."""
+    if valor in (None, ""):
+        return date.today()
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto_fecha = _texto(valor)
+    for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(texto_fecha, formato).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Fecha de inicio inválida: '{texto_fecha}' (use AAAA-MM-DD o DD/MM/AAAA)")
+
+
+# Función de nivel de módulo para que el pool de procesos pueda serializarla
+_generar_qr = partial(generar_qr_como_bytes, mask_pattern=MASCARA_QR_IMPORTACION)
+
+
+# --- SERVICIO ---
+
+class ServiciosImportacion:
+    def __init__(self):
+        self.engine = engine
+        self.servicio_planes = ServiciosPlan()
+        self.servicio_membresia = ServiciosMembresia()
+
+    def importar(self, ruta_archivo: str, tamano_lote: int = TAMANO_LOTE_IMPORTACION,
+                 procesos: int | None = None, al_avanzar=None) -> ResultadoImportacion:
+        """
+        Importa los socios del archivo y devuelve el resultado con el reporte de errores.
+          - procesos: tamaño del pool para fotos y QR (por defecto, uno por núcleo).
+          - al_avanzar: función opcional que recibe el ResultadoImportacion después de cada lote.
+        Lanza ValueError si el archivo no se puede leer (formato, columnas faltantes).
+        """
+        resultado = ResultadoImportacion()
+        inicio = time.perf_counter()
+        carpeta_archivo = os.path.dirname(os.path.abspath(ruta_archivo))
+        filas = leer_filas(ruta_archivo)
+
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            while True:
+                lote = list(islice(filas, tamano_lote))
+                if not lote:
+                    break
+                validas = self._validar_lote(lote, carpeta_archivo, resultado)
+                validas = self._procesar_fotos(pool, validas, resultado)
+                self._guardar(pool, validas, resultado)
+                if al_avanzar:
+                    al_avanzar(resultado)
+
+        resultado.segundos = time.perf_counter() - inicio
+        return resultado
+
+    def _validar_lote(self, lote, carpeta_archivo: str, resultado: ResultadoImportacion) -> list[dict]:
+        validas = []
+        for numero_fila, datos in lote:
+            nombre = _texto(datos.get("nombre"))
+            apellido_paterno = _texto(datos.get("apellido_paterno"))
+            apellido_materno = _texto(datos.get("apellido_materno"))
+            plan_nombre = _texto(datos.get("plan"))
+
+            es_valido, mensaje = validaciones.validar_datos_socio(nombre, apellido_paterno, apellido_materno)
+            if es_valido:
+                plan_obj = self.servicio_planes.obtener_plan_por_nombre(plan_nombre) if plan_nombre else None
+                es_valido, mensaje = validaciones.validar_plan(plan_nombre, plan_obj)
+            if not es_valido:
+                resultado.errores.append((numero_fila, mensaje))
+                continue
+            try:
+                fecha_inicio = _fecha(datos.get("fecha_inicio"))
+            except ValueError as e:
+                resultado.errores.append((numero_fila, str(e)))
+                continue
+
+            ruta_foto = _texto(datos.get("foto"))
+            validas.append({
+                "fila": numero_fila,
+                "nombre": nombre,
+                "apellido_paterno": apellido_paterno,
+                "apellido_materno": apellido_materno or None,
+                "plan": plan_obj,
+                "fecha_inicio": fecha_inicio,
+                "ruta_foto": os.path.join(carpeta_archivo, ruta_foto) if ruta_foto else None,
+                "foto": None,
+            })
+        return validas
+
+    def _procesar_fotos(self, pool, filas: list[dict], resultado: ResultadoImportacion) -> list[dict]:
+        """Recorta/redimensiona las fotos en el pool; las filas cuya foto falla se reportan y se descartan."""
+        con_foto = [fila for fila in filas if fila["ruta_foto"]]
+        if not con_foto:
+            return filas
+        from Utilerias.util_imagenes import procesar_imagen_para_perfil
+        futuros = [(fila, pool.submit(procesar_imagen_para_perfil, fila["ruta_foto"])) for fila in con_foto]
+        fallidas = set()
+        for fila, futuro in futuros:
+            try:
+                fila["foto"] = futuro.result()
+            except Exception as e:
+                resultado.errores.append((fila["fila"], f"No se pudo procesar la foto '{fila['ruta_foto']}': {e}"))
+                fallidas.add(fila["fila"])
+        return [fila for fila in filas if fila["fila"] not in fallidas]
+
+    def _guardar(self, pool, filas: list[dict], resultado: ResultadoImportacion):
+        if not filas:
+            return
+        try:
+            self._insertar_lote(pool, filas)
+            resultado.importados += len(filas)
+        except Exception as e:
+            if len(filas) == 1:
+                resultado.errores.append((filas[0]["fila"], f"No se pudo guardar el socio: {e}"))
+                return
+            # Reintento fila por fila para aislar a las que provocan el error
+            for fila in filas:
+                self._guardar(pool, [fila], resultado)
+
+    def _insertar_lote(self, pool, filas: list[dict]):
+        """
+        Inserta el lote en una transacción con INSERT por lotes (executemany), sin objetos ORM en
+        la sesión: socios, membresías y vigencias, índice de búsqueda y, al final, los QR.
+        """
+        with Session(self.engine) as session:
+            ids = session.execute(
+                insert(SocioModel).returning(SocioModel.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "nombre": fila["nombre"],
+                        "apellido_paterno": fila["apellido_paterno"],
+                        "apellido_materno": fila["apellido_materno"],
+                        "foto_ruta": fila["foto"],
+                    }
+                    for fila in filas
+                ]
+            ).scalars().all()
+
+            # Los QR dependen del ID: el pool los genera mientras se insertan las membresías y el índice
+            tamano_bloque = max(1, len(ids) // ((os.cpu_count() or 1) * 4))
+            qr_pendientes = pool.map(_generar_qr, [f"socio_id:{socio_id}" for socio_id in ids], chunksize=tamano_bloque)
+
+            # Membresías que se cobraron en el sistema anterior: no entran al libro de Pagos ni a los
+            # ingresos del tablero (si no, toda la migración contaría como ingreso de hoy)
+            self.servicio_membresia._insertar_membresias_importadas(
+                session, [(socio_id, fila["plan"], fila["fecha_inicio"]) for socio_id, fila in zip(ids, filas)]
+            )
+            busqueda.indexar_socios(
+                session.connection(),
+                [(socio_id, fila["nombre"], fila["apellido_paterno"], fila["apellido_materno"])
+                 for socio_id, fila in zip(ids, filas)]
+            )
+            session.execute(update(SocioModel), [
+                {"id": socio_id, "qr_code": qr_bytes} for socio_id, qr_bytes in zip(ids, qr_pendientes)
+            ])
+            session.commit()
+
+        # SQLite puede reutilizar IDs de socios eliminados: descartamos entradas viejas de la caché
+        for socio_id in ids:
+            cache_socios.invalidar(socio_id)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: python -m aplicacion.serviciosImportacion ARCHIVO.csv|xlsx [--reporte errores.csv]")
+        sys.exit(1)
+    from bd.migraciones import aplicar_migraciones
+    aplicar_migraciones()
+    ruta_reporte = sys.argv[sys.argv.index("--reporte") + 1] if "--reporte" in sys.argv else None
+    resultado = ServiciosImportacion().importar(
+        sys.argv[1], al_avanzar=lambda parcial: print(f"  {parcial.procesadas} filas procesadas...")
+    )
+    print(resultado.resumen())
+    if resultado.errores:
+        for numero_fila, mensaje in sorted(resultado.errores)[:20]:
+            print(f"  Fila {numero_fila}: {mensaje}")
+        if ruta_reporte:
+            resultado.guardar_reporte(ruta_reporte)
+            print(f"Reporte de errores guardado en {ruta_reporte}")
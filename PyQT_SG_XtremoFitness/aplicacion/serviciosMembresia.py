@@ -1,11 +1,23 @@
 import sqlalchemy as db
+from sqlalchemy import or_, case, func, insert, select
 from sqlalchemy.orm import Session, joinedload
-from dominio.modelos import MembresiaModel, PlanModel, SocioModel
-from datetime import date, timedelta
+from dominio.modelos import MembresiaModel, MembresiaVigenteModel, PagoModel, PlanModel, SocioModel
+from datetime import date, datetime, timedelta
 from typing import Optional
 from bd.conexion import engine
+from bd import resumenes
+from aplicacion.cache import cache_socios
+from aplicacion.cargas import CARGA_MEMBRESIA
 from dateutil.relativedelta import relativedelta
 
+# Días antes del vencimiento en que una membresía pasa a "Por Vencer"
+DIAS_POR_VENCER = 7
+
+# Filtros de estatus que entienden las consultas de listados
+ESTATUS_ACTIVOS = "activos"
+ESTATUS_POR_VENCER = "por_vencer"   # Incluye "Vence Hoy"
+ESTATUS_VENCIDOS = "vencidos"       # Incluye socios sin membresía (Inactivo)
+GRUPOS_ESTATUS = (ESTATUS_ACTIVOS, ESTATUS_POR_VENCER, ESTATUS_VENCIDOS)
 
 class ServiciosMembresia:
     def __init__(self):
@@ -14,9 +26,15 @@ class ServiciosMembresia:
     def registrar_membresia(self, socio_id: int, plan_id: int, fecha_inicio: date, fecha_fin: date) -> Optional[MembresiaModel]:
         with Session(self.engine) as session:
             try:
+                plan_obj = session.query(PlanModel).filter_by(id=plan_id).one()
                 membresia = MembresiaModel(socio_id=socio_id, plan_id=plan_id, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
                 session.add(membresia)
+                session.flush()
+                self._registrar_pagos(session, [(membresia, plan_obj)])
+                anteriores = self._actualizar_vigentes(session, [membresia])
+                self._actualizar_resumenes(session, [membresia], anteriores)
                 session.commit()
+                cache_socios.invalidar(socio_id)
                 return membresia
             except Exception as e:
                 session.rollback()
@@ -27,28 +45,168 @@ class ServiciosMembresia:
         """Crea una nueva membresía para un socio existente (renovación)."""
         with Session(self.engine) as session:
             try:
+                if session.get(SocioModel, socio_id) is None:
+                    raise ValueError("El socio seleccionado ya no existe.")
                 plan_obj = session.query(PlanModel).filter_by(id=plan_id).one()
-                fecha_inicio = date.today()
-                fecha_fin = self._calcular_fecha_fin(fecha_inicio, plan_obj)
-
-                nueva_membresia = MembresiaModel(socio_id=socio_id, plan_id=plan_id, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
-                session.add(nueva_membresia)
+                nueva_membresia = self._crear_membresia(session, socio_id, plan_obj, date.today())
                 session.commit()
+                cache_socios.invalidar(socio_id)
                 
                 # --- SOLUCIÓN AL ERROR 'DetachedInstanceError' ---
                 # En lugar de devolver el objeto 'nueva_membresia' que se desconectará de la sesión,
                 # lo volvemos a consultar inmediatamente, pero esta vez cargando proactivamente
                 # sus relaciones ('plan' y 'socio').
-                membresia_completa = session.query(MembresiaModel).options(
-                    joinedload(MembresiaModel.plan),
-                    joinedload(MembresiaModel.socio)
-                ).filter_by(id=nueva_membresia.id).one()
+                membresia_completa = session.query(MembresiaModel).options(*CARGA_MEMBRESIA).filter_by(id=nueva_membresia.id).one()
                 
                 return membresia_completa
+            except ValueError:
+                session.rollback()
+                raise
             except Exception as e:
                 session.rollback()
                 raise Exception(f"Error al renovar la membresía: {e}")
 
+    def obtener_membresia_vigente(self, socio_id: int) -> Optional[MembresiaModel]:
+        """Devuelve la membresía más reciente del socio leyendo una sola fila de Membresias_Vigentes."""
+        with Session(self.engine) as session:
+            return session.query(MembresiaModel).join(
+                MembresiaVigenteModel, MembresiaVigenteModel.membresia_id == MembresiaModel.id
+            ).options(joinedload(MembresiaModel.plan)).filter(
+                MembresiaVigenteModel.socio_id == socio_id
+            ).one_or_none()
+
+    def _crear_membresia(self, session: Session, socio_id: int, plan_obj: PlanModel, fecha_inicio: date) -> MembresiaModel:
+        """
+        Agrega una membresía a la sesión (sin confirmar), su pago en el libro de Pagos y actualiza
+        la membresía vigente del socio. Es el punto común para registros y renovaciones: quien la
+        llama hace el commit, así membresía y pago se guardan (o se descartan) juntos.
+        """
+        return self._crear_membresias(session, [(socio_id, plan_obj, fecha_inicio)])[0]
+
+    def _crear_membresias(self, session: Session, altas: list[tuple[int, PlanModel, date]], cobrar: bool = True) -> list[MembresiaModel]:
+        """
+        Versión por lotes de _crear_membresia; 'altas' son tuplas (socio_id, plan, fecha_inicio).
+        La usa la importación masiva para insertar cientos de membresías con un solo flush.
+        Con cobrar=False (membresías traídas de otro sistema) no se registra pago ni se suman
+        ingresos al tablero: sólo se actualizan la vigencia y la foto de estatus.
+        """
+        membresias = [
+            MembresiaModel(
+                socio_id=socio_id,
+                plan_id=plan_obj.id,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=self._calcular_fecha_fin(fecha_inicio, plan_obj)
+            )
+            for socio_id, plan_obj, fecha_inicio in altas
+        ]
+        session.add_all(membresias)
+        session.flush()  # Asigna los IDs de las membresías
+        if cobrar:
+            self._registrar_pagos(session, [(membresia, plan_obj) for membresia, (_, plan_obj, _) in zip(membresias, altas)])
+        anteriores = self._actualizar_vigentes(session, membresias)
+        self._actualizar_resumenes(session, membresias, anteriores, cobrar)
+        return membresias
+
+    def _insertar_membresias_importadas(self, session: Session, altas: list[tuple[int, PlanModel, date]]):
+        """
+        Primera membresía de socios recién insertados por la importación masiva, con un INSERT por
+        lotes (executemany, sin objetos ORM en la sesión). Para socios sin membresía previa equivale a
+        _contar_socios_nuevos + _crear_membresias(cobrar=False): Membresias, Membresias_Vigentes y la
+        foto de estatus de hoy; sin pago, porque se cobraron en el sistema anterior.
+        """
+        hoy = date.today()
+        filas = [
+            {"socio_id": socio_id, "plan_id": plan_obj.id, "fecha_inicio": fecha_inicio,
+             "fecha_fin": self._calcular_fecha_fin(fecha_inicio, plan_obj)}
+            for socio_id, plan_obj, fecha_inicio in altas
+        ]
+        ids = session.execute(
+            insert(MembresiaModel).returning(MembresiaModel.id, sort_by_parameter_order=True), filas
+        ).scalars().all()
+        session.execute(insert(MembresiaVigenteModel), [
+            {"socio_id": fila["socio_id"], "membresia_id": membresia_id, "fecha_fin": fila["fecha_fin"]}
+            for fila, membresia_id in zip(filas, ids)
+        ])
+        deltas = dict.fromkeys(GRUPOS_ESTATUS, 0)
+        for fila in filas:
+            deltas[self.grupo_estatus(fila["fecha_fin"], hoy)] += 1
+        resumenes.ajustar_estatus(session.connection(), hoy, deltas)
+
+    def _registrar_pagos(self, session: Session, cobros: list[tuple[MembresiaModel, PlanModel]]):
+        """Agrega al libro de Pagos el cobro de cada membresía con el precio y nombre vigentes del plan."""
+        ahora = datetime.now()
+        for membresia, plan_obj in cobros:
+            membresia.pago = PagoModel(
+                membresia_id=membresia.id,
+                socio_id=membresia.socio_id,
+                plan_id=plan_obj.id,
+                plan_nombre=plan_obj.nombre,
+                monto=plan_obj.precio,
+                fecha_hora=ahora,
+            )
+
+    def _actualizar_vigentes(self, session: Session, membresias: list[MembresiaModel]) -> dict[int, date | None]:
+        """
+        Apunta Membresias_Vigentes de cada socio a la membresía que vence más tarde (a igualdad, la más nueva).
+        Devuelve {socio_id: Fecha_Fin vigente antes del cambio}, con None si el socio no tenía membresía.
+        """
+        vigentes = {
+            vigente.socio_id: vigente
+            for vigente in session.query(MembresiaVigenteModel).filter(
+                MembresiaVigenteModel.socio_id.in_({membresia.socio_id for membresia in membresias})
+            )
+        }
+        anteriores = {membresia.socio_id: None for membresia in membresias}
+        anteriores.update((socio_id, vigente.fecha_fin) for socio_id, vigente in vigentes.items())
+        for membresia in membresias:
+            vigente = vigentes.get(membresia.socio_id)
+            if vigente is None:
+                vigente = MembresiaVigenteModel(socio_id=membresia.socio_id, membresia_id=membresia.id, fecha_fin=membresia.fecha_fin)
+                session.add(vigente)
+                vigentes[membresia.socio_id] = vigente
+            elif membresia.fecha_fin >= vigente.fecha_fin:
+                vigente.membresia_id = membresia.id
+                vigente.fecha_fin = membresia.fecha_fin
+        return anteriores
+
+    # --- RESÚMENES DEL TABLERO (bd/resumenes.py) ---
+
+    def _actualizar_resumenes(self, session: Session, membresias: list[MembresiaModel], anteriores: dict[int, date | None],
+                              cobrar: bool = True):
+        """
+        Suma los cobros a los resúmenes diarios y mueve a cada socio de grupo de estatus en la foto
+        de hoy. Es alta la primera membresía de un socio que no tenía ninguna; las demás, renovaciones.
+        Con cobrar=False sólo se mueve la foto de estatus (las membresías no tienen pago).
+        """
+        hoy = date.today()
+        finales = dict(anteriores)
+        cobros = []
+        for membresia in membresias:
+            es_alta = finales[membresia.socio_id] is None
+            if es_alta or membresia.fecha_fin > finales[membresia.socio_id]:
+                finales[membresia.socio_id] = membresia.fecha_fin
+            if cobrar:
+                pago = membresia.pago
+                cobros.append((pago.fecha_hora.date(), pago.plan_id, pago.plan_nombre, pago.monto, es_alta))
+        conexion = session.connection()
+        resumenes.sumar_cobros(conexion, cobros)
+        deltas = dict.fromkeys(GRUPOS_ESTATUS, 0)
+        for socio_id, anterior in anteriores.items():
+            deltas[self.grupo_estatus(anterior, hoy)] -= 1
+            deltas[self.grupo_estatus(finales[socio_id], hoy)] += 1
+        resumenes.ajustar_estatus(conexion, hoy, deltas)
+
+    def _contar_socios_nuevos(self, session: Session, cantidad: int = 1):
+        """Socios recién dados de alta: cuentan como vencidos (sin membresía) hasta que se les registre una."""
+        resumenes.ajustar_estatus(session.connection(), date.today(), {ESTATUS_VENCIDOS: cantidad})
+
+    def _descontar_socio(self, session: Session, fecha_fin: date | None):
+        """
+        Quita de la foto de estatus a un socio que se va a eliminar. Sus pagos se quedan en el libro,
+        así que los ingresos, altas y renovaciones de días pasados no cambian.
+        """
+        resumenes.ajustar_estatus(session.connection(), date.today(), {self.grupo_estatus(fecha_fin): -1})
+
     def calcular_estatus_membresia(self, fecha_fin: date) -> str:
         """
         Calcula el estatus de la membresía basado en su fecha de finalización.
@@ -60,11 +218,64 @@ class ServiciosMembresia:
             return "Vencido"
         elif dias_restantes == 0:
             return "Vence Hoy"
-        elif dias_restantes <= 7:
+        elif dias_restantes <= DIAS_POR_VENCER:
             return f"Por Vencer ({dias_restantes} días)"
         else:
             return "Activo"
 
+    def grupo_estatus(self, fecha_fin: date | None, hoy: date | None = None) -> str:
+        """Grupo de estatus de una Fecha_Fin (None = sin membresía), con las fronteras de expresion_estatus."""
+        hoy = hoy or date.today()
+        if fecha_fin is None or fecha_fin < hoy:
+            return ESTATUS_VENCIDOS
+        if fecha_fin <= hoy + timedelta(days=DIAS_POR_VENCER):
+            return ESTATUS_POR_VENCER
+        return ESTATUS_ACTIVOS
+
+    def condicion_estatus(self, estatus: str, hoy: date | None = None):
+        """
+        Devuelve la condición SQL sobre Membresias_Vigentes.Fecha_Fin equivalente a calcular_estatus_membresia.
+        La consulta debe hacer outerjoin con MembresiaVigenteModel para incluir a los socios sin membresía.
+        """
+        hoy = hoy or date.today()
+        limite_por_vencer = hoy + timedelta(days=DIAS_POR_VENCER)
+        fecha_fin = MembresiaVigenteModel.fecha_fin
+        if estatus == ESTATUS_ACTIVOS:
+            return fecha_fin > limite_por_vencer
+        if estatus == ESTATUS_POR_VENCER:
+            return fecha_fin.between(hoy, limite_por_vencer)
+        if estatus == ESTATUS_VENCIDOS:
+            return or_(fecha_fin < hoy, fecha_fin.is_(None))
+        raise ValueError(f"Estatus de filtro desconocido: {estatus}")
+
+    def expresion_estatus(self, hoy: date | None = None):
+        """
+        Columna SQL (CASE) con el grupo de estatus del socio: ESTATUS_ACTIVOS, ESTATUS_POR_VENCER o
+        ESTATUS_VENCIDOS (también para quien no tiene membresía). Usa las mismas fronteras que
+        condicion_estatus y requiere el mismo outerjoin con MembresiaVigenteModel.
+        """
+        hoy = hoy or date.today()
+        fecha_fin = MembresiaVigenteModel.fecha_fin
+        return case(
+            (fecha_fin > hoy + timedelta(days=DIAS_POR_VENCER), ESTATUS_ACTIVOS),
+            (fecha_fin >= hoy, ESTATUS_POR_VENCER),
+            else_=ESTATUS_VENCIDOS,
+        )
+
+    def contar_socios_por_estatus(self) -> dict[str, int]:
+        """Número de socios en cada grupo de estatus, calculado con un solo GROUP BY en la base."""
+        estatus = self.expresion_estatus().label("estatus")
+        consulta = (
+            select(estatus, func.count())
+            .select_from(SocioModel)
+            .outerjoin(MembresiaVigenteModel, MembresiaVigenteModel.socio_id == SocioModel.id)
+            .group_by(estatus)
+        )
+        conteos = dict.fromkeys(GRUPOS_ESTATUS, 0)
+        with self.engine.connect() as conexion:
+            conteos.update(conexion.execute(consulta).all())
+        return conteos
+
     def _calcular_fecha_fin(self, fecha_inicio: date, plan_obj: PlanModel) -> date:
         """Calcula la fecha de vencimiento basado en la duración del plan."""
         if not hasattr(plan_obj, 'duracion_dias') or plan_obj.duracion_dias <= 0:
@@ -0,0 +1,67 @@
+"""
+Consultas de ingresos sobre el libro de Pagos.
+
+Los pagos se registran en ServiciosMembresia._crear_membresias, en la misma transacción que la
+membresía. Aquí sólo se leen: todas las consultas filtran por rango de Fecha_Hora y se resuelven
+con los índices cubrientes de Pagos (Fecha_Hora, Plan_ID, Monto) y (Plan_ID, Fecha_Hora, Monto),
+sin tocar la tabla.
+"""
+from datetime import date, datetime, time
+from typing import List
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from bd.conexion import engine
+from dominio.modelos import PagoModel
+
+
+def _rango(desde: date, hasta: date) -> tuple[datetime, datetime]:
+    """Desde el inicio del día 'desde' hasta el final del día 'hasta'."""
+    return datetime.combine(desde, time.min), datetime.combine(hasta, time.max)
+
+
+class ServiciosPago:
+    def __init__(self):
+        self.engine = engine
+
+    def ingresos_por_mes(self, desde: date, hasta: date, plan_id: int | None = None) -> List[tuple[str, float, int]]:
+        """Lista de (mes 'AAAA-MM', total cobrado, número de pagos) entre las dos fechas, en orden."""
+        inicio, fin = _rango(desde, hasta)
+        mes = func.substr(PagoModel.fecha_hora, 1, 7).label("mes")
+        consulta = (
+            select(mes, func.sum(PagoModel.monto), func.count())
+            .where(PagoModel.fecha_hora.between(inicio, fin))
+            .group_by(mes)
+            .order_by(mes)
+        )
+        if plan_id is not None:
+            consulta = consulta.where(PagoModel.plan_id == plan_id)
+        with self.engine.connect() as conexion:
+            return [tuple(fila) for fila in conexion.execute(consulta)]
+
+    def ingresos_por_plan(self, desde: date, hasta: date) -> List[tuple[int, str, float, int]]:
+        """
+        Lista de (plan_id, nombre, total cobrado, número de pagos) entre las dos fechas, de mayor a menor.
+        El nombre es el último con el que se cobró el plan (puede haber cambiado desde entonces).
+        """
+        inicio, fin = _rango(desde, hasta)
+        total = func.sum(PagoModel.monto).label("total")
+        resumen = (
+            select(PagoModel.plan_id.label("plan_id"), total, func.count().label("pagos"), func.max(PagoModel.id).label("ultimo_pago"))
+            .where(PagoModel.fecha_hora.between(inicio, fin))
+            .group_by(PagoModel.plan_id)
+            .subquery()
+        )
+        consulta = (
+            select(resumen.c.plan_id, PagoModel.plan_nombre, resumen.c.total, resumen.c.pagos)
+            .join(PagoModel, PagoModel.id == resumen.c.ultimo_pago)
+            .order_by(resumen.c.total.desc())
+        )
+        with self.engine.connect() as conexion:
+            return [tuple(fila) for fila in conexion.execute(consulta)]
+
+    def obtener_pagos_socio(self, socio_id: int) -> List[PagoModel]:
+        """Pagos de un socio, del más reciente al más antiguo."""
+        with Session(self.engine) as session:
+            return session.query(PagoModel).filter(PagoModel.socio_id == socio_id).order_by(PagoModel.fecha_hora.desc()).all()
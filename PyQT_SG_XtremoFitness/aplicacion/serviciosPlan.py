@@ -1,3 +1,4 @@
+import threading
 import sqlalchemy as db
 from sqlalchemy.orm import Session
 from dominio.modelos import PlanModel
@@ -5,12 +6,56 @@ from typing import List, Optional
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 from bd.conexion import engine
+from aplicacion.cache import cache_socios
+
+
+class _CatalogoPlanes:
+    """
+    Copia en memoria de la tabla Planes, compartida por todas las instancias de ServiciosPlan.
+    Se carga completa en la primera lectura y se descarta en cada alta/cambio/baja; la versión
+    aumenta con cada cambio para que los formularios sepan si deben recargar sus combos.
+    """
+    def __init__(self):
+        self.version = 0
+        self.por_id: dict[int, PlanModel] = {}
+        self.por_nombre: dict[str, PlanModel] = {}
+        self.cargado = False
+        self.candado = threading.Lock()
+
+    def asegurar_cargado(self, engine_origen):
+        with self.candado:
+            if self.cargado:
+                return
+            with Session(engine_origen) as session:
+                planes = session.query(PlanModel).order_by(PlanModel.id).all()
+                session.expunge_all()  # Objetos desvinculados: sólo lectura
+            self.por_id = {plan.id: plan for plan in planes}
+            self.por_nombre = {plan.nombre: plan for plan in planes}
+            self.cargado = True
+
+    def invalidar(self):
+        with self.candado:
+            self.version += 1
+            self.cargado = False
+
+
+_catalogo = _CatalogoPlanes()
+
 
 class ServiciosPlan():
     
     def __init__(self):        
         self.engine = engine
 
+    # --- CATÁLOGO EN MEMORIA ---
+    def version_catalogo(self) -> int:
+        """Número que cambia cada vez que se registra, modifica o elimina un plan."""
+        return _catalogo.version
+
+    def recargar_catalogo(self):
+        """Fuerza a releer Planes en la siguiente consulta (p. ej. tras cambios hechos por otro proceso)."""
+        _catalogo.invalidar()
+
     def registrar(self, nombre: str, precio: float, duracion_dias: int) -> Optional[PlanModel]:
         with Session(self.engine) as session:
             try:
@@ -18,6 +63,7 @@ class ServiciosPlan():
                 session.add(plan)
                 session.commit()
                 session.refresh(plan)
+                _catalogo.invalidar()
                 return plan
             except Exception as e:
                 session.rollback(); print(f"Error al registrar plan: {e}"); return None
@@ -30,21 +76,24 @@ class ServiciosPlan():
                 plan.precio = precio
                 plan.duracion_dias = duracion_dias
                 session.commit()
+                _catalogo.invalidar()
+                # Los socios en caché llevan su plan cargado; un cambio de plan afecta a todos
+                cache_socios.limpiar()
                 return True
             except NoResultFound: return False
             except Exception as e: session.rollback(); print(f"Error al modificar plan: {e}"); return False
 
     def obtener_planes(self) -> List[PlanModel]:
-        with Session(self.engine) as session:
-            return session.query(PlanModel).all()
+        _catalogo.asegurar_cargado(self.engine)
+        return list(_catalogo.por_id.values())
             
     def obtener_plan_por_nombre(self, nombre: str) -> Optional[PlanModel]:
-        with Session(self.engine) as session:
-            return session.query(PlanModel).filter_by(nombre=nombre).one_or_none()
+        _catalogo.asegurar_cargado(self.engine)
+        return _catalogo.por_nombre.get(nombre)
 
     def obtener_plan_por_id(self, plan_id: int) -> Optional[PlanModel]:
-        with Session(self.engine) as session:
-            return session.query(PlanModel).filter_by(id=plan_id).one_or_none()
+        _catalogo.asegurar_cargado(self.engine)
+        return _catalogo.por_id.get(plan_id)
 
     def eliminar(self, plan_id: int) -> bool:
         with Session(self.engine) as session:
@@ -52,6 +101,8 @@ class ServiciosPlan():
                 plan = session.query(PlanModel).filter_by(id=plan_id).one()
                 session.delete(plan)
                 session.commit()
+                _catalogo.invalidar()
+                cache_socios.limpiar()
                 return True
             except Exception as e:
                 session.rollback(); print(f"Error al eliminar plan: {e}"); return False
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Tablero de la página de inicio a partir de los resúmenes diarios (bd/resumenes.py).
+
+obtener_tablero lee la foto de estatus de hoy, la fila de hoy de Resumen_Diario y, para el mes
+en curso, a lo sumo 31 filas por plan: el costo no depende del número de socios ni de pagos.
+ProgramadorResumenes recalcula los últimos DIAS_RECALCULO días y la foto de estatus al arrancar y
+cada noche a HORA_RECALCULO; si la aplicación estaba cerrada a esa hora, la primera consulta del
+día toma la foto de estatus. El recálculo completo (todo Pagos) sólo lo hace la migración 8.
+"""
+import threading
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import func, select
+
+from bd.conexion import engine
+from bd import resumenes
+from dominio.lecturas import ResumenTablero
+from dominio.modelos import ResumenDiarioModel, ResumenEstatusModel, ResumenIngresosPlanModel
+from aplicacion.serviciosMembresia import ServiciosMembresia, GRUPOS_ESTATUS
+
+# Hora local del recálculo nocturno (unos minutos después de medianoche, ya con la fecha nueva)
+HORA_RECALCULO = time(0, 5)
+# Días hacia atrás que se recalculan cada noche: cubre el mes que muestra el tablero sin retener
+# el bloqueo de escritura de SQLite el tiempo que toma recorrer años de pagos
+DIAS_RECALCULO = 35
+
+
+class ServiciosResumen:
+    def __init__(self):
+        self.engine = engine
+        self.servicio_membresia = ServiciosMembresia()
+
+    def obtener_tablero(self, hoy: date | None = None) -> ResumenTablero:
+        hoy = hoy or date.today()
+        inicio_mes = hoy.replace(day=1)
+        with self.engine.connect() as conexion:
+            estatus = self._leer_estatus(conexion, hoy)
+            dia = conexion.execute(
+                select(ResumenDiarioModel.altas, ResumenDiarioModel.renovaciones, ResumenDiarioModel.ingresos)
+                .where(ResumenDiarioModel.fecha == hoy)
+            ).first() or (0, 0, 0.0)
+            mes = conexion.execute(
+                select(
+                    func.coalesce(func.sum(ResumenDiarioModel.altas), 0),
+                    func.coalesce(func.sum(ResumenDiarioModel.renovaciones), 0),
+                    func.coalesce(func.sum(ResumenDiarioModel.ingresos), 0.0),
+                ).where(ResumenDiarioModel.fecha.between(inicio_mes, hoy))
+            ).one()
+            # Plan_Nombre junto a MAX(Fecha): SQLite lo toma del día más reciente del plan
+            monto = func.sum(ResumenIngresosPlanModel.monto)
+            por_plan = conexion.execute(
+                select(ResumenIngresosPlanModel.plan_nombre, func.max(ResumenIngresosPlanModel.fecha),
+                       func.sum(ResumenIngresosPlanModel.pagos), monto)
+                .where(ResumenIngresosPlanModel.fecha.between(inicio_mes, hoy))
+                .group_by(ResumenIngresosPlanModel.plan_id)
+                .having(func.sum(ResumenIngresosPlanModel.pagos) > 0)
+                .order_by(monto.desc())
+            ).all()
+        if estatus is None:
+            # Nadie ha tomado la foto de hoy (la aplicación estuvo cerrada a medianoche)
+            self.reconstruir_estatus(hoy)
+            with self.engine.connect() as conexion:
+                estatus = self._leer_estatus(conexion, hoy)
+        return ResumenTablero(
+            hoy, estatus, *dia, *mes,
+            [(plan_nombre, pagos, total) for plan_nombre, _, pagos, total in por_plan],
+        )
+
+    def _leer_estatus(self, conexion, hoy: date) -> dict[str, int] | None:
+        estatus = dict(conexion.execute(
+            select(ResumenEstatusModel.estatus, ResumenEstatusModel.socios).where(ResumenEstatusModel.fecha == hoy)
+        ).all())
+        return estatus or None
+
+    def reconstruir_estatus(self, hoy: date | None = None):
+        """Toma (o vuelve a tomar) la foto de socios por estatus del día."""
+        hoy = hoy or date.today()
+        with self.engine.begin() as conexion:
+            resumenes.reconstruir_estatus(conexion, hoy, self.servicio_membresia.expresion_estatus(hoy), GRUPOS_ESTATUS)
+
+    def reconstruir(self, hoy: date | None = None, desde: date | None = None):
+        """Recalcula los resúmenes diarios desde 'desde' (todos si es None) y la foto de estatus de hoy."""
+        hoy = hoy or date.today()
+        with self.engine.begin() as conexion:
+            resumenes.reconstruir_diarios(conexion, desde)
+            resumenes.reconstruir_estatus(conexion, hoy, self.servicio_membresia.expresion_estatus(hoy), GRUPOS_ESTATUS)
+
+
+class ProgramadorResumenes(threading.Thread):
+    """Hilo en segundo plano que recalcula los resúmenes recientes al arrancar y cada noche a HORA_RECALCULO."""
+
+    def __init__(self, hora: time = HORA_RECALCULO):
+        super().__init__(name="ProgramadorResumenes", daemon=True)
+        self.hora = hora
+        self.servicio = ServiciosResumen()
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.is_set():
+            try:
+                self.servicio.reconstruir(desde=date.today() - timedelta(days=DIAS_RECALCULO))
+            except Exception as e:
+                print(f"Error al recalcular los resúmenes del tablero: {e}")
+            if self._detener.wait(self._segundos_para_siguiente()):
+                break
+
+    def _segundos_para_siguiente(self) -> float:
+        ahora = datetime.now()
+        siguiente = datetime.combine(ahora.date(), self.hora)
+        if siguiente <= ahora:
+            siguiente += timedelta(days=1)
+        return (siguiente - ahora).total_seconds()
+
+    def detener(self):
+        self._detener.set()
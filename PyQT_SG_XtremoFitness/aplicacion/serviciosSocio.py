@@ -1,15 +1,199 @@
-from datetime import date
+import atexit
+import platform
+import threading
+import time
+from datetime import date, datetime
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
-from sqlalchemy import func
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy import func, select, text, tuple_
 from typing import List, Optional
 
-from dominio.modelos import PlanModel, SocioModel, MembresiaModel
+from dominio.modelos import PlanModel, SocioModel, MembresiaModel, MembresiaVigenteModel
+from dominio.lecturas import FilaSocio
 from bd.conexion import engine
+from bd import busqueda
+from aplicacion.cache import cache_socios
+from aplicacion.cargas import CARGA_LISTADO, CARGA_DETALLE, CARGA_CREDENCIAL, CARGA_ACCESO
 from aplicacion.serviciosMembresia import ServiciosMembresia
+from aplicacion.serviciosAcceso import RESULTADO_PERMITIDO, RESULTADO_SIN_MEMBRESIA
 from Utilerias.util_qr import generar_qr_como_bytes
+from Utilerias.galeria_huellas import BusquedaCancelada, ComparadorDpHMatch, GaleriaHuellas
+from Utilerias.motor_huellas import crear_motor
+from config import MOTOR_HUELLAS, TRABAJADORES_HUELLAS
+
+# --- GALERÍA DE HUELLAS ---
+# Plantillas de todos los socios en memoria (Utilerias/galeria_huellas.py). ProgramadorGaleria la
+# carga en segundo plano cuando Accesos abre el lector, para que la primera huella no pague la carga.
+# Las altas, cambios y bajas de este proceso la mantienen al día con deltas.
+# Se recorre en orden de prioridad (_calcular_prioridades), que el mismo hilo recalcula cada
+# MINUTOS_PRIORIDADES: la identificación nunca espera la consulta de Accesos.
+
+_galeria_huellas = None
+_galeria_en_carga = None        # La que obtener_galeria_huellas está leyendo de la base (recibe deltas)
+_candado_galeria = threading.Lock()
+_priorizada_en = None           # time.monotonic() del último cálculo de prioridades
+_candado_prioridades = threading.Lock()
+_programador_galeria = None
+_candado_programador = threading.Lock()
+
+# Cada cuánto se recalcula el orden de búsqueda (también sigue la hora del día)
+MINUTOS_PRIORIDADES = 15
+# Historial de accesos que cuenta para la prioridad
+DIAS_HISTORIAL_PRIORIDAD = 60
+# Una visita de hace este número de días vale la mitad que una de hoy
+DIAS_MEDIA_VISITA = 14
+# Peso de la afinidad horaria: con 1.0, quien siempre viene a esta hora vale el doble
+PESO_AFINIDAD_HORARIA = 1.0
+# Se suma a los socios con membresía vigente: van antes que cualquier socio vencido o sin membresía
+PRIORIDAD_VIGENTE = 1_000_000.0
+
+
+def obtener_galeria_huellas(engine_origen=engine) -> GaleriaHuellas:
+    """Galería compartida; se carga de la base en el primer uso y libera el comparador al salir."""
+    global _galeria_huellas, _galeria_en_carga
+    with _candado_galeria:
+        if _galeria_huellas is None:
+            motor = crear_motor(MOTOR_HUELLAS, ComparadorDpHMatch, TRABAJADORES_HUELLAS)
+            galeria = GaleriaHuellas(None if motor else ComparadorDpHMatch(), motor)
+            _galeria_en_carga = galeria
+            try:
+                _cargar_galeria(galeria, engine_origen)
+                atexit.register(galeria.cerrar)
+                _galeria_huellas = galeria
+            finally:
+                _galeria_en_carga = None
+        return _galeria_huellas
+
+
+def _cargar_galeria(galeria: GaleriaHuellas, engine_origen):
+    con_huella = SocioModel.huella_template.isnot(None)
+    with engine_origen.connect() as conexion:
+        total_bytes = conexion.execute(select(func.sum(func.length(SocioModel.huella_template))).where(con_huella)).scalar()
+        filas = conexion.execution_options(yield_per=1000).execute(
+            select(SocioModel.id, SocioModel.huella_template).where(con_huella)
+        )
+        galeria.cargar(((socio_id, plantilla) for socio_id, plantilla in filas), total_bytes or 0)
+
+
+def _calcular_prioridades(engine_origen, ahora: datetime) -> dict[int, float]:
+    """
+    Puntaje de cada socio para el orden de búsqueda de la galería:
+      visitas recientes (cada una vale 1 / (1 + días / DIAS_MEDIA_VISITA))
+      x (1 + PESO_AFINIDAD_HORARIA x fracción de sus visitas a esta hora, +/- 1 hora)
+      + PRIORIDAD_VIGENTE si su membresía está vigente.
+    Los vencidos no se excluyen: el kiosco debe reconocerlos para negarles el acceso.
+    """
+    marca_ahora = int(ahora.timestamp())
+    visitas = text("""
+        SELECT Socio_ID,
+               SUM(1.0 / (1.0 + (:ahora - Marca_Tiempo) / :media_segundos)),
+               SUM(CASE WHEN (CAST(strftime('%H', Marca_Tiempo, 'unixepoch', 'localtime') AS INTEGER) - :hora + 25) % 24 <= 2
+                        THEN 1 ELSE 0 END),
+               COUNT(*)
+        FROM Accesos
+        WHERE Marca_Tiempo >= :desde AND Socio_ID IS NOT NULL AND Resultado IN (:permitido, :sin_membresia)
+        GROUP BY Socio_ID
+    """)
+    with engine_origen.connect() as conexion:
+        prioridades = {
+            socio_id: recencia * (1.0 + PESO_AFINIDAD_HORARIA * en_horario / total)
+            for socio_id, recencia, en_horario, total in conexion.execute(visitas, {
+                "ahora": marca_ahora, "media_segundos": DIAS_MEDIA_VISITA * 86400.0, "hora": ahora.hour,
+                "desde": marca_ahora - DIAS_HISTORIAL_PRIORIDAD * 86400,
+                "permitido": RESULTADO_PERMITIDO, "sin_membresia": RESULTADO_SIN_MEMBRESIA,
+            })
+        }
+        vigentes = conexion.execute(
+            select(MembresiaVigenteModel.socio_id).where(MembresiaVigenteModel.fecha_fin >= ahora.date())
+        ).scalars()
+        for socio_id in vigentes:
+            prioridades[socio_id] = prioridades.get(socio_id, 0.0) + PRIORIDAD_VIGENTE
+    return prioridades
+
+
+def _priorizar_galeria(galeria: GaleriaHuellas, engine_origen):
+    """Recalcula el orden de búsqueda si pasaron MINUTOS_PRIORIDADES desde la última vez."""
+    global _priorizada_en
+    # Con el candado: dos llamadas simultáneas no calculan dos veces ni pisan _priorizada_en
+    with _candado_prioridades:
+        ahora = time.monotonic()
+        if _priorizada_en is not None and ahora - _priorizada_en < MINUTOS_PRIORIDADES * 60:
+            return
+        _priorizada_en = ahora
+        try:
+            galeria.priorizar(_calcular_prioridades(engine_origen, datetime.now()))
+        except Exception as e:
+            # Sin prioridades la galería sigue funcionando, sólo en el orden anterior
+            print(f"Error al calcular el orden de búsqueda de huellas: {e}")
+
+
+def formatear_estadisticas_identificacion(estadisticas: dict) -> str:
+    """Una línea con el tamaño de la galería y la profundidad de los aciertos (ServiciosSocio.estadisticas_identificacion)."""
+    linea = (f"Galería de huellas: {estadisticas['plantillas']} plantillas, "
+             f"{estadisticas['aciertos']} aciertos, {estadisticas['fallos']} sin coincidencia")
+    if "profundidad_media" in estadisticas:
+        linea += (f"; profundidad media {estadisticas['profundidad_media']} "
+                  f"(p50 {estadisticas['profundidad_p50']}, p90 {estadisticas['profundidad_p90']}, "
+                  f"{estadisticas['fraccion_media']:.1%} de la galería)")
+    return linea
+
+
+class ProgramadorGaleria(threading.Thread):
+    """
+    Hilo en segundo plano que carga la galería de huellas, recalcula su orden cada MINUTOS_PRIORIDADES
+    e imprime la profundidad de los aciertos del periodo (si hubo identificaciones).
+    """
+
+    def __init__(self, engine_origen=engine):
+        super().__init__(name="ProgramadorGaleria", daemon=True)
+        self.engine_origen = engine_origen
+        self._detener = threading.Event()
+        self._identificaciones = 0  # aciertos + fallos en el último reporte
+
+    def run(self):
+        while not self._detener.is_set():
+            try:
+                galeria = obtener_galeria_huellas(self.engine_origen)
+                self._reportar(ServiciosSocio().estadisticas_identificacion())
+                _priorizar_galeria(galeria, self.engine_origen)
+            except Exception as e:
+                print(f"Error al preparar la galería de huellas: {e}")
+            if self._detener.wait(MINUTOS_PRIORIDADES * 60):
+                break
+
+    def _reportar(self, estadisticas: dict):
+        identificaciones = estadisticas["aciertos"] + estadisticas["fallos"]
+        if identificaciones != self._identificaciones:
+            self._identificaciones = identificaciones
+            print(formatear_estadisticas_identificacion(estadisticas))
+
+    def detener(self):
+        self._detener.set()
+
+
+def iniciar_programador_galeria() -> ProgramadorGaleria:
+    """Arranca (una sola vez por proceso) el hilo que prepara la galería de huellas."""
+    global _programador_galeria
+    with _candado_programador:
+        if _programador_galeria is None:
+            _programador_galeria = ProgramadorGaleria()
+            _programador_galeria.start()
+        return _programador_galeria
+
+
+def _actualizar_galeria(socio_id: int, plantilla: bytes | None):
+    """
+    Pasa a la galería (cargada o en carga) el cambio de huella de un socio ya confirmado en la base.
+    Se llama desde el hilo de la interfaz: no toma _candado_galeria (retenido durante la carga) y
+    GaleriaHuellas.encolar no espera a una búsqueda en curso. Si aún no hay galería, la carga
+    leerá el cambio de la base.
+    """
+    galeria = _galeria_huellas if _galeria_huellas is not None else _galeria_en_carga
+    if galeria is not None:
+        galeria.encolar(socio_id, plantilla)
+
 
 class ServiciosSocio():
     
@@ -20,8 +204,7 @@ class ServiciosSocio():
         """Registra un nuevo socio sin membresía."""
         with Session(self.engine) as session:
             try:
-                socio = SocioModel(nombre=nombre, apellido_paterno=apellido_paterno, apellido_materno=apellido_materno)
-                session.add(socio)
+                socio = self._registrar_en_sesion(session, nombre, apellido_paterno, apellido_materno)
                 session.commit()
                 session.refresh(socio)
                 return socio
@@ -32,46 +215,92 @@ class ServiciosSocio():
                 session.rollback()
                 raise Exception(f"Error interno al registrar socio: {e}")
 
+    def _registrar_en_sesion(self, session: Session, nombre: str, apellido_paterno: str,
+                             apellido_materno: str | None) -> SocioModel:
+        """Agrega el socio sin membresía y su entrada en el índice de búsqueda (sin confirmar)."""
+        socio = SocioModel(nombre=nombre, apellido_paterno=apellido_paterno, apellido_materno=apellido_materno)
+        session.add(socio)
+        session.flush()
+        busqueda.indexar_socio(session.connection(), socio.id, nombre, apellido_paterno, apellido_materno)
+        ServiciosMembresia()._contar_socios_nuevos(session)
+        return socio
+
     def obtener_socios_con_membresia(self) -> List[SocioModel]:
         """
-        Obtiene todos los socios, precargando eficientemente sus membresías y los planes asociados.
+        Obtiene todos los socios, precargando eficientemente su membresía vigente y el plan asociado.
         Esto previene errores de 'DetachedInstanceError' al acceder a relaciones fuera de la sesión.
         """
         with Session(self.engine) as session:
-            # Usamos joinedload para cargar proactivamente las relaciones anidadas.
-            # Socio -> Membresias -> Plan
-            return session.query(SocioModel).options(joinedload(SocioModel.membresias).joinedload(MembresiaModel.plan)).all()
+            # Socio -> Membresía vigente -> Plan (precargados, sin BLOBs ni historial; ver aplicacion/cargas.py)
+            return session.query(SocioModel).options(*CARGA_LISTADO).all()
+
+    def obtener_pagina_socios(self, cursor: tuple | None = None, tamano: int = 100,
+                              estatus: str | None = None, orden: str = "id") -> tuple[List[FilaSocio], tuple | None]:
+        """
+        Devuelve una página de socios (con su membresía vigente y plan) y el cursor de la siguiente.
+        Usa paginación por llave (keyset): en lugar de OFFSET continúa después de la última fila vista,
+        así cada página cuesta lo mismo sin importar cuánto se haya desplazado el usuario.
+          - cursor: el valor devuelto por la llamada anterior (None para la primera página).
+          - estatus: None (todos), ESTATUS_ACTIVOS, ESTATUS_POR_VENCER o ESTATUS_VENCIDOS.
+          - orden: "id" (orden de alta) o "nombre" (nombre y apellido paterno).
+        Las filas son FilaSocio (lectura plana, sin entidades ORM) armadas con un solo SELECT;
+        su grupo de estatus también se calcula en la consulta (ServiciosMembresia.expresion_estatus).
+        El cursor devuelto es None cuando ya no quedan más socios.
+        """
+        consulta, claves = self._consulta_pagina_socios(cursor, tamano, estatus, orden)
+        with self.engine.connect() as conexion:
+            filas = conexion.execute(consulta).all()
+        return self._armar_pagina_socios(filas, tamano, claves)
+
+    def _consulta_pagina_socios(self, cursor: tuple | None, tamano: int, estatus: str | None, orden: str):
+        """SELECT de una página del listado y columnas de la llave de orden (compartido con la versión async)."""
+        if orden == "id":
+            claves = (SocioModel.id,)
+        elif orden == "nombre":
+            claves = (SocioModel.nombre, SocioModel.apellido_paterno, SocioModel.id)
+        else:
+            raise ValueError(f"Orden de listado desconocido: {orden}")
+
+        servicio_membresia = ServiciosMembresia()
+        hoy = date.today()
+        consulta = (
+            select(
+                SocioModel.id, SocioModel.nombre, SocioModel.apellido_paterno, SocioModel.apellido_materno,
+                PlanModel.nombre, MembresiaModel.fecha_inicio, MembresiaModel.fecha_fin,
+                servicio_membresia.expresion_estatus(hoy),
+            )
+            .outerjoin(MembresiaVigenteModel, MembresiaVigenteModel.socio_id == SocioModel.id)
+            .outerjoin(MembresiaModel, MembresiaModel.id == MembresiaVigenteModel.membresia_id)
+            .outerjoin(PlanModel, PlanModel.id == MembresiaModel.plan_id)
+        )
+        if estatus:
+            consulta = consulta.where(servicio_membresia.condicion_estatus(estatus, hoy))
+        if cursor is not None:
+            consulta = consulta.where(tuple_(*claves) > tuple_(*cursor))
+        # Pedimos una fila de más para saber si existe una página siguiente
+        consulta = consulta.order_by(*claves).limit(tamano + 1)
+        return consulta, claves
+
+    def _armar_pagina_socios(self, filas_bd, tamano: int, claves) -> tuple[List[FilaSocio], tuple | None]:
+        """Convierte las filas del SELECT en FilaSocio y calcula el cursor de la siguiente página."""
+        filas = [FilaSocio(*fila) for fila in filas_bd]
+        if len(filas) <= tamano:
+            return filas, None
+        filas = filas[:tamano]
+        ultima = filas[-1]
+        return filas, tuple(getattr(ultima, clave.key) for clave in claves)
 
     def modificar(self, socio_id: int, nombre: str, apellido_paterno: str, apellido_materno: str | None,
                   foto_bytes: bytes | None = None, huella_template: bytes | None = None) -> bool:
         """Modifica los datos personales y foto/huella de un socio existente."""
         with Session(self.engine) as session:
             try:
-                socio = session.query(SocioModel).filter_by(id=socio_id).one()
-                
-                # Actualizar datos personales
-                socio.nombre = nombre
-                socio.apellido_paterno = apellido_paterno
-                socio.apellido_materno = apellido_materno
-                
-                # Actualizar foto si se proporciona
-                if foto_bytes is not None:
-                    if foto_bytes == b'':
-                        socio.foto_ruta = None
-                        print(f"Foto eliminada para socio ID {socio_id}")
-                    elif len(foto_bytes) > 0:
-                        socio.foto_ruta = foto_bytes
-                        print(f"Foto actualizada para socio ID {socio_id}")
-                # Actualizar huella si se proporciona
-                if huella_template is not None:
-                    if huella_template == b'':
-                        socio.huella_template = None
-                        print(f"Huella eliminada para socio ID {socio_id}")
-                    elif len(huella_template) > 0:
-                        socio.huella_template = huella_template
-                        print(f"Huella actualizada para socio ID {socio_id}")
-                
+                self._modificar_en_sesion(session, socio_id, nombre, apellido_paterno, apellido_materno,
+                                          foto_bytes, huella_template)
                 session.commit()
+                cache_socios.invalidar(socio_id)
+                if huella_template is not None:
+                    _actualizar_galeria(socio_id, huella_template)
                 return True
             except NoResultFound:
                 raise ValueError(f"No se encontró ningún socio con ID {socio_id}")
@@ -83,13 +312,41 @@ class ServiciosSocio():
                 session.rollback()
                 raise Exception(f"Error interno al modificar socio: {e}")
 
+    def _modificar_en_sesion(self, session: Session, socio_id: int, nombre: str, apellido_paterno: str,
+                             apellido_materno: str | None, foto_bytes: bytes | None, huella_template: bytes | None):
+        """Aplica el cambio de datos, foto y huella y reindexa el nombre (sin confirmar). NoResultFound si no existe."""
+        socio = session.query(SocioModel).filter_by(id=socio_id).one()
+        
+        # Actualizar datos personales
+        socio.nombre = nombre
+        socio.apellido_paterno = apellido_paterno
+        socio.apellido_materno = apellido_materno
+        
+        # Actualizar foto si se proporciona
+        if foto_bytes is not None:
+            if foto_bytes == b'':
+                socio.foto_ruta = None
+                print(f"Foto eliminada para socio ID {socio_id}")
+            elif len(foto_bytes) > 0:
+                socio.foto_ruta = foto_bytes
+                print(f"Foto actualizada para socio ID {socio_id}")
+        # Actualizar huella si se proporciona
+        if huella_template is not None:
+            if huella_template == b'':
+                socio.huella_template = None
+                print(f"Huella eliminada para socio ID {socio_id}")
+            elif len(huella_template) > 0:
+                socio.huella_template = huella_template
+                print(f"Huella actualizada para socio ID {socio_id}")
+        
+        # Mantener sincronizado el índice de búsqueda por nombre
+        busqueda.indexar_socio(session.connection(), socio_id, nombre, apellido_paterno, apellido_materno)
+
     def obtener_socios(self) -> List[SocioModel]:
         """Obtiene una lista de todos los socios."""
         # MODIFICADO: Ahora también carga las relaciones para consistencia.
         with Session(self.engine) as session:
-            return session.query(SocioModel).options(
-                joinedload(SocioModel.membresias).joinedload(MembresiaModel.plan)
-            ).all()
+            return session.query(SocioModel).options(*CARGA_LISTADO).all()
 
     def eliminar(self, socio_id: int) -> bool:
         """
@@ -99,26 +356,10 @@ class ServiciosSocio():
         """
         with Session(self.engine) as session:
             try:
-                # Usamos joinedload para traer las membresías eficientemente
-                socio = session.query(SocioModel).options(
-                    joinedload(SocioModel.membresias)
-                ).filter_by(id=socio_id).one()
-
-                # --- LÓGICA DE NEGOCIO MOVIDA AQUÍ ---
-                if socio.membresias:
-                    membresia_reciente = max(socio.membresias, key=lambda m: m.fecha_fin)
-                    hoy = date.today()
-                    
-                    # Regla: No eliminar si la membresía está activa o vence hoy.
-                    if membresia_reciente.fecha_fin >= hoy:
-                        raise ValueError(
-                            f"No se puede eliminar. El socio tiene una membresía activa o que vence hoy.\n"
-                            f"Finaliza el: {membresia_reciente.fecha_fin.strftime('%d-%m-%Y')}."
-                        )
-
-                # Si pasa todas las validaciones, se procede a eliminar
-                session.delete(socio)
+                self._eliminar_en_sesion(session, socio_id)
                 session.commit()
+                cache_socios.invalidar(socio_id)
+                _actualizar_galeria(socio_id, None)
                 return True
 
             except NoResultFound:
@@ -137,16 +378,48 @@ class ServiciosSocio():
             except Exception as e:
                 session.rollback()
                 raise Exception(f"Error interno al eliminar socio: {e}")
+
+    def _eliminar_en_sesion(self, session: Session, socio_id: int):
+        """Valida las reglas de negocio y borra el socio y su entrada del índice (sin confirmar)."""
+        # Usamos joinedload para traer la membresía vigente en la misma consulta
+        socio = session.query(SocioModel).options(
+            joinedload(SocioModel.vigencia)
+        ).filter_by(id=socio_id).one()
+
+        # --- LÓGICA DE NEGOCIO MOVIDA AQUÍ ---
+        if socio.vigencia:
+            hoy = date.today()
+            
+            # Regla: No eliminar si la membresía está activa o vence hoy.
+            if socio.vigencia.fecha_fin >= hoy:
+                raise ValueError(
+                    f"No se puede eliminar. El socio tiene una membresía activa o que vence hoy.\n"
+                    f"Finaliza el: {socio.vigencia.fecha_fin.strftime('%d-%m-%Y')}."
+                )
+
+        # Si pasa todas las validaciones, se procede a eliminar
+        ServiciosMembresia()._descontar_socio(session, socio.vigencia.fecha_fin if socio.vigencia else None)
+        session.delete(socio)
+        busqueda.desindexar_socio(session.connection(), socio_id)
     
     def obtener_socio_por_id(self, socio_id: int) -> Optional[SocioModel]:
-        """Obtiene un único socio por su ID, precargando sus membresías y planes."""
+        """
+        Obtiene un único socio por su ID, precargando su membresía vigente, plan, foto, QR y huella.
+        Pasa por cache_socios: los clics repetidos en la tabla o los escaneos de QR del mismo socio
+        no vuelven a la base mientras la entrada no caduque o se invalide por una escritura.
+        El objeto devuelto es compartido; los formularios sólo deben leerlo.
+        """
+        return cache_socios.obtener_o_cargar(socio_id, lambda: self._cargar_socio_por_id(socio_id))
+
+    def estadisticas_cache(self) -> dict:
+        """Aciertos/fallos de la caché de socios (ver aplicacion.cache.CacheLRU.estadisticas)."""
+        return cache_socios.estadisticas()
+
+    def _cargar_socio_por_id(self, socio_id: int) -> Optional[SocioModel]:
         with Session(self.engine) as session:
             try:
-                # Usamos joinedload para cargar proactivamente las relaciones anidadas.
-                # Socio -> Membresias -> Plan
-                return session.query(SocioModel).options(
-                    joinedload(SocioModel.membresias).joinedload(MembresiaModel.plan)
-                ).filter(SocioModel.id == socio_id).one_or_none()
+                # Socio -> Membresía vigente -> Plan, con foto, QR y huella
+                return session.query(SocioModel).options(*CARGA_DETALLE).filter(SocioModel.id == socio_id).one_or_none()
             except Exception as e:
                 print(f"Error al obtener socio por ID: {e}")
                 return None
@@ -159,8 +432,6 @@ class ServiciosSocio():
         Si algo falla, se deshace todo automáticamente.
         """
         with Session(self.engine) as session:
-            # Instanciamos el servicio de membresías para usar su lógica
-            servicio_membresia = ServiciosMembresia()
             # Obtenemos el objeto plan para el cálculo
             plan_obj = session.query(PlanModel).filter_by(id=plan_id).one()
 
@@ -169,41 +440,22 @@ class ServiciosSocio():
                 if fecha_inicio < date.today():
                     raise ValueError("La fecha de inicio no puede ser anterior a hoy")
                 
-                # Paso A: Crear el objeto Socio
-                nuevo_socio = SocioModel(
-                    nombre=nombre,
-                    apellido_paterno=apellido_paterno,
-                    apellido_materno=apellido_materno,
-                    foto_ruta=foto_bytes,
-                    huella_template=huella_template
-                )
-                session.add(nuevo_socio)
-                session.flush()  # Asigna el ID preliminar
-
-                # Paso A.2: Generar y asignar el código QR usando el ID recién asignado
-                qr_data = f"socio_id:{nuevo_socio.id}"
-                qr_bytes = generar_qr_como_bytes(qr_data)
-                nuevo_socio.qr_code = qr_bytes
-
-                # Paso B: Crear la membresía usando el ID del nuevo socio
-                nueva_membresia = MembresiaModel(
-                    socio_id=nuevo_socio.id,
-                    plan_id=plan_id,
-                    fecha_inicio=fecha_inicio,
-                    fecha_fin=servicio_membresia._calcular_fecha_fin(fecha_inicio, plan_obj)
+                nuevo_socio = self._registrar_socio_en_sesion(
+                    session, nombre, apellido_paterno, apellido_materno, plan_obj, fecha_inicio, foto_bytes, huella_template
                 )
-                session.add(nueva_membresia)
 
                 session.commit()
                 # Guardamos el ID antes de que el objeto se desvincule de la sesión
                 nuevo_socio_id = nuevo_socio.id
+                # SQLite puede reutilizar el ID de un socio eliminado: descartamos cualquier entrada vieja
+                cache_socios.invalidar(nuevo_socio_id)
+                if huella_template:
+                    _actualizar_galeria(nuevo_socio_id, huella_template)
                 
                 # En lugar de un 'refresh', volvemos a consultar el socio recién creado
-                # usando 'joinedload' para cargar proactivamente todas las relaciones anidadas.
+                # precargando todas sus relaciones (CARGA_DETALLE).
                 # Esto evita el error de "lazy load" fuera de la sesión.
-                socio_completo = session.query(SocioModel).options( 
-                    joinedload(SocioModel.membresias).joinedload(MembresiaModel.plan)
-                ).filter_by(id=nuevo_socio_id).one()
+                socio_completo = session.query(SocioModel).options(*CARGA_DETALLE).filter_by(id=nuevo_socio_id).one()
                 
                 return socio_completo 
             except IntegrityError as e:
@@ -216,125 +468,113 @@ class ServiciosSocio():
                 session.rollback()
                 raise Exception(f"Error interno al registrar socio con membresía: {e}")
 
+    def _registrar_socio_en_sesion(self, session: Session, nombre: str, apellido_paterno: str, apellido_materno: str | None,
+                                   plan_obj: PlanModel, fecha_inicio: date,
+                                   foto_bytes: bytes | None, huella_template: bytes | None) -> SocioModel:
+        """
+        Agrega el socio con su QR, su primera membresía y su entrada en el índice de búsqueda (sin confirmar).
+        La versión asíncrona hace los mismos dos pasos, pero genera el QR fuera del bucle de eventos.
+        """
+        nuevo_socio = self._agregar_socio_en_sesion(session, nombre, apellido_paterno, apellido_materno,
+                                                    foto_bytes, huella_template)
+        # Generar el código QR usando el ID recién asignado
+        qr_bytes = generar_qr_como_bytes(f"socio_id:{nuevo_socio.id}")
+        self._completar_registro_en_sesion(session, nuevo_socio, qr_bytes, plan_obj, fecha_inicio)
+        return nuevo_socio
+
+    def _agregar_socio_en_sesion(self, session: Session, nombre: str, apellido_paterno: str, apellido_materno: str | None,
+                                 foto_bytes: bytes | None, huella_template: bytes | None) -> SocioModel:
+        """Paso 1 del alta: agrega el socio y le asigna ID (flush)."""
+        nuevo_socio = SocioModel(
+            nombre=nombre,
+            apellido_paterno=apellido_paterno,
+            apellido_materno=apellido_materno,
+            foto_ruta=foto_bytes,
+            huella_template=huella_template
+        )
+        session.add(nuevo_socio)
+        session.flush()  # Asigna el ID preliminar
+        return nuevo_socio
+
+    def _completar_registro_en_sesion(self, session: Session, nuevo_socio: SocioModel, qr_bytes: bytes,
+                                      plan_obj: PlanModel, fecha_inicio: date):
+        """Paso 2 del alta: QR, primera membresía (con su vigencia) e índice de búsqueda."""
+        nuevo_socio.qr_code = qr_bytes
+        servicio_membresia = ServiciosMembresia()
+        servicio_membresia._contar_socios_nuevos(session)
+        servicio_membresia._crear_membresia(session, nuevo_socio.id, plan_obj, fecha_inicio)
+        busqueda.indexar_socio(session.connection(), nuevo_socio.id, nuevo_socio.nombre,
+                               nuevo_socio.apellido_paterno, nuevo_socio.apellido_materno)
+
+    def buscar_ids_por_nombre(self, texto_busqueda: str, limite: int = 20) -> List[int]:
+        """
+        Devuelve los IDs de los socios que coinciden con el texto, ordenados por relevancia.
+        Usa el índice FTS5 (bd/busqueda.py): ignora acentos, acepta prefijos y tolera errores de escritura.
+        """
+        with self.engine.connect() as conexion:
+            return busqueda.buscar_ids(conexion, texto_busqueda, limite)
+
     def buscar_por_nombre_aproximado(self, texto_busqueda: str) -> List[SocioModel]:
         """
         Busca socios cuyo nombre completo coincida de forma aproximada con el texto.
-        Es insensible a mayúsculas/minúsculas.
+        Es insensible a mayúsculas/minúsculas y a acentos. Los resultados vienen ordenados por relevancia.
         """
-        with Session(self.engine) as session:
-            try:
-                # Construimos el término de búsqueda para que sea flexible
-                termino = f"%{texto_busqueda.strip()}%"
-                
-                # Usamos func.concat para una concatenación segura en SQL.
-                # Usamos func.coalesce para manejar el caso en que apellido_materno sea NULL,
-                # reemplazándolo con una cadena vacía para que la concatenación no falle.
-                return session.query(SocioModel).options(
-                    # ¡SOLUCIÓN! Cargamos proactivamente las membresías y sus planes asociados.
-                    joinedload(SocioModel.membresias).joinedload(MembresiaModel.plan)
-                ).filter(
-                    func.concat(
-                        SocioModel.nombre, ' ', SocioModel.apellido_paterno, ' ', func.coalesce(SocioModel.apellido_materno, '')
-                    ).ilike(termino)
-                ).all()
-            except Exception as e:
-                raise Exception(f"Error al buscar socios: {e}")
+        try:
+            ids = self.buscar_ids_por_nombre(texto_busqueda)
+            if not ids:
+                return []
+            with Session(self.engine) as session:
+                # El resultado se muestra en la credencial, que necesita foto y QR.
+                socios = session.query(SocioModel).options(*CARGA_CREDENCIAL).filter(SocioModel.id.in_(ids)).all()
+            # Respetamos el orden de relevancia que devolvió el índice
+            posicion = {socio_id: i for i, socio_id in enumerate(ids)}
+            return sorted(socios, key=lambda socio: posicion[socio.id])
+        except Exception as e:
+            raise Exception(f"Error al buscar socios: {e}")
 
     def obtener_socios_con_huella(self) -> List[SocioModel]:
         """Obtiene todos los socios que tienen una huella registrada."""
         with Session(self.engine) as session:
-            return session.query(SocioModel).filter(SocioModel.huella_template.isnot(None)).all()
+            return session.query(SocioModel).options(*CARGA_ACCESO).filter(SocioModel.huella_template.isnot(None)).all()
 
-    def identificar_por_huella(self, fmd_capturado: bytes) -> Optional[SocioModel]:
+    def identificar_por_huella(self, fmd_capturado: bytes, cancelado: threading.Event | None = None) -> Optional[SocioModel]:
         """
         Identifica a un socio comparando una huella capturada (FMD) con todas las
-        huellas almacenadas en la base de datos (identificación 1-a-N).
+        huellas registradas (identificación 1-a-N).
         Devuelve el objeto SocioModel si encuentra una coincidencia, de lo contrario None.
-        
-        Este método adapta la identificación 1-a-N utilizando múltiples verificaciones 1-a-1
-        con `dpHMatch.dll`, ya que `DPFPID.dll` no está disponible.
-        """
-        import ctypes
-        import os
-        import platform
-        
-        # Importar las DLLs necesarias para la comparación 1-a-1
-        # Estas ya deberían estar cargadas en IdentificationWorker, pero las cargamos aquí
-        # para asegurar que el servicio pueda funcionar de forma independiente si es necesario.
-        try:
-            dphmatch_dll = ctypes.WinDLL('dpHMatch.dll')
-        except OSError as e:
-            raise Exception(f"Error al cargar dpHMatch.dll: {e}. Asegúrese de que el RTE de DigitalPersona esté instalado.")
-
-        # Definir tipos y constantes necesarios para dpHMatch.dll
-        FT_HANDLE = ctypes.c_void_p
-        FT_BYTE = ctypes.c_ubyte
-        FT_BOOL = ctypes.c_int
-        FT_REG_FTR = 1 # Para plantillas registradas
-        FT_VER_FTR = 2 # Para plantillas de verificación (capturadas en vivo)
-
-        # Prototipos para dpHMatch.dll (solo los necesarios para MC_verifyFeaturesEx)
-        dphmatch_dll.MC_init.restype = ctypes.c_int
-        dphmatch_dll.MC_createContext.argtypes = [ctypes.POINTER(FT_HANDLE)]
-        dphmatch_dll.MC_createContext.restype = ctypes.c_int
-        dphmatch_dll.MC_getFeaturesLen.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
-        dphmatch_dll.MC_getFeaturesLen.restype = ctypes.c_int
-        dphmatch_dll.MC_verifyFeaturesEx.argtypes = [FT_HANDLE, ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.c_int, ctypes.POINTER(FT_BYTE), ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_double), ctypes.POINTER(FT_BOOL)]
-        dphmatch_dll.MC_verifyFeaturesEx.restype = ctypes.c_int
-        dphmatch_dll.MC_closeContext.argtypes = [FT_HANDLE]
-        dphmatch_dll.MC_closeContext.restype = ctypes.c_int
-        dphmatch_dll.MC_terminate.restype = ctypes.c_int
 
+        Las comparaciones 1-a-1 con `dpHMatch.dll` (`DPFPID.dll` no está disponible) se hacen contra
+        la galería en memoria: la DLL, el contexto y las plantillas se cargan una sola vez (de antemano
+        con preparar_identificacion_por_huella), y los socios habituales a esta hora se comparan
+        primero (ver _calcular_prioridades).
+        Si 'cancelado' se señala (llegó otra huella o venció el tiempo) lanza BusquedaCancelada.
+        El socio encontrado se lee a través de la caché de socios.
+        """
         if platform.system().lower() != "windows":
             print("La identificación por huella solo es compatible con Windows.")
             return None
-
-        mc_context = FT_HANDLE(0)
         try:
-            # Inicializar el contexto de MC
-            if dphmatch_dll.MC_init() != 0: raise Exception("Fallo al inicializar MC_init")
-            if dphmatch_dll.MC_createContext(ctypes.byref(mc_context)) != 0: raise Exception("Fallo al crear contexto MC")
-
-            # Obtener la longitud esperada para las características de verificación
-            ver_feature_len_ptr = ctypes.c_int(0)
-            # Asumimos que FT_VER_FTR tiene una longitud estándar que se puede obtener de FX_getFeaturesLen
-            # Sin embargo, aquí solo necesitamos el tamaño de la plantilla que nos llega (fmd_capturado)
-            # y el tamaño de las plantillas de registro (huella_template de SocioModel).
-            # La longitud de la plantilla de verificación (fmd_capturado) ya la tenemos.
-            
-            # Preparar la plantilla de verificación (la capturada en vivo)
-            ver_buffer = (FT_BYTE * len(fmd_capturado)).from_buffer_copy(fmd_capturado)
-
-            socios_con_huella = self.obtener_socios_con_huella()
-            if not socios_con_huella:
-                return None
-
-            # Iterar sobre todas las plantillas guardadas
-            for socio in socios_con_huella:
-                if not socio.huella_template:
-                    continue # Saltar si el socio no tiene huella
-
-                reg_template_buffer = (FT_BYTE * len(socio.huella_template)).from_buffer_copy(socio.huella_template)
-                comparison_decision = FT_BOOL(0)
-                achieved_far = ctypes.c_double(0.0)
-
-                rc = dphmatch_dll.MC_verifyFeaturesEx(
-                    mc_context, len(socio.huella_template), ctypes.cast(reg_template_buffer, ctypes.POINTER(FT_BYTE)),
-                    len(fmd_capturado), ctypes.cast(ver_buffer, ctypes.POINTER(FT_BYTE)),
-                    0, None, None, None, ctypes.byref(achieved_far), ctypes.byref(comparison_decision)
-                )
-
-                # Si hay coincidencia, devolver el socio inmediatamente
-                if rc == 0 and comparison_decision.value == 1:
-                    return self.obtener_socio_por_id(socio.id)
-            
-            # Si no se encontró ninguna coincidencia después de iterar todas las huellas
-            return None
-
+            # Si la galería aún se está cargando, espera a que termine (sólo en el arranque)
+            socio_id = obtener_galeria_huellas().identificar(fmd_capturado, cancelado)
+        except BusquedaCancelada:
+            raise
         except Exception as e:
             raise Exception(f"Error durante la identificación por huella: {e}")
-        finally:
-            # Limpiar el contexto de MC
-            if mc_context and mc_context.value:
-                dphmatch_dll.MC_closeContext(mc_context)
-            dphmatch_dll.MC_terminate()
\ No newline at end of file
+        return self.obtener_socio_por_id(socio_id) if socio_id is not None else None
+
+    def preparar_identificacion_por_huella(self):
+        """
+        Carga la galería y su orden de búsqueda en segundo plano (ProgramadorGaleria) y los mantiene
+        al día. No espera: se llama al abrir el lector en Accesos.
+        """
+        if platform.system().lower() == "windows":
+            iniciar_programador_galeria()
+
+    def estadisticas_identificacion(self) -> dict:
+        """
+        Tamaño de la galería y profundidad de los aciertos recientes (vacío si aún no se carga).
+        ProgramadorGaleria las imprime cada MINUTOS_PRIORIDADES con formatear_estadisticas_identificacion.
+        """
+        with _candado_galeria:
+            galeria = _galeria_huellas
+        return galeria.estadisticas() if galeria is not None else {}
@@ -0,0 +1,42 @@
+"""
+Reglas de validación de datos de socios.
+
+Las usan tanto el formulario de socios como la importación masiva, para que un socio
+importado desde un archivo cumpla exactamente lo mismo que uno capturado a mano.
+"""
+from dominio.modelos import PlanModel
+
+
+def validar_nombre(nombre: str) -> bool:
+    """Valida que el nombre contenga solo letras y espacios"""
+    if not nombre or len(nombre.strip()) < 2:
+        return False
+    return nombre.replace(" ", "").isalpha()
+
+
+def validar_datos_socio(nombre: str, apellido_paterno: str, apellido_materno: str = "") -> tuple[bool, str]:
+    """Valida todos los datos del socio"""
+    # Validar nombre
+    if not validar_nombre(nombre):
+        return False, "El nombre debe tener al menos 2 caracteres y solo contener letras"
+
+    # Validar apellido paterno
+    if not validar_nombre(apellido_paterno):
+        return False, "El apellido paterno debe tener al menos 2 caracteres y solo contener letras"
+
+    # Validar apellido materno (opcional)
+    if apellido_materno and not validar_nombre(apellido_materno):
+        return False, "El apellido materno solo puede contener letras"
+
+    return True, "Datos válidos"
+
+
+def validar_plan(plan_nombre: str, plan_obj: PlanModel | None) -> tuple[bool, str]:
+    """Valida el plan elegido por nombre; plan_obj es el resultado de buscarlo (None si no existe)."""
+    if not plan_nombre:
+        return False, "Debe seleccionar un plan de membresía"
+    if not plan_obj:
+        return False, f"No se encontró el plan '{plan_nombre}'. Verifique que el plan existe."
+    if plan_obj.duracion_dias <= 0:
+        return False, f"El plan '{plan_nombre}' tiene una duración inválida"
+    return True, "Plan válido"
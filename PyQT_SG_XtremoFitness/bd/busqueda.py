@@ -0,0 +1,113 @@
+"""
+Índice de búsqueda de socios por nombre (SQLite FTS5).
+
+Se mantienen dos tablas virtuales cuyo rowid es el ID del socio:
+  - Socios_Busqueda: tokens por palabra, para coincidencias por prefijo ("jo per" -> José Pérez).
+  - Socios_Busqueda_Trigramas: trigramas del nombre, para tolerar errores de captura ("Peres").
+El texto se guarda ya normalizado (minúsculas y sin acentos), así "Jose" encuentra a "José".
+"""
+from difflib import SequenceMatcher
+from sqlalchemy import text
+
+from Utilerias.generico import normalizar_texto
+
+# Similitud mínima (0 a 1) para aceptar un resultado de la búsqueda difusa.
+UMBRAL_SIMILITUD = 0.75
+
+
+def crear_tablas_busqueda(conexion):
+    conexion.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS Socios_Busqueda USING fts5(Texto, tokenize='unicode61', prefix='2 3')"
+    ))
+    conexion.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS Socios_Busqueda_Trigramas USING fts5(Texto, tokenize='trigram')"
+    ))
+
+
+def texto_indexable(nombre: str, apellido_paterno: str, apellido_materno: str | None) -> str:
+    return normalizar_texto(f"{nombre} {apellido_paterno} {apellido_materno or ''}")
+
+
+def indexar_socio(conexion, socio_id: int, nombre: str, apellido_paterno: str, apellido_materno: str | None):
+    """Inserta o reemplaza la entrada del socio en ambas tablas. Se llama dentro de la transacción del alta/cambio."""
+    texto_socio = texto_indexable(nombre, apellido_paterno, apellido_materno)
+    desindexar_socio(conexion, socio_id)
+    conexion.execute(text("INSERT INTO Socios_Busqueda (rowid, Texto) VALUES (:id, :texto)"), {"id": socio_id, "texto": texto_socio})
+    conexion.execute(text("INSERT INTO Socios_Busqueda_Trigramas (rowid, Texto) VALUES (:id, :texto)"), {"id": socio_id, "texto": texto_socio})
+
+
+def indexar_socios(conexion, socios):
+    """Versión por lotes de indexar_socio; 'socios' son tuplas (id, nombre, apellido_paterno, apellido_materno)."""
+    registros = [{"id": socio[0], "texto": texto_indexable(socio[1], socio[2], socio[3])} for socio in socios]
+    if not registros:
+        return
+    ids = [{"id": registro["id"]} for registro in registros]
+    conexion.execute(text("DELETE FROM Socios_Busqueda WHERE rowid = :id"), ids)
+    conexion.execute(text("DELETE FROM Socios_Busqueda_Trigramas WHERE rowid = :id"), ids)
+    conexion.execute(text("INSERT INTO Socios_Busqueda (rowid, Texto) VALUES (:id, :texto)"), registros)
+    conexion.execute(text("INSERT INTO Socios_Busqueda_Trigramas (rowid, Texto) VALUES (:id, :texto)"), registros)
+
+
+def desindexar_socio(conexion, socio_id: int):
+    conexion.execute(text("DELETE FROM Socios_Busqueda WHERE rowid = :id"), {"id": socio_id})
+    conexion.execute(text("DELETE FROM Socios_Busqueda_Trigramas WHERE rowid = :id"), {"id": socio_id})
+
+
+def reconstruir_indice(conexion):
+    """Vuelve a poblar el índice completo a partir de la tabla Socios."""
+    conexion.execute(text("DELETE FROM Socios_Busqueda"))
+    conexion.execute(text("DELETE FROM Socios_Busqueda_Trigramas"))
+    filas = conexion.execute(text("SELECT ID, Nombre, Apellido_Paterno, Apellido_Materno FROM Socios")).all()
+    registros = [{"id": fila[0], "texto": texto_indexable(fila[1], fila[2], fila[3])} for fila in filas]
+    if registros:
+        conexion.execute(text("INSERT INTO Socios_Busqueda (rowid, Texto) VALUES (:id, :texto)"), registros)
+        conexion.execute(text("INSERT INTO Socios_Busqueda_Trigramas (rowid, Texto) VALUES (:id, :texto)"), registros)
+
+
+def buscar_ids(conexion, texto_busqueda: str, limite: int = 20) -> list[int]:
+    """
+    Devuelve los IDs de socios ordenados por relevancia.
+    Primero intenta por prefijo de cada palabra; si no hay resultados, recurre a trigramas
+    y filtra los candidatos por similitud para tolerar errores de escritura.
+    """
+    palabras = normalizar_texto(texto_busqueda).split()
+    if not palabras:
+        return []
+
+    # 1) Todas las palabras deben coincidir como prefijo ("jo per" -> "jose perez")
+    consulta_prefijos = " AND ".join(f'"{palabra}"*' for palabra in palabras)
+    ids = conexion.execute(
+        text("SELECT rowid FROM Socios_Busqueda WHERE Socios_Busqueda MATCH :consulta ORDER BY rank LIMIT :limite"),
+        {"consulta": consulta_prefijos, "limite": limite}
+    ).scalars().all()
+    if ids:
+        return list(ids)
+
+    # 2) Búsqueda difusa: candidatos que comparten trigramas, ordenados por similitud real
+    trigramas = {palabra[i:i + 3] for palabra in palabras if len(palabra) >= 3 for i in range(len(palabra) - 2)}
+    if not trigramas:
+        return []
+    consulta_trigramas = " OR ".join(f'"{trigrama}"' for trigrama in sorted(trigramas))
+    candidatos = conexion.execute(
+        text("SELECT rowid, Texto FROM Socios_Busqueda_Trigramas WHERE Socios_Busqueda_Trigramas MATCH :consulta "
+             "ORDER BY rank LIMIT :limite"),
+        {"consulta": consulta_trigramas, "limite": limite * 10}
+    ).all()
+
+    puntuados = []
+    for socio_id, texto_socio in candidatos:
+        puntaje = _similitud(palabras, texto_socio.split())
+        if puntaje >= UMBRAL_SIMILITUD:
+            puntuados.append((puntaje, socio_id))
+    puntuados.sort(key=lambda par: par[0], reverse=True)
+    return [socio_id for _, socio_id in puntuados[:limite]]
+
+
+def _similitud(palabras_busqueda: list[str], palabras_socio: list[str]) -> float:
+    """Promedio, por palabra buscada, de la mejor similitud contra las palabras del nombre del socio."""
+    if not palabras_socio:
+        return 0.0
+    total = 0.0
+    for palabra in palabras_busqueda:
+        total += max(SequenceMatcher(None, palabra, candidata[:len(palabra) + 2]).ratio() for candidata in palabras_socio)
+    return total / len(palabras_busqueda)
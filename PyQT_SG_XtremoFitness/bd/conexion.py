@@ -1,5 +1,68 @@
 import sqlalchemy as db
+from sqlalchemy import event
+
+from bd.instrumentacion import instrumentacion, instrumentacion_activada
+
+# --- PERFIL DE AJUSTE PARA SQLITE ---
+# Cada conexión nueva del pool recibe estos PRAGMAs. Con el diario WAL las lecturas
+# (búsquedas de QR/huella en Accesos) ya no quedan bloqueadas mientras Pagos confirma
+# una renovación, y el busy_timeout hace que un escritor espere en lugar de fallar
+# con "database is locked".
+PERFIL_SQLITE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",        # Seguro con WAL; sólo se pierde la última transacción si se va la luz
+    "mmap_size": 256 * 1024 * 1024, # 256 MB de lectura mapeada en memoria
+    "cache_size": -64000,           # Negativo = KiB (aprox. 64 MB de caché de páginas)
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,           # Milisegundos de espera ante un bloqueo de escritura
+}
+
+
+def aplicar_perfil_sqlite(engine_destino, perfil: dict):
+    """Registra un hook 'connect' que aplica el perfil de PRAGMAs a cada conexión nueva."""
+
+    @event.listens_for(engine_destino, "connect")
+    def _al_conectar(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, valor in perfil.items():
+                cursor.execute(f"PRAGMA {pragma}={valor}")
+        finally:
+            cursor.close()
+
+    return engine_destino
+
+
+def crear_engine(url: str = 'sqlite:///bd/xtremo.sqlite', perfil: dict | None = None, echo: bool = False):
+    """Crea un engine de SQLite con el perfil de ajuste indicado (por defecto PERFIL_SQLITE)."""
+    nuevo_engine = db.create_engine(url, echo=echo, future=True)
+    return aplicar_perfil_sqlite(nuevo_engine, PERFIL_SQLITE if perfil is None else perfil)
+
 
 # Creamos el engine UNA SOLA VEZ para que toda la aplicación lo comparta.
 # echo=False es mejor para el uso normal, para no llenar la consola de texto.
-engine = db.create_engine('sqlite:///bd/xtremo.sqlite', echo=False, future=True)
\ No newline at end of file
+engine = crear_engine()
+
+# --- INSTRUMENTACIÓN DE SENTENCIAS ---
+# Latencias, filas y método de servicio de cada consulta; detecta N+1 y joinedload cartesianos.
+# Sólo para diagnóstico: se activa con XTREMO_SQL_INSTRUMENTACION=1 (ver bd/instrumentacion.py).
+if instrumentacion_activada():
+    instrumentacion.instalar(engine)
+
+
+# --- ENGINE ASÍNCRONO (aiosqlite) ---
+# Lo usan los servicios async (demonio de accesos, endpoints de red). Se crea en el primer uso
+# para que la aplicación de escritorio no necesite aiosqlite instalado.
+_engine_async = None
+
+
+def obtener_engine_async():
+    """Engine async sobre la misma base y con el mismo perfil de PRAGMAs que 'engine'."""
+    global _engine_async
+    if _engine_async is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        _engine_async = create_async_engine(engine.url.set(drivername="sqlite+aiosqlite"))
+        aplicar_perfil_sqlite(_engine_async.sync_engine, PERFIL_SQLITE)
+        if instrumentacion_activada():
+            instrumentacion.instalar(_engine_async.sync_engine)
+    return _engine_async
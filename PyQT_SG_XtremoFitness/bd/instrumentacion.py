@@ -0,0 +1,329 @@
+"""
+Instrumentación de las sentencias SQL que emite la aplicación.
+
+Se engancha a los eventos before/after_cursor_execute del engine compartido (bd.conexion) y
+registra, por sentencia normalizada:
+  - cuántas veces se ejecutó, tiempo total/máximo y un histograma de latencias;
+  - filas devueltas (contadas al leerlas del cursor de sqlite3);
+  - qué método de servicio la originó (p. ej. "ServiciosSocio.obtener_socio_por_id"; en la capa
+    async la pila no llega a la corrutina y se reporta la función síncrona más cercana).
+Además marca dos patrones costosos:
+  - N+1: la misma SELECT repetida UMBRAL_N_MAS_1 veces o más mientras una sesión tiene
+    la conexión (típico de una relación perezosa recorrida dentro de un for);
+  - producto cartesiano de joinedload: una SELECT del ORM con joinedload de una colección que
+    devuelve muchas más filas que entidades distintas (cada socio repetido una vez por cada
+    membresía del historial, por ejemplo).
+
+Variables de entorno:
+  XTREMO_SQL_INSTRUMENTACION=1   activa los hooks (desactivados por defecto: cada sentencia
+                                 recorre la pila y cada fila leída pasa por un callback de Python)
+  XTREMO_SQL_LENTAS_MS=50        imprime cada sentencia que tarde al menos ese tiempo
+
+Las estadísticas se vuelcan a ARCHIVO_ESTADISTICAS al cerrar la aplicación. Para verlas:
+    python -m bd.instrumentacion                 # reporte del último volcado
+    python -m bd.instrumentacion --limite 50     # más sentencias en el reporte
+"""
+import bisect
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from sqlalchemy import event
+
+ARCHIVO_ESTADISTICAS = os.path.join("bd", "estadisticas_sql.json")
+
+# Límites superiores (ms) de las cubetas del histograma; la última cubeta es "más de 1 s"
+CUBETAS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+UMBRAL_N_MAS_1 = 10              # Repeticiones de la misma SELECT en una sesión para marcarla como N+1
+FACTOR_CARTESIANO = 3.0          # Filas por entidad distinta a partir del cual se marca un joinedload
+MIN_FILAS_CARTESIANO = 50        # Por debajo de estas filas no vale la pena marcarlo
+
+_ESPACIOS = re.compile(r"\s+")
+_LISTA_PARAMETROS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_MODULOS_INTERNOS = ("sqlalchemy", "bd.instrumentacion", "bd.conexion", "threading", "greenlet", "asyncio")
+
+
+_normalizadas = {}             # sentencia tal cual -> normalizada (SQLAlchemy reutiliza las compiladas)
+MAX_NORMALIZADAS = 2000
+
+
+def normalizar_sentencia(sql: str) -> str:
+    """Colapsa espacios y las listas 'IN (?, ?, ...)' para agrupar la misma consulta con distinto nº de IDs."""
+    normalizada = _normalizadas.get(sql)
+    if normalizada is None:
+        if len(_normalizadas) >= MAX_NORMALIZADAS:
+            _normalizadas.clear()
+        normalizada = _normalizadas[sql] = _LISTA_PARAMETROS.sub("IN (?, ...)", _ESPACIOS.sub(" ", sql).strip())
+    return normalizada
+
+
+def identificar_llamador(marco) -> str:
+    """
+    Método de servicio más externo en la pila (p. ej. "ServiciosSocio.registrar_socio_con_membresia"
+    aunque la SELECT la emita ServiciosMembresia por dentro). Si la sentencia no viene de
+    aplicacion/, devuelve la primera función fuera de SQLAlchemy (un formulario, bd.busqueda, ...).
+    """
+    servicio = None
+    respaldo = None
+    while marco is not None:
+        modulo = marco.f_globals.get("__name__", "")
+        codigo = marco.f_code
+        if modulo.startswith("aplicacion."):
+            servicio = getattr(codigo, "co_qualname", codigo.co_name)
+        elif respaldo is None and modulo and not modulo.startswith(_MODULOS_INTERNOS):
+            respaldo = f"{modulo}.{getattr(codigo, 'co_qualname', codigo.co_name)}"
+        marco = marco.f_back
+    return servicio or respaldo or "?"
+
+
+def _carga_colecciones_con_join(context) -> bool:
+    """True si la SELECT del ORM trae una colección con joinedload (varias filas por entidad)."""
+    estado = getattr(getattr(context, "compiled", None), "compile_state", None)
+    return bool(getattr(estado, "multi_row_eager_loaders", False))
+
+
+class _Ejecucion:
+    """Una ejecución en curso: sus filas se cuentan mientras alguien las lee del cursor."""
+    __slots__ = ("estadistica", "llamador", "filas", "primeras_columnas")
+
+    def __init__(self, estadistica, llamador: str, con_colecciones: bool):
+        self.estadistica = estadistica
+        self.llamador = llamador
+        self.filas = 0
+        # Valores distintos de la primera columna (la PK de la entidad principal en las SELECT del ORM)
+        self.primeras_columnas = set() if con_colecciones else None
+
+    def contar_fila(self, cursor, fila):
+        self.filas += 1
+        if self.primeras_columnas is not None:
+            self.primeras_columnas.add(fila[0])
+        return fila
+
+
+class EstadisticaSentencia:
+    __slots__ = ("sql", "ejecuciones", "tiempo_total", "tiempo_max", "filas", "histograma", "llamadores")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.ejecuciones = 0
+        self.tiempo_total = 0.0
+        self.tiempo_max = 0.0
+        self.filas = 0
+        self.histograma = [0] * (len(CUBETAS_MS) + 1)
+        self.llamadores = {}
+
+    def percentil(self, p: float) -> float:
+        """Aproximación del percentil p (0-100) en ms: el límite superior de la cubeta donde cae."""
+        objetivo = self.ejecuciones * p / 100
+        acumulado = 0
+        for i, cantidad in enumerate(self.histograma):
+            acumulado += cantidad
+            if acumulado >= objetivo and cantidad:
+                maximo = self.tiempo_max * 1000
+                return min(CUBETAS_MS[i], maximo) if i < len(CUBETAS_MS) else maximo
+        return 0.0
+
+    def como_dict(self) -> dict:
+        return {
+            "sql": self.sql,
+            "ejecuciones": self.ejecuciones,
+            "tiempo_total_ms": round(self.tiempo_total * 1000, 3),
+            "tiempo_max_ms": round(self.tiempo_max * 1000, 3),
+            "p50_ms": round(self.percentil(50), 3),
+            "p95_ms": round(self.percentil(95), 3),
+            "filas": self.filas,
+            "histograma": self.histograma,
+            "llamadores": self.llamadores,
+        }
+
+
+class Instrumentacion:
+    """
+    Acumula estadísticas de las sentencias de uno o varios engines (ver instalar()).
+    Es segura entre hilos: el ejecutor de consultas de los formularios y el programador de
+    respaldos comparten el engine.
+    """
+
+    def __init__(self, umbral_lento_ms: float | None = None, umbral_n_mas_1: int = UMBRAL_N_MAS_1,
+                 factor_cartesiano: float = FACTOR_CARTESIANO, min_filas_cartesiano: int = MIN_FILAS_CARTESIANO):
+        self.umbral_lento_ms = umbral_lento_ms
+        self.umbral_n_mas_1 = umbral_n_mas_1
+        self.factor_cartesiano = factor_cartesiano
+        self.min_filas_cartesiano = min_filas_cartesiano
+        self._lock = threading.Lock()
+        self._sentencias = {}      # sql normalizada -> EstadisticaSentencia
+        self._n_mas_1 = {}         # (llamador, sql) -> {"sesiones": n, "max_repeticiones": n}
+        self._cartesianos = {}     # (llamador, sql) -> {"ejecuciones": n, "max_filas": n, "max_factor": x}
+        self._inicio = time.time()
+
+    # --- ENGANCHE AL ENGINE ---
+    def instalar(self, engine_destino):
+        """Registra los hooks en el engine (para el async, pasar engine_async.sync_engine)."""
+        event.listen(engine_destino, "before_cursor_execute", self._antes_de_ejecutar)
+        event.listen(engine_destino, "after_cursor_execute", self._despues_de_ejecutar)
+        event.listen(engine_destino, "checkin", self._al_devolver_conexion)
+        return engine_destino
+
+    def _antes_de_ejecutar(self, conn, cursor, statement, parameters, context, executemany):
+        info = conn.info
+        self._cerrar_ejecucion(info)
+        info["instr_inicio"] = time.perf_counter()
+
+    def _despues_de_ejecutar(self, conn, cursor, statement, parameters, context, executemany):
+        transcurrido = time.perf_counter() - conn.info.pop("instr_inicio", time.perf_counter())
+        sql = normalizar_sentencia(statement)
+        llamador = identificar_llamador(sys._getframe(1))
+        es_select = sql[:6].upper() == "SELECT"
+
+        with self._lock:
+            estadistica = self._sentencias.get(sql)
+            if estadistica is None:
+                estadistica = self._sentencias[sql] = EstadisticaSentencia(sql)
+            estadistica.ejecuciones += 1
+            estadistica.tiempo_total += transcurrido
+            estadistica.tiempo_max = max(estadistica.tiempo_max, transcurrido)
+            estadistica.histograma[bisect.bisect_left(CUBETAS_MS, transcurrido * 1000)] += 1
+            estadistica.llamadores[llamador] = estadistica.llamadores.get(llamador, 0) + 1
+
+        if es_select:
+            # Repeticiones por sesión: se revisan al devolver la conexión al pool
+            repeticiones = conn.info.setdefault("instr_repeticiones", {})
+            clave = (llamador, sql)
+            repeticiones[clave] = repeticiones.get(clave, 0) + 1
+            if not executemany and isinstance(cursor, sqlite3.Cursor):
+                ejecucion = _Ejecucion(estadistica, llamador, _carga_colecciones_con_join(context))
+                cursor.row_factory = ejecucion.contar_fila
+                conn.info["instr_ejecucion"] = ejecucion
+
+        if self.umbral_lento_ms is not None and transcurrido * 1000 >= self.umbral_lento_ms:
+            print(f"Consulta lenta ({transcurrido * 1000:.1f} ms) desde {llamador}: {sql[:300]}")
+
+    def _cerrar_ejecucion(self, info: dict):
+        """Suma las filas leídas de la ejecución anterior de esta conexión y revisa si es un cartesiano."""
+        ejecucion = info.pop("instr_ejecucion", None)
+        if ejecucion is None:
+            return
+        with self._lock:
+            ejecucion.estadistica.filas += ejecucion.filas
+            distintas = ejecucion.primeras_columnas
+            if distintas and ejecucion.filas >= self.min_filas_cartesiano:
+                factor = ejecucion.filas / len(distintas)
+                if factor >= self.factor_cartesiano:
+                    clave = (ejecucion.llamador, ejecucion.estadistica.sql)
+                    registro = self._cartesianos.get(clave)
+                    if registro is None:
+                        registro = self._cartesianos[clave] = {"ejecuciones": 0, "max_filas": 0, "max_factor": 0.0}
+                        print(f"Posible producto cartesiano en {ejecucion.llamador}: {ejecucion.filas} filas "
+                              f"para {len(distintas)} entidades ({factor:.1f} filas por entidad)")
+                    registro["ejecuciones"] += 1
+                    registro["max_filas"] = max(registro["max_filas"], ejecucion.filas)
+                    registro["max_factor"] = round(max(registro["max_factor"], factor), 2)
+
+    def _al_devolver_conexion(self, dbapi_connection, connection_record):
+        info = connection_record.info
+        self._cerrar_ejecucion(info)
+        repeticiones = info.pop("instr_repeticiones", None)
+        if not repeticiones:
+            return
+        with self._lock:
+            for clave, veces in repeticiones.items():
+                if veces < self.umbral_n_mas_1:
+                    continue
+                registro = self._n_mas_1.get(clave)
+                if registro is None:
+                    registro = self._n_mas_1[clave] = {"sesiones": 0, "max_repeticiones": 0}
+                    print(f"Posible N+1 en {clave[0]}: la misma consulta se ejecutó {veces} veces "
+                          f"en una sesión: {clave[1][:200]}")
+                registro["sesiones"] += 1
+                registro["max_repeticiones"] = max(registro["max_repeticiones"], veces)
+
+    # --- CONSULTA Y VOLCADO ---
+    def instantanea(self) -> dict:
+        """Copia serializable (JSON) de todo lo acumulado."""
+        with self._lock:
+            return {
+                "desde": self._inicio,
+                "hasta": time.time(),
+                "cubetas_ms": list(CUBETAS_MS),
+                "sentencias": [e.como_dict() for e in self._sentencias.values()],
+                "n_mas_1": [{"llamador": ll, "sql": sql, **datos} for (ll, sql), datos in self._n_mas_1.items()],
+                "cartesianos": [{"llamador": ll, "sql": sql, **datos} for (ll, sql), datos in self._cartesianos.items()],
+            }
+
+    def reiniciar(self):
+        with self._lock:
+            self._sentencias.clear()
+            self._n_mas_1.clear()
+            self._cartesianos.clear()
+            self._inicio = time.time()
+
+    def volcar(self, ruta: str = ARCHIVO_ESTADISTICAS) -> str:
+        """Escribe la instantánea en 'ruta' (JSON) y devuelve la ruta."""
+        datos = self.instantanea()
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, ensure_ascii=False, indent=1)
+        os.replace(temporal, ruta)
+        return ruta
+
+    def reporte(self, limite: int = 20) -> str:
+        return formatear_reporte(self.instantanea(), limite)
+
+
+def formatear_reporte(datos: dict, limite: int = 20) -> str:
+    """Texto legible de una instantánea: sentencias por tiempo total, N+1 y cartesianos."""
+    sentencias = sorted(datos["sentencias"], key=lambda s: s["tiempo_total_ms"], reverse=True)
+    lineas = [f"{len(sentencias)} sentencias distintas, "
+              f"{sum(s['ejecuciones'] for s in sentencias)} ejecuciones, "
+              f"{sum(s['tiempo_total_ms'] for s in sentencias):,.1f} ms en total", ""]
+    for s in sentencias[:limite]:
+        llamadores = ", ".join(f"{ll} ({n})" for ll, n in
+                               sorted(s["llamadores"].items(), key=lambda par: par[1], reverse=True)[:3])
+        lineas.append(f"{s['tiempo_total_ms']:>10,.1f} ms  {s['ejecuciones']:>7}x  "
+                      f"p50 {s['p50_ms']:g} ms  p95 {s['p95_ms']:g} ms  máx {s['tiempo_max_ms']:,.1f} ms  "
+                      f"filas {s['filas']:,}")
+        lineas.append(f"    {s['sql'][:160]}")
+        lineas.append(f"    desde: {llamadores}")
+    if datos["n_mas_1"]:
+        lineas += ["", "Posibles N+1:"]
+        for registro in datos["n_mas_1"]:
+            lineas.append(f"  {registro['llamador']}: hasta {registro['max_repeticiones']} repeticiones "
+                          f"({registro['sesiones']} sesiones)  {registro['sql'][:120]}")
+    if datos["cartesianos"]:
+        lineas += ["", "Posibles productos cartesianos (joinedload):"]
+        for registro in datos["cartesianos"]:
+            lineas.append(f"  {registro['llamador']}: hasta {registro['max_filas']} filas, "
+                          f"{registro['max_factor']} filas por entidad ({registro['ejecuciones']} veces)  "
+                          f"{registro['sql'][:120]}")
+    return "\n".join(lineas)
+
+
+def _umbral_lento_desde_entorno() -> float | None:
+    valor = os.environ.get("XTREMO_SQL_LENTAS_MS")
+    try:
+        return float(valor) if valor else None
+    except ValueError:
+        print(f"XTREMO_SQL_LENTAS_MS no es un número: {valor!r}; se ignora")
+        return None
+
+
+# Instancia compartida; bd.conexion la instala en sus engines si está activada
+instrumentacion = Instrumentacion(umbral_lento_ms=_umbral_lento_desde_entorno())
+
+
+def instrumentacion_activada() -> bool:
+    return os.environ.get("XTREMO_SQL_INSTRUMENTACION", "0") == "1"
+
+
+if __name__ == '__main__':
+    ruta = ARCHIVO_ESTADISTICAS
+    limite = int(sys.argv[sys.argv.index("--limite") + 1]) if "--limite" in sys.argv else 20
+    if not os.path.isfile(ruta):
+        print(f"No hay estadísticas guardadas en {ruta} (se generan al cerrar la aplicación)")
+    else:
+        with open(ruta, encoding="utf-8") as archivo:
+            print(formatear_reporte(json.load(archivo), limite))
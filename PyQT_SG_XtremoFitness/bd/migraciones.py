@@ -0,0 +1,173 @@
+"""
+Migraciones versionadas del esquema de xtremo.sqlite.
+
+La versión aplicada se guarda en 'PRAGMA user_version', de modo que una base en
+producción sólo recibe las migraciones que le faltan. Cada migración corre en su
+propia transacción (BEGIN explícito, ver _transaccion_explicita) junto con el cambio de versión:
+si falla, también se deshacen sus CREATE TABLE/INDEX y la base queda como estaba.
+
+Uso desde consola (con la aplicación abierta o cerrada):
+    python -m bd.migraciones            # aplica las pendientes
+    python -m bd.migraciones --estado   # sólo muestra la versión actual
+"""
+import sys
+from contextlib import contextmanager
+from sqlalchemy import text
+
+from bd.conexion import engine
+from bd import busqueda, resumenes
+from dominio.modelos import (AccesoModel, MembresiaModel, MembresiaVigenteModel, PagoModel, PlanModel, SocioModel,
+                             ResumenDiarioModel, ResumenEstatusModel, ResumenIngresosPlanModel)
+
+
+# --- MIGRACIONES ---
+# Regla: cada migración debe poder ejecutarse sobre una base creada desde cero y sobre una
+# base heredada del antiguo build_db.py (por eso se usa checkfirst / IF NOT EXISTS).
+
+def _m001_esquema_inicial(conexion):
+    """Tablas base (equivalente al antiguo create_all de build_db.py)."""
+    for tabla in (SocioModel.__table__, PlanModel.__table__, MembresiaModel.__table__):
+        tabla.create(conexion, checkfirst=True)
+
+
+def _m002_indices_membresias(conexion):
+    """Índices para la membresía vigente por socio, vencimientos y joins con Planes."""
+    for indice in MembresiaModel.__table__.indexes:
+        indice.create(conexion, checkfirst=True)
+    conexion.execute(text("ANALYZE Membresias"))
+
+
+def _m003_membresias_vigentes(conexion):
+    """Proyección con la membresía más reciente de cada socio, poblada desde el historial."""
+    MembresiaVigenteModel.__table__.create(conexion, checkfirst=True)
+    for indice in MembresiaVigenteModel.__table__.indexes:
+        indice.create(conexion, checkfirst=True)
+    reconstruir_membresias_vigentes(conexion)
+
+
+def reconstruir_membresias_vigentes(conexion):
+    """Recalcula Membresias_Vigentes desde Membresias (la de Fecha_Fin mayor; a igualdad, la más nueva)."""
+    conexion.execute(text("DELETE FROM Membresias_Vigentes"))
+    conexion.execute(text("""
+        INSERT INTO Membresias_Vigentes (Socio_ID, Membresia_ID, Fecha_Fin)
+        SELECT m.Socio_ID, m.ID, m.Fecha_Fin
+        FROM Membresias m
+        WHERE m.ID = (
+            SELECT m2.ID FROM Membresias m2
+            WHERE m2.Socio_ID = m.Socio_ID
+            ORDER BY m2.Fecha_Fin DESC, m2.ID DESC
+            LIMIT 1
+        )
+    """))
+
+
+def _m004_indice_busqueda(conexion):
+    """Índice FTS5 de nombres de socios (prefijos + trigramas), poblado desde Socios."""
+    busqueda.crear_tablas_busqueda(conexion)
+    busqueda.reconstruir_indice(conexion)
+
+
+def _m005_indice_nombre_socios(conexion):
+    """Índice (Nombre, Apellido_Paterno, ID) para el listado paginado ordenado por nombre."""
+    for indice in SocioModel.__table__.indexes:
+        indice.create(conexion, checkfirst=True)
+
+
+def _m006_bitacora_accesos(conexion):
+    """Tabla Accesos con sus índices por marca de tiempo y por socio."""
+    AccesoModel.__table__.create(conexion, checkfirst=True)
+    for indice in AccesoModel.__table__.indexes:
+        indice.create(conexion, checkfirst=True)
+
+
+def _m007_libro_pagos(conexion):
+    """
+    Tabla Pagos con sus índices. Las membresías anteriores se registran con el precio y nombre
+    actuales de su plan y la fecha de inicio como fecha de pago (lo más cercano que se conoce).
+    Membresia_ID admite NULL (ON DELETE SET NULL): el pago se conserva aunque se elimine el socio.
+    """
+    PagoModel.__table__.create(conexion, checkfirst=True)
+    for indice in PagoModel.__table__.indexes:
+        indice.create(conexion, checkfirst=True)
+    conexion.execute(text("""
+        INSERT INTO Pagos (Membresia_ID, Socio_ID, Plan_ID, Plan_Nombre, Monto, Fecha_Hora)
+        SELECT m.ID, m.Socio_ID, m.Plan_ID, p.Nombre, p.Precio, m.Fecha_Inicio || ' 00:00:00.000000'
+        FROM Membresias m
+        JOIN Planes p ON p.ID = m.Plan_ID
+        WHERE NOT EXISTS (SELECT 1 FROM Pagos WHERE Pagos.Membresia_ID = m.ID)
+    """))
+    conexion.execute(text("ANALYZE Pagos"))
+
+
+def _m008_resumenes_diarios(conexion):
+    """
+    Tablas de resúmenes del tablero, con altas, renovaciones e ingresos calculados desde Pagos.
+    La foto de estatus del día la toma ServiciosResumen en su primera consulta.
+    """
+    for tabla in (ResumenDiarioModel.__table__, ResumenIngresosPlanModel.__table__, ResumenEstatusModel.__table__):
+        tabla.create(conexion, checkfirst=True)
+    resumenes.reconstruir_diarios(conexion)
+
+
+MIGRACIONES = [
+    (1, "Esquema inicial", _m001_esquema_inicial),
+    (2, "Índices de Membresias (Socio_ID, Fecha_Fin DESC), (Fecha_Fin), (Plan_ID)", _m002_indices_membresias),
+    (3, "Tabla Membresias_Vigentes", _m003_membresias_vigentes),
+    (4, "Índice de búsqueda de socios (FTS5)", _m004_indice_busqueda),
+    (5, "Índice de Socios por nombre", _m005_indice_nombre_socios),
+    (6, "Bitácora de accesos", _m006_bitacora_accesos),
+    (7, "Libro de pagos", _m007_libro_pagos),
+    (8, "Resúmenes diarios del tablero", _m008_resumenes_diarios),
+]
+
+
+@contextmanager
+def _transaccion_explicita(engine_destino):
+    """
+    Conexión con BEGIN ... COMMIT propios. En su modo por defecto pysqlite confirma solo cada
+    sentencia DDL, así que engine.begin() no protegería los CREATE de una migración que falla a
+    medias; en AUTOCOMMIT el driver no abre ni cierra transacciones y el BEGIN explícito las cubre.
+    """
+    with engine_destino.connect() as conexion:
+        conexion.execution_options(isolation_level="AUTOCOMMIT")
+        conexion.exec_driver_sql("BEGIN")
+        try:
+            yield conexion
+        except BaseException:
+            conexion.exec_driver_sql("ROLLBACK")
+            raise
+        conexion.exec_driver_sql("COMMIT")
+
+
+def obtener_version(engine_destino=engine) -> int:
+    """Devuelve la versión de esquema registrada en la base."""
+    with engine_destino.connect() as conexion:
+        return conexion.execute(text("PRAGMA user_version")).scalar()
+
+
+def aplicar_migraciones(engine_destino=engine) -> list[int]:
+    """
+    Aplica en orden las migraciones pendientes.
+    Devuelve la lista de versiones aplicadas (vacía si la base ya estaba al día).
+    """
+    aplicadas = []
+    version_actual = obtener_version(engine_destino)
+    for version, descripcion, migracion in MIGRACIONES:
+        if version <= version_actual:
+            continue
+        try:
+            with _transaccion_explicita(engine_destino) as conexion:
+                migracion(conexion)
+                conexion.execute(text(f"PRAGMA user_version = {version}"))
+        except Exception as e:
+            raise Exception(f"Error al aplicar la migración {version} ({descripcion}): {e}")
+        print(f"Migración {version} aplicada: {descripcion}")
+        aplicadas.append(version)
+    return aplicadas
+
+
+if __name__ == '__main__':
+    if "--estado" in sys.argv:
+        print(f"Versión del esquema: {obtener_version()} (última disponible: {MIGRACIONES[-1][0]})")
+    else:
+        aplicar_migraciones()
@@ -0,0 +1,197 @@
+"""
+Respaldos en caliente de xtremo.sqlite con la API de respaldo en línea de SQLite.
+
+La copia se hace por bloques de páginas con una pausa entre bloques, así que la aplicación
+puede seguir leyendo y escribiendo (Accesos sigue atendiendo escaneos) mientras se respalda.
+Si otra conexión escribe durante la copia, SQLite la reinicia; tras MAX_REINICIOS reinicios se
+hace la copia restante en un solo paso (con WAL eso no bloquea a quienes escriben).
+Cada respaldo se escribe primero en un archivo temporal, se verifica con
+'PRAGMA integrity_check' y sólo entonces se renombra a su nombre final; después se
+eliminan los más antiguos para conservar únicamente RESPALDOS_CONSERVADOS.
+
+Uso desde consola:
+    python -m bd.respaldo                        # crea un respaldo ahora
+    python -m bd.respaldo --listar               # muestra los respaldos disponibles
+    python -m bd.respaldo --verificar ARCHIVO    # revisa la integridad de un respaldo
+    python -m bd.respaldo --restaurar ARCHIVO    # restaura (con la aplicación cerrada)
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from bd.conexion import engine
+
+CARPETA_RESPALDOS = os.path.join("bd", "respaldos")
+RESPALDOS_CONSERVADOS = 7
+INTERVALO_RESPALDO_HORAS = 24
+PAGINAS_POR_PASO = 256        # Páginas copiadas por paso (4 KiB cada una con el tamaño por defecto)
+PAUSA_ENTRE_PASOS = 0.02      # Segundos que se cede la base a la aplicación entre pasos
+MAX_REINICIOS = 3
+PREFIJO_RESPALDO = "xtremo_"
+
+
+class _CopiaReiniciada(Exception):
+    """La copia por pasos se reinició demasiadas veces por escrituras concurrentes."""
+
+
+def ruta_base_datos(engine_origen=engine) -> str:
+    return engine_origen.url.database
+
+
+def verificar_respaldo(ruta_respaldo: str) -> tuple[bool, str]:
+    """Ejecuta 'PRAGMA integrity_check' sobre el archivo. Devuelve (es_valido, mensaje)."""
+    if not os.path.isfile(ruta_respaldo):
+        return False, f"No existe el archivo {ruta_respaldo}"
+    conexion = sqlite3.connect(f"file:{ruta_respaldo}?mode=ro", uri=True)
+    try:
+        resultado = [fila[0] for fila in conexion.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        return False, f"El archivo no es una base de datos válida: {e}"
+    finally:
+        conexion.close()
+    if resultado == ["ok"]:
+        return True, "Respaldo íntegro"
+    return False, "; ".join(resultado[:5])
+
+
+def crear_respaldo(carpeta: str = CARPETA_RESPALDOS, engine_origen=engine,
+                   paginas_por_paso: int = PAGINAS_POR_PASO, al_avanzar=None) -> str:
+    """
+    Copia la base en caliente a 'carpeta' y devuelve la ruta del respaldo verificado.
+    al_avanzar(restantes, total) se llama después de cada paso (útil para una barra de progreso).
+    Lanza Exception si la copia falla o el respaldo no pasa la verificación.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    nombre = f"{PREFIJO_RESPALDO}{datetime.now().strftime('%Y%m%d_%H%M%S')}.sqlite"
+    ruta_final = os.path.join(carpeta, nombre)
+    ruta_temporal = ruta_final + ".tmp"
+
+    origen = sqlite3.connect(ruta_base_datos(engine_origen), timeout=5)
+    destino = sqlite3.connect(ruta_temporal)
+    try:
+        estado = {"restantes": None, "reinicios": 0}
+
+        def progreso(_, restantes, total):
+            # Si quedan más páginas que en el paso anterior, otra conexión escribió y la copia volvió a empezar
+            if estado["restantes"] is not None and restantes > estado["restantes"]:
+                estado["reinicios"] += 1
+                if estado["reinicios"] > MAX_REINICIOS:
+                    raise _CopiaReiniciada()
+            estado["restantes"] = restantes
+            if al_avanzar:
+                al_avanzar(restantes, total)
+            time.sleep(PAUSA_ENTRE_PASOS)  # Cede la base a la aplicación entre pasos
+
+        try:
+            origen.backup(destino, pages=paginas_por_paso, progress=progreso)
+        except _CopiaReiniciada:
+            origen.backup(destino)
+        # El respaldo queda como un solo archivo autocontenido (sin -wal/-shm)
+        destino.execute("PRAGMA journal_mode=DELETE")
+    except Exception:
+        destino.close()
+        os.remove(ruta_temporal)
+        raise
+    finally:
+        destino.close()
+        origen.close()
+
+    es_valido, mensaje = verificar_respaldo(ruta_temporal)
+    if not es_valido:
+        os.remove(ruta_temporal)
+        raise Exception(f"El respaldo no pasó la verificación de integridad: {mensaje}")
+    os.replace(ruta_temporal, ruta_final)
+    return ruta_final
+
+
+def listar_respaldos(carpeta: str = CARPETA_RESPALDOS) -> list[str]:
+    """Rutas de los respaldos existentes, del más antiguo al más reciente."""
+    if not os.path.isdir(carpeta):
+        return []
+    nombres = sorted(nombre for nombre in os.listdir(carpeta)
+                     if nombre.startswith(PREFIJO_RESPALDO) and nombre.endswith(".sqlite"))
+    return [os.path.join(carpeta, nombre) for nombre in nombres]
+
+
+def rotar_respaldos(carpeta: str = CARPETA_RESPALDOS, conservar: int = RESPALDOS_CONSERVADOS) -> list[str]:
+    """Elimina los respaldos más antiguos dejando sólo los 'conservar' más recientes. Devuelve los eliminados."""
+    respaldos = listar_respaldos(carpeta)
+    eliminados = respaldos[:-conservar] if conservar > 0 else respaldos
+    for ruta in eliminados:
+        os.remove(ruta)
+    return eliminados
+
+
+def restaurar_respaldo(ruta_respaldo: str, engine_destino=engine):
+    """
+    Reemplaza el contenido de la base por el del respaldo (verificado antes de tocar nada).
+    Pensado para usarse con la aplicación cerrada; las conexiones del pool se descartan al terminar.
+    """
+    es_valido, mensaje = verificar_respaldo(ruta_respaldo)
+    if not es_valido:
+        raise Exception(f"No se restaura: {mensaje}")
+    origen = sqlite3.connect(f"file:{ruta_respaldo}?mode=ro", uri=True)
+    destino = sqlite3.connect(ruta_base_datos(engine_destino), timeout=30)
+    try:
+        origen.backup(destino)  # Copia completa en un solo paso
+    finally:
+        destino.close()
+        origen.close()
+    engine_destino.dispose()
+
+
+class ProgramadorRespaldos(threading.Thread):
+    """
+    Hilo en segundo plano que crea un respaldo cada 'intervalo_horas' y rota los antiguos.
+    El primer respaldo se hace al arrancar si el último tiene más de un intervalo de antigüedad.
+    """
+
+    def __init__(self, intervalo_horas: float = INTERVALO_RESPALDO_HORAS, carpeta: str = CARPETA_RESPALDOS,
+                 conservar: int = RESPALDOS_CONSERVADOS):
+        super().__init__(name="ProgramadorRespaldos", daemon=True)
+        self.intervalo_segundos = intervalo_horas * 3600
+        self.carpeta = carpeta
+        self.conservar = conservar
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.is_set():
+            espera = self._segundos_para_siguiente()
+            if espera > 0 and self._detener.wait(espera):
+                break
+            try:
+                ruta = crear_respaldo(self.carpeta)
+                rotar_respaldos(self.carpeta, self.conservar)
+                print(f"Respaldo creado: {ruta}")
+            except Exception as e:
+                print(f"Error al crear el respaldo programado: {e}")
+                self._detener.wait(min(self.intervalo_segundos, 600))  # Reintento en 10 minutos
+
+    def _segundos_para_siguiente(self) -> float:
+        respaldos = listar_respaldos(self.carpeta)
+        if not respaldos:
+            return 0
+        antiguedad = time.time() - os.path.getmtime(respaldos[-1])
+        return max(0.0, self.intervalo_segundos - antiguedad)
+
+    def detener(self):
+        self._detener.set()
+
+
+if __name__ == '__main__':
+    if "--listar" in sys.argv:
+        for ruta in listar_respaldos():
+            print(f"{ruta}  ({os.path.getsize(ruta) / 1024:,.0f} KiB)")
+    elif "--verificar" in sys.argv:
+        print(verificar_respaldo(sys.argv[sys.argv.index("--verificar") + 1])[1])
+    elif "--restaurar" in sys.argv:
+        ruta = sys.argv[sys.argv.index("--restaurar") + 1]
+        restaurar_respaldo(ruta)
+        print(f"Base restaurada desde {ruta}")
+    else:
+        ruta = crear_respaldo()
+        eliminados = rotar_respaldos()
+        print(f"Respaldo creado: {ruta}" + (f" ({len(eliminados)} respaldos antiguos eliminados)" if eliminados else ""))
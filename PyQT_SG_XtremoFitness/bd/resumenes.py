@@ -0,0 +1,131 @@
+"""
+Resúmenes diarios para el tablero de la página de inicio.
+
+Tres tablas (dominio/modelos.py) que el tablero lee sin recorrer Socios ni Pagos:
+  - Resumen_Diario: altas (primera membresía de un socio), renovaciones e ingresos por día;
+  - Resumen_Ingresos_Plan: ingresos por día y plan;
+  - Resumen_Estatus: socios activos / por vencer / vencidos al día.
+Los servicios las ajustan dentro de la misma transacción que la escritura (sumar_cobros,
+ajustar_estatus), así que nunca quedan a medias. Eliminar un socio sólo mueve los conteos de
+estatus: sus pagos siguen en el libro y en los ingresos de su día. Cada noche se recalculan
+desde Pagos y Membresias_Vigentes (reconstruir_diarios, reconstruir_estatus) para corregir
+cualquier diferencia y tomar la foto de estatus del nuevo día.
+"""
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import func, insert, literal, select, text
+
+from dominio.modelos import MembresiaVigenteModel, ResumenEstatusModel, SocioModel
+
+
+def sumar_cobros(conexion, cobros):
+    """
+    Suma cobros a los resúmenes diarios.
+    'cobros' son tuplas (fecha, plan_id, plan_nombre, monto, es_alta).
+    """
+    diarios = defaultdict(lambda: [0, 0, 0.0])
+    por_plan = {}
+    for fecha, plan_id, plan_nombre, monto, es_alta in cobros:
+        fecha = fecha.isoformat()
+        dia = diarios[fecha]
+        dia[0 if es_alta else 1] += 1
+        dia[2] += monto
+        registro = por_plan.setdefault((fecha, plan_id), [plan_nombre, 0, 0.0])
+        registro[0] = plan_nombre
+        registro[1] += 1
+        registro[2] += monto
+    if not diarios:
+        return
+    conexion.execute(text("""
+        INSERT INTO Resumen_Diario (Fecha, Altas, Renovaciones, Ingresos)
+        VALUES (:fecha, :altas, :renovaciones, :ingresos)
+        ON CONFLICT (Fecha) DO UPDATE SET
+            Altas = Altas + excluded.Altas,
+            Renovaciones = Renovaciones + excluded.Renovaciones,
+            Ingresos = Ingresos + excluded.Ingresos
+    """), [
+        {"fecha": fecha, "altas": altas, "renovaciones": renovaciones, "ingresos": ingresos}
+        for fecha, (altas, renovaciones, ingresos) in diarios.items()
+    ])
+    conexion.execute(text("""
+        INSERT INTO Resumen_Ingresos_Plan (Fecha, Plan_ID, Plan_Nombre, Pagos, Monto)
+        VALUES (:fecha, :plan_id, :plan_nombre, :pagos, :monto)
+        ON CONFLICT (Fecha, Plan_ID) DO UPDATE SET
+            Plan_Nombre = excluded.Plan_Nombre,
+            Pagos = Pagos + excluded.Pagos,
+            Monto = Monto + excluded.Monto
+    """), [
+        {"fecha": fecha, "plan_id": plan_id, "plan_nombre": plan_nombre, "pagos": pagos, "monto": monto}
+        for (fecha, plan_id), (plan_nombre, pagos, monto) in por_plan.items()
+    ])
+
+
+def ajustar_estatus(conexion, fecha: date, deltas: dict[str, int]):
+    """
+    Suma 'deltas' ({estatus: cambio}) a la foto de estatus de 'fecha'. Si la foto de ese día aún
+    no existe no hace nada: se calculará completa (ya con este cambio) en reconstruir_estatus.
+    """
+    cambios = [{"fecha": fecha.isoformat(), "estatus": estatus, "delta": delta} for estatus, delta in deltas.items() if delta]
+    if cambios:
+        conexion.execute(text(
+            "UPDATE Resumen_Estatus SET Socios = Socios + :delta WHERE Fecha = :fecha AND Estatus = :estatus"
+        ), cambios)
+
+
+def reconstruir_estatus(conexion, fecha: date, expresion_estatus, grupos):
+    """
+    Recalcula la foto de estatus de 'fecha' contando Socios LEFT JOIN Membresias_Vigentes agrupados
+    por 'expresion_estatus' (ServiciosMembresia.expresion_estatus). Todos los 'grupos' quedan con
+    fila, aunque sea en cero, para que ajustar_estatus siempre encuentre la suya.
+    """
+    conexion.execute(text("DELETE FROM Resumen_Estatus WHERE Fecha = :fecha"), {"fecha": fecha.isoformat()})
+    conexion.execute(
+        text("INSERT INTO Resumen_Estatus (Fecha, Estatus, Socios) VALUES (:fecha, :estatus, 0)"),
+        [{"fecha": fecha.isoformat(), "estatus": estatus} for estatus in grupos],
+    )
+    # Un solo INSERT ... SELECT: el conteo y la escritura ven el mismo estado de la base
+    conteos = (
+        select(literal(fecha), expresion_estatus, func.count())
+        .select_from(SocioModel)
+        .outerjoin(MembresiaVigenteModel, MembresiaVigenteModel.socio_id == SocioModel.id)
+        .group_by(expresion_estatus)
+    )
+    conexion.execute(
+        insert(ResumenEstatusModel).prefix_with("OR REPLACE").from_select(
+            [ResumenEstatusModel.fecha, ResumenEstatusModel.estatus, ResumenEstatusModel.socios], conteos
+        )
+    )
+
+
+def reconstruir_diarios(conexion, desde: date | None = None):
+    """
+    Recalcula Resumen_Diario y Resumen_Ingresos_Plan desde Pagos, a partir de 'desde' (todo si es None).
+    Un pago es alta si es el primero de su socio y su membresía es la primera del socio, igual que
+    en el ajuste incremental (las membresías importadas no tienen pago, pero sí cuentan como previas).
+    """
+    filtro = "WHERE p.Fecha_Hora >= :desde" if desde else ""
+    parametros = {"desde": desde.isoformat()} if desde else {}
+    conexion.execute(text(f"DELETE FROM Resumen_Diario {'WHERE Fecha >= :desde' if desde else ''}"), parametros)
+    conexion.execute(text(f"DELETE FROM Resumen_Ingresos_Plan {'WHERE Fecha >= :desde' if desde else ''}"), parametros)
+    conexion.execute(text(f"""
+        INSERT INTO Resumen_Diario (Fecha, Altas, Renovaciones, Ingresos)
+        SELECT substr(p.Fecha_Hora, 1, 10), SUM(p.Es_Alta), SUM(1 - p.Es_Alta), SUM(p.Monto)
+        FROM (
+            SELECT p.Fecha_Hora, p.Monto,
+                   NOT EXISTS (SELECT 1 FROM Pagos p2 WHERE p2.Socio_ID = p.Socio_ID AND p2.ID < p.ID)
+                   AND NOT EXISTS (SELECT 1 FROM Membresias m WHERE m.Socio_ID = p.Socio_ID AND m.ID < p.Membresia_ID) AS Es_Alta
+            FROM Pagos p {filtro}
+        ) p
+        GROUP BY 1
+    """), parametros)
+    # Plan_Nombre sin agregar junto a MAX(ID): SQLite lo toma de la fila del último pago del día
+    conexion.execute(text(f"""
+        INSERT INTO Resumen_Ingresos_Plan (Fecha, Plan_ID, Plan_Nombre, Pagos, Monto)
+        SELECT Fecha, Plan_ID, Plan_Nombre, Pagos, Monto FROM (
+            SELECT substr(p.Fecha_Hora, 1, 10) AS Fecha, p.Plan_ID, p.Plan_Nombre, MAX(p.ID),
+                   COUNT(*) AS Pagos, SUM(p.Monto) AS Monto
+            FROM Pagos p {filtro}
+            GROUP BY 1, 2
+        )
+    """), parametros)
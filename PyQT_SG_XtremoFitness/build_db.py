@@ -1,6 +1,6 @@
-import sqlalchemy as db  # Importamos SQLAlchemy para interactuar con la base de datos
 import Utilerias.generico as gen  # Importamos un módulo personalizado para funcionalidades genéricas
-import dominio.modelos as modelos  # Importamos los modelos de la base de datos
+from bd.conexion import crear_engine  # Engine con el perfil de ajuste de SQLite (WAL, caché, etc.)
+from bd.migraciones import aplicar_migraciones  # Migraciones versionadas del esquema
 
 # Nombre de la carpeta que deseas crear para almacenar la base de datos
 nombre_carpeta = "bd"
@@ -12,7 +12,7 @@ gen.crear_carpeta_si_no_existe(ruta, nombre_carpeta)
 
 # Creamos una conexión al motor de la base de datos SQLite
 # Especificamos el nombre y la ubicación del archivo de la base de datos
-engine = db.create_engine('sqlite:///bd/xtremo.sqlite', echo=True, future=True)
+engine = crear_engine('sqlite:///bd/xtremo.sqlite', echo=True)
 
-# Creamos todas las tablas definidas en nuestros modelos en la base de datos
-modelos.Base.metadata.create_all(engine)
\ No newline at end of file
+# Creamos (o actualizamos) el esquema aplicando las migraciones pendientes
+aplicar_migraciones(engine)
\ No newline at end of file
@@ -3,6 +3,7 @@ COLOR_BARRA_SUPERIOR = "#000000"
 COLOR_MENU_LATERAL = "#020202"
 COLOR_CUERPO_PRINCIPAL = "#F5F5F5"
 COLOR_MENU_CURSOR_ENCIMA = "#E53935"
+COLOR_TARJETA_RESUMEN = "#297583" # Tarjetas de altas, renovaciones e ingresos en la página de inicio
 
 #configuracion para el modulo de socios
 COLOR_TITULO = "#1A1A1A"
@@ -32,4 +33,15 @@ COLOR_TOMARFOTO = "#297583"
 COLOR_ELIMINARFOTO = "#E53935"
 COLOR_CARGARFOTO = "#297583"
 COLOR_TOMARHUELLA = "#297583"
-COLOR_ELIMINARHUELLA = "#E53935"   
\ No newline at end of file
+COLOR_ELIMINARHUELLA = "#E53935"
+
+#configuracion para los listados de socios (paginación por desplazamiento)
+TAMANO_PAGINA_SOCIOS = 100
+
+#configuracion para la bitácora de accesos
+ID_KIOSCO = 1 # Identifica esta computadora en la tabla Accesos (usar un número distinto en cada recepción)
+
+#configuracion para la identificación por huella
+MOTOR_HUELLAS = "hilos" # "hilos", "procesos" o "secuencial" (ver Utilerias/motor_huellas.py)
+TRABAJADORES_HUELLAS = None # None = un trabajador por núcleo
+TIEMPO_MAXIMO_IDENTIFICACION_MS = 5000 # Pasado este tiempo se abandona la búsqueda y se pide otra lectura
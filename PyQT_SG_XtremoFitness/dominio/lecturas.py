@@ -0,0 +1,63 @@
+"""
+Modelos de lectura para los listados.
+
+Son filas planas (con __slots__) armadas a partir de un SELECT de Core. No pasan por el
+identity map de la sesión ni tienen relaciones perezosas, así que pueden usarse después
+de cerrar la sesión sin riesgo de DetachedInstanceError.
+"""
+from datetime import date
+
+
+class FilaSocio:
+    """Fila de las tablas de socios (Form_socios / Form_pagos): datos del socio y su membresía vigente."""
+    __slots__ = ("id", "nombre", "apellido_paterno", "apellido_materno", "plan_nombre", "fecha_inicio", "fecha_fin",
+                 "estatus")
+
+    def __init__(self, id: int, nombre: str, apellido_paterno: str, apellido_materno: str | None,
+                 plan_nombre: str | None, fecha_inicio: date | None, fecha_fin: date | None,
+                 estatus: str | None = None):
+        self.id = id
+        self.nombre = nombre
+        self.apellido_paterno = apellido_paterno
+        self.apellido_materno = apellido_materno
+        self.plan_nombre = plan_nombre
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        # Grupo de estatus calculado en SQL (ESTATUS_ACTIVOS, ESTATUS_POR_VENCER o ESTATUS_VENCIDOS)
+        self.estatus = estatus
+
+    @property
+    def nombre_completo(self) -> str:
+        return f"{self.nombre} {self.apellido_paterno} {self.apellido_materno or ''}".strip()
+
+    @property
+    def tiene_membresia(self) -> bool:
+        return self.fecha_fin is not None
+
+    def __repr__(self):
+        return f"FilaSocio(id={self.id}, nombre={self.nombre_completo!r}, plan={self.plan_nombre!r}, fecha_fin={self.fecha_fin})"
+
+
+class ResumenTablero:
+    """Datos del tablero de la página de inicio, leídos de las tablas de resúmenes (ServiciosResumen)."""
+    __slots__ = ("fecha", "estatus", "altas_hoy", "renovaciones_hoy", "ingresos_hoy",
+                 "altas_mes", "renovaciones_mes", "ingresos_mes", "ingresos_por_plan")
+
+    def __init__(self, fecha: date, estatus: dict[str, int],
+                 altas_hoy: int, renovaciones_hoy: int, ingresos_hoy: float,
+                 altas_mes: int, renovaciones_mes: int, ingresos_mes: float,
+                 ingresos_por_plan: list[tuple[str, int, float]]):
+        self.fecha = fecha
+        # Socios por grupo de estatus (ESTATUS_ACTIVOS, ESTATUS_POR_VENCER, ESTATUS_VENCIDOS)
+        self.estatus = estatus
+        self.altas_hoy = altas_hoy
+        self.renovaciones_hoy = renovaciones_hoy
+        self.ingresos_hoy = ingresos_hoy
+        self.altas_mes = altas_mes
+        self.renovaciones_mes = renovaciones_mes
+        self.ingresos_mes = ingresos_mes
+        # (nombre del plan, pagos, monto) del mes en curso, de mayor a menor monto
+        self.ingresos_por_plan = ingresos_por_plan
+
+    def __repr__(self):
+        return f"ResumenTablero(fecha={self.fecha}, estatus={self.estatus}, ingresos_hoy={self.ingresos_hoy}, ingresos_mes={self.ingresos_mes})"
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, BLOB
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, Date, DateTime, ForeignKey, BLOB, Index
+from sqlalchemy.orm import declarative_base, relationship, deferred
 from datetime import datetime
 
 Base = declarative_base()
@@ -10,11 +10,18 @@ class SocioModel(Base):
     nombre = Column("Nombre", String(150), nullable=False)
     apellido_paterno = Column("Apellido_Paterno", String(150), nullable=False)
     apellido_materno = Column("Apellido_Materno", String(150))
-    foto_ruta = Column("Foto_Ruta", BLOB)
-    huella_template = Column("Huella_Template", BLOB, unique=True)
-    qr_code = Column("QR_Code", BLOB) 
+    # Los BLOBs (foto PNG, plantilla de huella y QR) se cargan diferidos: los listados sólo
+    # traen las columnas de nombre. Las consultas de detalle piden undefer_group("binarios")
+    # o undefer(...) de la columna que necesitan antes de cerrar la sesión.
+    foto_ruta = deferred(Column("Foto_Ruta", BLOB), group="binarios")
+    huella_template = deferred(Column("Huella_Template", BLOB, unique=True), group="binarios")
+    qr_code = deferred(Column("QR_Code", BLOB), group="binarios")
     
     membresias = relationship("MembresiaModel", back_populates="socio", cascade="all, delete-orphan")
+    # Proyección de la membresía vigente (una fila por socio). Se mantiene al registrar o renovar
+    # en ServiciosMembresia, así el estatus se lee sin recorrer todo el historial.
+    vigencia = relationship("MembresiaVigenteModel", uselist=False, cascade="all, delete-orphan")
+    membresia_actual = relationship("MembresiaModel", secondary="Membresias_Vigentes", uselist=False, viewonly=True)
 
 class PlanModel(Base):
     __tablename__ = "Planes"
@@ -34,4 +41,98 @@ class MembresiaModel(Base):
     fecha_fin = Column("Fecha_Fin", Date, nullable=False)
     
     socio = relationship("SocioModel", back_populates="membresias")
-    plan = relationship("PlanModel", back_populates="membresias")
\ No newline at end of file
+    plan = relationship("PlanModel", back_populates="membresias")
+    # Sin cascada de borrado: al eliminar la membresía (o al socio) el pago se conserva con
+    # Membresia_ID en NULL, para no reescribir los ingresos de meses cerrados.
+    pago = relationship("PagoModel", uselist=False, back_populates="membresia")
+
+class MembresiaVigenteModel(Base):
+    __tablename__ = "Membresias_Vigentes"
+    socio_id = Column("Socio_ID", Integer, ForeignKey("Socios.ID"), primary_key=True)
+    membresia_id = Column("Membresia_ID", Integer, ForeignKey("Membresias.ID"), nullable=False)
+    fecha_fin = Column("Fecha_Fin", Date, nullable=False) # Copia de Membresias.Fecha_Fin para filtrar por estatus sin join
+
+    membresia = relationship("MembresiaModel")
+
+class PagoModel(Base):
+    """
+    Libro de pagos: un registro por membresía cobrada, con el plan y el precio tal como estaban
+    al cobrar. Editar el precio o el nombre de un plan ya no cambia los comprobantes ni los
+    ingresos de meses anteriores. El pago sobrevive a su membresía: si ésta se elimina,
+    Membresia_ID queda en NULL y el resto de la fila sigue contando en los ingresos.
+    """
+    __tablename__ = "Pagos"
+    id = Column("ID", Integer, primary_key=True, autoincrement=True)
+    membresia_id = Column("Membresia_ID", Integer, ForeignKey("Membresias.ID", ondelete="SET NULL"), unique=True)  # NULL si la membresía se eliminó
+    socio_id = Column("Socio_ID", Integer, nullable=False)     # Copia de Membresias.Socio_ID para el historial por socio
+    plan_id = Column("Plan_ID", Integer, nullable=False)
+    plan_nombre = Column("Plan_Nombre", String(100), nullable=False)
+    monto = Column("Monto", Float, nullable=False)
+    fecha_hora = Column("Fecha_Hora", DateTime, nullable=False)
+
+    membresia = relationship("MembresiaModel", back_populates="pago")
+
+class AccesoModel(Base):
+    """
+    Bitácora de accesos (sólo se agregan filas). Pensada para millones de registros al año:
+    columnas enteras (la marca de tiempo en segundos Unix, método y resultado como códigos de
+    aplicacion/serviciosAcceso.py) y sin llave foránea, para conservar el historial aunque
+    el socio se elimine y para registrar QR de socios inexistentes.
+    """
+    __tablename__ = "Accesos"
+    id = Column("ID", Integer, primary_key=True, autoincrement=True)
+    socio_id = Column("Socio_ID", Integer)                  # NULL si la huella no coincidió con nadie
+    marca_tiempo = Column("Marca_Tiempo", Integer, nullable=False)
+    metodo = Column("Metodo", SmallInteger, nullable=False)
+    resultado = Column("Resultado", SmallInteger, nullable=False)
+    kiosco = Column("Kiosco", SmallInteger, nullable=False)
+
+# --- RESÚMENES DIARIOS (tablero de la página de inicio) ---
+# Se actualizan en la misma transacción que cada alta, renovación o baja (ver bd/resumenes.py)
+# y se recalculan cada noche, así el tablero lee unas cuantas filas sin importar cuántos socios haya.
+
+class ResumenDiarioModel(Base):
+    """Altas (primera membresía de un socio), renovaciones e ingresos de cada día."""
+    __tablename__ = "Resumen_Diario"
+    fecha = Column("Fecha", Date, primary_key=True)
+    altas = Column("Altas", Integer, nullable=False, default=0)
+    renovaciones = Column("Renovaciones", Integer, nullable=False, default=0)
+    ingresos = Column("Ingresos", Float, nullable=False, default=0)
+
+class ResumenIngresosPlanModel(Base):
+    """Ingresos de cada día desglosados por plan (nombre con el que se cobró por última vez ese día)."""
+    __tablename__ = "Resumen_Ingresos_Plan"
+    fecha = Column("Fecha", Date, primary_key=True)
+    plan_id = Column("Plan_ID", Integer, primary_key=True)
+    plan_nombre = Column("Plan_Nombre", String(100), nullable=False)
+    pagos = Column("Pagos", Integer, nullable=False, default=0)
+    monto = Column("Monto", Float, nullable=False, default=0)
+
+class ResumenEstatusModel(Base):
+    """
+    Socios en cada grupo de estatus (activos, por vencer, vencidos) al día 'Fecha'.
+    La fila del día se calcula completa una vez (de noche o en la primera consulta del día) y
+    después sólo se ajusta con cada cambio; las de días anteriores quedan como historial.
+    """
+    __tablename__ = "Resumen_Estatus"
+    fecha = Column("Fecha", Date, primary_key=True)
+    estatus = Column("Estatus", String(20), primary_key=True)
+    socios = Column("Socios", Integer, nullable=False, default=0)
+
+# --- ÍNDICES DE RUTAS CALIENTES ---
+# Membresía más reciente por socio, barridos de vencimientos y joins con Planes.
+# Las bases existentes los reciben mediante bd/migraciones.py.
+Index("IX_Membresias_Socio_Fecha_Fin", MembresiaModel.socio_id, MembresiaModel.fecha_fin.desc())
+Index("IX_Membresias_Fecha_Fin", MembresiaModel.fecha_fin)
+Index("IX_Membresias_Plan_ID", MembresiaModel.plan_id)
+Index("IX_Membresias_Vigentes_Fecha_Fin", MembresiaVigenteModel.fecha_fin)
+# Listado paginado de socios ordenado por nombre
+Index("IX_Socios_Nombre", SocioModel.nombre, SocioModel.apellido_paterno, SocioModel.id)
+# Libro de pagos: ingresos por rango de fechas (y por plan dentro del rango) sin leer la tabla,
+# ingresos de un plan a lo largo del tiempo e historial de pagos de un socio
+Index("IX_Pagos_Fecha_Hora", PagoModel.fecha_hora, PagoModel.plan_id, PagoModel.monto)
+Index("IX_Pagos_Plan_Fecha_Hora", PagoModel.plan_id, PagoModel.fecha_hora, PagoModel.monto)
+Index("IX_Pagos_Socio_Fecha_Hora", PagoModel.socio_id, PagoModel.fecha_hora)
+# Bitácora de accesos: por rango de horas ("quién estaba a las 7pm") e historial por socio
+Index("IX_Accesos_Marca_Tiempo", AccesoModel.marca_tiempo)
+Index("IX_Accesos_Socio_Marca_Tiempo", AccesoModel.socio_id, AccesoModel.marca_tiempo)
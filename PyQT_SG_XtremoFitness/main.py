@@ -1,10 +1,26 @@
 import sys
+import atexit
 from PyQt6.QtWidgets import QApplication
 from Formularios.Form_Principal import Form_Principal
+from bd.migraciones import aplicar_migraciones
+from bd.respaldo import ProgramadorRespaldos
+from aplicacion.serviciosResumen import ProgramadorResumenes
+from bd.instrumentacion import instrumentacion, instrumentacion_activada
 
 # Este bloque asegura que el código solo se ejecute cuando corres este archivo directamente
 if __name__ == '__main__':
     
+    # 0. Llevar la base de datos a la última versión del esquema (índices, tablas nuevas).
+    aplicar_migraciones()
+    # Respaldo diario en caliente (hilo en segundo plano; no bloquea la interfaz)
+    ProgramadorRespaldos().start()
+    # Recálculo de los resúmenes del tablero de inicio al arrancar y cada noche
+    ProgramadorResumenes().start()
+    # Con XTREMO_SQL_INSTRUMENTACION=1, al cerrar las estadísticas de SQL quedan en
+    # bd/estadisticas_sql.json (python -m bd.instrumentacion)
+    if instrumentacion_activada():
+        atexit.register(instrumentacion.volcar)
+
     # 1. Crear la aplicación (el "motor"). SIEMPRE debe ser lo primero.
     app = QApplication(sys.argv)
     # 2. Ahora que la aplicación existe, creamos nuestra ventana principal.